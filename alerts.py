@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Zone Alerts
+===========
+Alert berbasis event: setiap update harga dicek terhadap SEMUA zona aktif
+(OB & FVG yang belum termitigasi / terisi, plus swing high/low yang belum
+di-sweep) semua symbol, bukan cuma sekali per jam di scheduler.
+
+- "touch" : harga masuk ke zona OB / FVG (sebelumnya di luar zona),
+- "sweep" : harga menembus swing high (naik) / swing low (turun).
+
+Zona per symbol disimpan urut berdasarkan batas bawah + segment tree
+max batas atas (`_BreachIndex`, sama dengan `scan_zones`), jadi pencarian
+zona yang dilewati pergerakan harga [a, b] adalah O(log n + k), bukan
+cek linear semua zona di setiap tick.
+
+Dedup: satu zona hanya memicu alert lagi setelah `cooldown` detik.
+"""
+
+import logging
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Optional
+
+from smc_engine import DEFAULT_CONFIG, SMCConfig, _BreachIndex, find_swings, scan_zones
+
+logger = logging.getLogger("XAU-BOT.alerts")
+
+
+# ================= ZONES =================
+
+@dataclass(frozen=True)
+class Zone:
+    symbol: str
+    interval: str
+    kind: str  # "OB" / "FVG" / "SWING"
+    side: str  # "bullish" / "bearish" untuk OB & FVG, "high" / "low" untuk swing
+    low: float
+    high: float
+    time: int  # epoch candle asal zona
+
+    @property
+    def key(self) -> tuple:
+        return (self.symbol, self.interval, self.kind, self.side, self.time)
+
+
+def build_zones(symbol: str, interval: str, candles, config: SMCConfig = DEFAULT_CONFIG) -> list[Zone]:
+    """
+    Semua zona aktif di akhir `candles`: OB belum termitigasi, FVG belum
+    terisi, dan swing high/low yang belum ditembus candle sesudahnya.
+    """
+    times, highs, lows = candles.times, candles.highs, candles.lows
+    zones = []
+
+    scan = scan_zones(candles)
+    for ob in scan.active_order_blocks:
+        zones.append(Zone(symbol, interval, "OB", ob.kind, ob.bottom, ob.top, times[ob.index]))
+    for fvg in scan.active_fvgs:
+        zones.append(Zone(symbol, interval, "FVG", fvg.kind, fvg.bottom, fvg.top, times[fvg.index]))
+
+    swings = find_swings(candles, config.swing_left, config.swing_right)
+
+    # Swing masih menyimpan liquidity kalau belum ada high (low) sesudahnya
+    # yang melewatinya: scan dari belakang dengan max/min berjalan.
+    n = len(times)
+    later_high = float("-inf")
+    later_low = float("inf")
+    position = n - 1
+    for s in reversed(swings):
+        while position > s.index:
+            later_high = max(later_high, highs[position])
+            later_low = min(later_low, lows[position])
+            position -= 1
+
+        if s.kind == "high" and s.price > later_high:
+            zones.append(Zone(symbol, interval, "SWING", "high", s.price, s.price, times[s.index]))
+        elif s.kind == "low" and s.price < later_low:
+            zones.append(Zone(symbol, interval, "SWING", "low", s.price, s.price, times[s.index]))
+
+    return zones
+
+
+class ZoneIndex:
+    """Index interval statis: zona urut batas bawah + segment tree max batas atas."""
+
+    def __init__(self, zones: list[Zone]):
+        self.zones = sorted(zones, key=lambda z: z.low)
+        self._lows = [z.low for z in self.zones]
+        self._highs = _BreachIndex([z.high for z in self.zones], negate=True)
+
+    def __len__(self):
+        return len(self.zones)
+
+    def overlapping(self, low: float, high: float) -> list[Zone]:
+        """Zona yang beririsan dengan [low, high] (zona.low <= high dan zona.high >= low)."""
+        end = bisect_right(self._lows, high)
+        found = []
+        i = self._highs.first_above(0, low)
+        while i is not None and i < end:
+            found.append(self.zones[i])
+            i = self._highs.first_above(i + 1, low)
+        return found
+
+
+# ================= ALERT ENGINE =================
+
+@dataclass
+class Alert:
+    zone: Zone
+    event: str  # "touch" / "sweep"
+    price: float
+    time: float
+
+
+class AlertEngine:
+
+    def __init__(self, cooldown: float = 900, clock=time.time):
+        self.cooldown = cooldown
+        self._clock = clock
+        self._zones: dict = {}  # (symbol, interval) -> list[Zone]
+        self._indexes: dict = {}  # symbol -> ZoneIndex
+        self._last_price: dict = {}
+        self._fired: dict = {}  # zone key -> waktu alert terakhir
+
+    def set_zones(self, symbol: str, interval: str, zones: list[Zone]):
+        """Ganti zona (symbol, interval) dengan hasil analisa terbaru, lalu bangun ulang index symbol."""
+        self._zones[(symbol, interval)] = zones
+
+        symbol_zones = [z for (s, _), items in self._zones.items() if s == symbol for z in items]
+        self._indexes[symbol] = ZoneIndex(symbol_zones)
+
+        # cooldown zona yang sudah tidak aktif tidak perlu diingat lagi
+        active = {z.key for items in self._zones.values() for z in items}
+        for key in [key for key in self._fired if key not in active]:
+            del self._fired[key]
+
+    def on_price(self, symbol: str, price: float) -> list[Alert]:
+        """Proses satu update harga. Return alert baru (sudah lolos dedup/cooldown)."""
+        prev = self._last_price.get(symbol)
+        first = prev is None
+        if first:
+            prev = price
+        self._last_price[symbol] = price
+
+        index = self._indexes.get(symbol)
+        if not index:
+            return []
+
+        now = self._clock()
+        alerts = []
+
+        for zone in index.overlapping(min(prev, price), max(prev, price)):
+            event = self._event(zone, prev, price, first)
+            if event is None:
+                continue
+
+            fired = self._fired.get(zone.key)
+            if fired is not None and now - fired < self.cooldown:
+                continue
+
+            self._fired[zone.key] = now
+            alerts.append(Alert(zone=zone, event=event, price=price, time=now))
+            logger.info(f"ZONE ALERT: {symbol} {zone.interval} {zone.kind} {zone.side} {event} @ {price}")
+
+        return alerts
+
+    @staticmethod
+    def _event(zone: Zone, prev: float, price: float, first: bool) -> Optional[str]:
+        if zone.kind == "SWING":
+            if zone.side == "high" and prev <= zone.high < price:
+                return "sweep"
+            if zone.side == "low" and prev >= zone.low > price:
+                return "sweep"
+            return None
+
+        # OB / FVG: hanya saat masuk zona dari luar (bukan setiap tick di dalam zona)
+        if not first and zone.low <= prev <= zone.high:
+            return None
+        return "touch"
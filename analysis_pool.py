@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Analysis Pool
+=============
+Jalankan pekerjaan engine (`analyze()`, `analyze_mtf()`, backtest) di luar
+event loop bot:
+- job kecil (history pendek) -> thread pool, tanpa biaya pickle,
+- job besar (>= `process_threshold` candle) -> process pool, bebas GIL,
+- antrian dibatasi `max_pending` job (termasuk yang sedang jalan):
+  job dengan `block=False` (mis. command user) langsung ditolak dengan
+  `PoolBusy` saat penuh, job terjadwal menunggu giliran,
+- setiap job punya timeout. Job yang timeout tetap dihitung pending
+  (memegang slot) sampai worker benar-benar selesai, jadi job yang
+  menggantung tidak bisa menumpuk tanpa batas di executor.
+
+Jadi latency command bot tetap datar walaupun analisa makin berat.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger("XAU-BOT.pool")
+
+PENDING_JOBS = REGISTRY.gauge("analysis_pending_jobs", "Job analisa yang antri / jalan di pool (termasuk yang sudah timeout)")
+
+
+class PoolBusy(Exception):
+    """Antrian analisa penuh (backpressure)."""
+
+
+class AnalysisPool:
+
+    def __init__(
+        self,
+        threads: int = 2,
+        processes: Optional[int] = None,
+        process_threshold: int = 2000,
+        max_pending: int = 32,
+        timeout: float = 30.0,
+    ):
+        """
+        `processes` = jumlah proses (None = jumlah core, 0 = tanpa process pool).
+        `process_threshold` = ukuran job (jumlah candle) minimal untuk process pool.
+        """
+        self.process_threshold = process_threshold
+        self.max_pending = max_pending
+        self.timeout = timeout
+
+        self._threads = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="analysis")
+        self._processes = ProcessPoolExecutor(max_workers=processes) if processes != 0 else None
+        self._slots = asyncio.Semaphore(max_pending)
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _executor(self, size: int):
+        if self._processes is not None and size >= self.process_threshold:
+            return self._processes
+        return self._threads
+
+    async def run(self, func, *args, size: int = 0, block: bool = True, timeout: Optional[float] = None):
+        """
+        Jalankan `func(*args)` di pool. `size` = ukuran job (jumlah candle)
+        untuk memilih thread / process. `block=False` -> `PoolBusy` kalau
+        antrian penuh. `asyncio.TimeoutError` kalau lewat `timeout`.
+        """
+        if not block and self._slots.locked():
+            self.rejected += 1
+            raise PoolBusy(f"antrian analisa penuh ({self.max_pending} job)")
+
+        await self._slots.acquire()
+        self.pending += 1
+        PENDING_JOBS.set(self.pending)
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._executor(size), func, *args)
+        except BaseException:
+            self._release()
+            raise
+        # slot dilepas saat job di worker selesai, bukan saat pemanggil berhenti menunggu
+        future.add_done_callback(self._release)
+
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+            self.completed += 1
+            return result
+
+        except asyncio.TimeoutError:
+            # job di worker tetap jalan sampai selesai (tetap memegang slot), hasilnya dibuang
+            self.timeouts += 1
+            logger.error(f"ANALYSIS TIMEOUT: {getattr(func, '__name__', func)} setelah {time.perf_counter() - started:.1f}s")
+            raise
+
+    def _release(self, future: Optional[asyncio.Future] = None):
+        self.pending -= 1
+        PENDING_JOBS.set(self.pending)
+        self._slots.release()
+        if future is not None and not future.cancelled():
+            future.exception()  # hasil job yang ditinggal tidak di-log "never retrieved"
+
+    def metrics(self) -> dict:
+        return {
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Backtest Walk-Forward
+=====================
+Replay strategi bot di atas data candle historis (CSV / Parquet):
+- Engine SMC dijalankan bar per bar dengan `IncrementalSMCEngine`
+  (bukan `analyze()` di slice yang makin panjang).
+- Sinyal dievaluasi di setiap close candle yang jatuh di kelipatan
+  `cadence` (default = interval candle, sama seperti `due_items()` di
+  `scheduler()` bot: item di-scan di setiap close candle interval-nya),
+  termasuk cek kalender sesi market, dengan window `SMC_CANDLE_COUNT`
+  candle terakhir. `cadence` lebih besar (mis. 1h untuk data 15min) =
+  hanya evaluasi di close candle yang sejajar dengan jam itu.
+- Entry/TP/SL memakai `build_trade_setup()` yang sama dengan bot, lalu
+  fill disimulasikan terhadap high/low candle-candle berikutnya.
+
+Asumsi simulasi (konservatif):
+- Entry terisi di harga close candle sinyal.
+- Posisi dibagi 2: setengah target TP1, setengah target TP2, SL sama.
+- Kalau SL dan TP tersentuh di candle yang sama, SL dianggap duluan.
+
+Contoh:
+    python backtest.py data/xauusd_15min.csv --window 60
+"""
+
+import argparse
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+from ingest import load_candles
+from market_session import DEFAULT_CALENDAR, SessionCalendar
+from smc_engine import (
+    DEFAULT_CONFIG,
+    CandleSeries,
+    IncrementalSMCEngine,
+    SMCConfig,
+    build_trade_setup,
+    interval_seconds,
+)
+
+logger = logging.getLogger("XAU-BOT.backtest")
+
+
+# ================= DATA LOADING =================
+
+def detect_interval(series: CandleSeries) -> int:
+    """Interval candle (detik) = selisih waktu terkecil antar candle berurutan."""
+    times = series.times
+    step = min((times[i + 1] - times[i] for i in range(min(len(times) - 1, 1000))), default=0)
+    if step <= 0:
+        raise ValueError("Tidak bisa mendeteksi interval candle (data kosong / timestamp dobel)")
+    return step
+
+
+# ================= TRADE SIMULATION =================
+
+@dataclass
+class Trade:
+    index: int              # index candle sinyal
+    time: int               # epoch close candle sinyal
+    bias: str
+    entry: float
+    tp1: float
+    tp2: float
+    sl: float
+    structure: str = ""
+    leg1: Optional[float] = None   # hasil (poin) setengah posisi target TP1
+    leg2: Optional[float] = None   # hasil (poin) setengah posisi target TP2
+    close_index: Optional[int] = None
+    close_time: Optional[int] = None  # epoch candle yang menutup trade (argumen `time` di update)
+    outcome: Optional[str] = None  # "TP2" / "TP1" / "SL"
+
+    @property
+    def closed(self) -> bool:
+        return self.close_index is not None
+
+    @property
+    def pnl(self) -> float:
+        """Profit rata-rata kedua leg, dalam poin harga."""
+        return ((self.leg1 or 0.0) + (self.leg2 or 0.0)) / 2
+
+    def update(self, index: int, high: float, low: float, time: Optional[int] = None):
+        """
+        Cek candle `index` (posisi di series) terhadap TP/SL. SL dicek
+        duluan (konservatif). `time` = epoch candle itu, disimpan di
+        `close_time` kalau trade selesai di candle ini.
+        """
+        if self.bias == "BUY":
+            sl_hit = low <= self.sl
+            tp1_hit = high >= self.tp1
+            tp2_hit = high >= self.tp2
+            risk = self.sl - self.entry
+        else:
+            sl_hit = high >= self.sl
+            tp1_hit = low <= self.tp1
+            tp2_hit = low <= self.tp2
+            risk = self.entry - self.sl
+
+        if self.leg1 is None:
+            if sl_hit:
+                self.leg1 = risk
+            elif tp1_hit:
+                self.leg1 = abs(self.tp1 - self.entry)
+
+        if self.leg2 is None:
+            if sl_hit:
+                self.leg2 = risk
+            elif tp2_hit:
+                self.leg2 = abs(self.tp2 - self.entry)
+
+        if self.leg1 is not None and self.leg2 is not None:
+            self.close_index = index
+            self.close_time = time
+            if self.leg2 > 0:
+                self.outcome = "TP2"
+            elif self.leg1 > 0:
+                self.outcome = "TP1"
+            else:
+                self.outcome = "SL"
+
+
+# ================= REPORT =================
+
+@dataclass
+class BacktestReport:
+    bars: int = 0
+    signal_checks: int = 0          # jumlah jam scheduler yang dievaluasi
+    trades: list = field(default_factory=list)
+
+    @property
+    def closed_trades(self) -> list:
+        return [t for t in self.trades if t.closed]
+
+    @property
+    def win_rate(self) -> float:
+        closed = self.closed_trades
+        if not closed:
+            return 0.0
+        return sum(1 for t in closed if t.pnl > 0) / len(closed)
+
+    @property
+    def expectancy(self) -> float:
+        closed = self.closed_trades
+        if not closed:
+            return 0.0
+        return sum(t.pnl for t in closed) / len(closed)
+
+    @property
+    def total_pnl(self) -> float:
+        return sum(t.pnl for t in self.closed_trades)
+
+    @property
+    def max_drawdown(self) -> float:
+        """Drawdown terbesar (poin) dari equity curve, diurutkan per waktu close trade."""
+        equity = peak = worst = 0.0
+        for t in sorted(self.closed_trades, key=lambda t: t.close_index):
+            equity += t.pnl
+            peak = max(peak, equity)
+            worst = max(worst, peak - equity)
+        return worst
+
+    @property
+    def trades_per_hour(self) -> float:
+        if not self.signal_checks:
+            return 0.0
+        return len(self.trades) / self.signal_checks
+
+    def summary(self) -> str:
+        closed = self.closed_trades
+        outcomes = {k: sum(1 for t in closed if t.outcome == k) for k in ("TP2", "TP1", "SL")}
+        return "\n".join([
+            f"Bars           : {self.bars}",
+            f"Signal checks  : {self.signal_checks}",
+            f"Trades         : {len(self.trades)} ({len(closed)} closed, {len(self.trades) - len(closed)} open)",
+            f"Outcome        : TP2={outcomes['TP2']} TP1={outcomes['TP1']} SL={outcomes['SL']}",
+            f"Win rate       : {self.win_rate * 100:.1f}%",
+            f"Expectancy     : {self.expectancy:+.2f} poin/trade",
+            f"Total PnL      : {self.total_pnl:+.2f} poin",
+            f"Max drawdown   : {self.max_drawdown:.2f} poin",
+            f"Trades per hour: {self.trades_per_hour:.3f}",
+        ])
+
+
+# ================= WALK-FORWARD =================
+
+def run_backtest(
+    series: CandleSeries,
+    window: Optional[int] = 60,
+    interval: Optional[int] = None,
+    config: SMCConfig = DEFAULT_CONFIG,
+    calendar: SessionCalendar = DEFAULT_CALENDAR,
+    cadence: Optional[int] = None,
+) -> BacktestReport:
+    """
+    Replay scheduler di atas `series`. `window` = jumlah candle yang
+    dianalisa tiap sinyal (SMC_CANDLE_COUNT di bot, None = seluruh history).
+    `interval` = durasi candle dalam detik (default: dideteksi dari data).
+    `cadence` = jarak evaluasi sinyal dalam detik (default: `interval`).
+    """
+    if interval is None:
+        interval = detect_interval(series)
+    cadence = cadence or interval
+
+    engine = IncrementalSMCEngine(config)
+    report = BacktestReport(bars=len(series))
+    open_trades: list[Trade] = []
+
+    times, opens, highs, lows, closes = series.times, series.opens, series.highs, series.lows, series.closes
+
+    # status market di waktu close setiap candle, dihitung sekaligus untuk seluruh kolom
+    trading = calendar.mask(times, offset=interval)
+
+    for i in range(len(series)):
+        t, high, low = times[i], highs[i], lows[i]
+
+        # 1) candle ini dipakai untuk cek TP/SL trade yang sudah terbuka
+        if open_trades:
+            for trade in open_trades:
+                trade.update(i, high, low, time=t + interval)
+            open_trades = [trade for trade in open_trades if not trade.closed]
+
+        engine.push_bar(t, opens[i], high, low, closes[i])
+
+        # 2) scheduler scan item ini saat candle close di kelipatan cadence (due_items)
+        close_time = t + interval
+        if close_time % cadence:
+            continue
+
+        if not trading[i]:
+            continue
+
+        report.signal_checks += 1
+
+        result = engine.result(window)
+        setup = build_trade_setup(result)
+        if setup is None:
+            continue
+
+        trade = Trade(
+            index=i,
+            time=close_time,
+            bias=setup.bias,
+            entry=setup.entry,
+            tp1=setup.tp1,
+            tp2=setup.tp2,
+            sl=setup.sl,
+            structure=result.structure,
+        )
+        report.trades.append(trade)
+        open_trades.append(trade)
+
+    return report
+
+
+# ================= CLI =================
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest strategi SMC bot")
+    parser.add_argument("path", help="File candle CSV / Parquet (kolom datetime,open,high,low,close)")
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=int(os.getenv("SMC_CANDLE_COUNT", "60")),
+        help="Jumlah candle per analisa (0 = seluruh history)",
+    )
+    parser.add_argument("--interval", default=None, help="Interval candle, mis. 15min / 1h (default: auto)")
+    parser.add_argument(
+        "--cadence", default=None, help="Jarak evaluasi sinyal, mis. 1h (default: setiap close candle)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    series = load_candles(args.path)
+    interval = interval_seconds(args.interval) if args.interval else None
+
+    logger.info(f"BACKTEST: {len(series)} bars dari {args.path}")
+    cadence = interval_seconds(args.cadence) if args.cadence else None
+    report = run_backtest(series, window=args.window or None, interval=interval, cadence=cadence)
+
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
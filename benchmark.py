@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Benchmark
+=========
+Ukur waktu & peak memory fungsi-fungsi utama `smc_engine` di atas candle
+sintetis yang deterministik (seed tetap), lalu bandingkan dengan baseline
+yang disimpan supaya regresi performa kelihatan sebelum di-merge.
+
+Generator candle (mirip XAU/USD, harga ~2000, volatilitas per bar ~0.15%):
+- trending : random walk dengan drift (leg naik / turun bergantian),
+- ranging  : mean reverting di sekitar satu level,
+- gappy    : sesi forex asli (libur weekend + jeda harian 1 jam) dengan
+             gap harga saat market buka lagi.
+
+Baseline referensi ada di `benchmarks/baseline.json` (ukuran default,
+lihat `meta` untuk mesin & versi Python); simpan ulang setelah optimasi
+yang disengaja. Case yang regresi diukur ulang (`--retries`) sebelum
+dianggap gagal, karena lonjakan sesaat di mesin yang sibuk wajar.
+Baseline juga menyimpan waktu loop kalibrasi pure-Python: dengan
+`--calibrate` waktu baseline diskalakan dengan rasio kalibrasi sekarang /
+baseline, untuk membandingkan baseline dari mesin lain.
+
+Contoh:
+    python benchmark.py --save benchmarks/baseline.json
+    python benchmark.py --compare benchmarks/baseline.json
+    python benchmark.py --sizes 60,1000,1000000 --functions analyze,find_swings
+
+Exit code 1 kalau ada regresi (`--compare`), jadi bisa dipakai di CI.
+Tidak butuh network / package tambahan.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from smc_engine import (
+    CandleSeries,
+    IncrementalSMCEngine,
+    analyze,
+    find_fair_value_gaps,
+    find_order_blocks,
+    find_swings,
+    interval_seconds,
+    scan_zones,
+)
+from timeframes import resample
+
+logger = logging.getLogger("XAU-BOT.benchmark")
+
+DEFAULT_SIZES = (60, 1_000, 10_000, 100_000)
+GENERATORS = ("trending", "ranging", "gappy")
+
+START_TIME = 1_704_067_200  # 2024-01-01 00:00 UTC (Senin)
+START_PRICE = 2000.0
+VOLATILITY = 0.0015
+
+
+# ================= GENERATORS =================
+
+def _bar(series: CandleSeries, rng: random.Random, t: int, open_: float, close: float):
+    wick = abs(close - open_) * 0.3 + open_ * VOLATILITY * 0.5
+    high = max(open_, close) + rng.random() * wick
+    low = min(open_, close) - rng.random() * wick
+    series.append(t, round(open_, 2), round(high, 2), round(low, 2), round(close, 2))
+
+
+def generate_trending(n: int, seed: int = 1, interval: str = "1h") -> CandleSeries:
+    rng = random.Random(seed)
+    step = interval_seconds(interval)
+    series = CandleSeries()
+    price = START_PRICE
+    drift = VOLATILITY * 0.3
+
+    for i in range(n):
+        if i % 200 == 0:
+            drift = -drift if rng.random() < 0.5 else drift
+        close = price * (1 + drift + rng.gauss(0, VOLATILITY))
+        _bar(series, rng, START_TIME + i * step, price, close)
+        price = close
+
+    return series
+
+
+def generate_ranging(n: int, seed: int = 1, interval: str = "1h") -> CandleSeries:
+    rng = random.Random(seed)
+    step = interval_seconds(interval)
+    series = CandleSeries()
+    price = START_PRICE
+
+    for i in range(n):
+        # tarik kembali ke START_PRICE (Ornstein-Uhlenbeck diskrit)
+        close = price + 0.05 * (START_PRICE - price) + price * rng.gauss(0, VOLATILITY)
+        _bar(series, rng, START_TIME + i * step, price, close)
+        price = close
+
+    return series
+
+
+def generate_gappy(n: int, seed: int = 1, interval: str = "1h") -> CandleSeries:
+    rng = random.Random(seed)
+    step = interval_seconds(interval)
+    series = CandleSeries()
+    price = START_PRICE
+    t = START_TIME
+    gap = False
+
+    while len(series) < n:
+        moment = datetime.fromtimestamp(t, timezone.utc)
+        weekday, hour = moment.weekday(), moment.hour
+
+        closed = (
+            (weekday == 4 and hour >= 21) or weekday == 5 or (weekday == 6 and hour < 22)
+            or hour == 21  # jeda harian
+        )
+        if closed:
+            gap = True
+            t += step
+            continue
+
+        open_ = price
+        if gap:
+            open_ = price * (1 + rng.gauss(0, VOLATILITY * 3))  # gap saat market buka
+            gap = False
+
+        close = open_ * (1 + rng.gauss(0, VOLATILITY))
+        _bar(series, rng, t, open_, close)
+        price = close
+        t += step
+
+    return series
+
+
+def generate(kind: str, n: int, seed: int = 1) -> CandleSeries:
+    generators = {"trending": generate_trending, "ranging": generate_ranging, "gappy": generate_gappy}
+    return generators[kind](n, seed)
+
+
+# ================= CASES =================
+
+def _incremental(series: CandleSeries):
+    engine = IncrementalSMCEngine()
+    times, opens, highs, lows, closes = series.times, series.opens, series.highs, series.lows, series.closes
+    for i in range(len(times)):
+        engine.push_bar(times[i], opens[i], highs[i], lows[i], closes[i])
+    return engine.result(window=60)
+
+
+CASES = {
+    "find_swings": lambda s: find_swings(s, 2, 2),
+    "find_fair_value_gaps": lambda s: find_fair_value_gaps(s, 15),
+    "find_order_blocks": lambda s: find_order_blocks(s, "BOS_UP", 20),
+    "scan_zones": scan_zones,
+    "analyze": analyze,
+    "incremental": _incremental,
+    "resample_4h": lambda s: resample(s, "4h"),
+}
+
+
+# ================= MEASURE =================
+
+def measure_time(func, series, min_time: float = 0.2, max_repeat: int = 50) -> dict:
+    """Ulangi sampai total >= `min_time` detik (maks `max_repeat`), ambil min & median."""
+    timings = []
+    total = 0.0
+
+    func(series)  # warm-up (cache, lazy import, dsb.)
+    gc.collect()
+    while len(timings) < max_repeat and (total < min_time or len(timings) < 3):
+        started = time.perf_counter()
+        func(series)
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+        total += elapsed
+        if elapsed > min_time and total > 5 * min_time:
+            break  # job besar: cukup beberapa kali
+
+    return {"seconds": min(timings), "median": statistics.median(timings), "runs": len(timings)}
+
+
+def _calibration_loop(n: int = 200_000) -> float:
+    total = 0.0
+    values = [i * 0.5 for i in range(1000)]
+    for i in range(n):
+        total += values[i % 1000] * 1.0001
+    return total
+
+
+def calibrate() -> float:
+    """Waktu (detik) loop pure-Python tetap, independen dari kode yang di-benchmark."""
+    return measure_time(lambda _: _calibration_loop(), None)["seconds"]
+
+
+def measure_memory(func, series) -> int:
+    """Peak memory (byte) yang dialokasikan selama satu panggilan."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(series)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmarks(sizes, kinds=GENERATORS, functions=None, seed: int = 1, memory: bool = True) -> dict:
+    functions = functions or list(CASES)
+    results = {}
+
+    for kind in kinds:
+        for n in sizes:
+            series = generate(kind, n, seed)
+            for name in functions:
+                key = f"{name}|{kind}|{n}"
+                stats = measure_time(CASES[name], series)
+                if memory:
+                    stats["peak_kb"] = round(measure_memory(CASES[name], series) / 1024, 1)
+                results[key] = stats
+                logger.info(
+                    f"BENCH {key}: {stats['seconds'] * 1000:.3f} ms"
+                    + (f", peak {stats['peak_kb']} KB" if memory else "")
+                )
+
+    return results
+
+
+def remeasure(results: dict, keys, seed: int = 1, memory: bool = True):
+    """Ukur ulang `keys` ("name|kind|n") dan simpan waktu terbaik di `results`."""
+    for key in keys:
+        name, kind, n = key.split("|")
+        again = run_benchmarks([int(n)], [kind], [name], seed, memory)[key]
+        if again["seconds"] < results[key]["seconds"]:
+            results[key] = again
+
+
+# ================= BASELINE =================
+
+def save_baseline(results: dict, path: str, calibration: float = None):
+    payload = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "calibration": calibration,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> tuple:
+    """(results, meta) dari file `save_baseline`."""
+    with open(path) as f:
+        payload = json.load(f)
+    return payload["results"], payload.get("meta", {})
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float = 0.25, min_seconds: float = 1e-3, scale: float = 1.0
+) -> list[dict]:
+    """
+    Bandingkan hasil dengan baseline per key. Rasio waktu > 1 + threshold
+    -> REGRESSION, < 1 - threshold -> IMPROVED. Case yang lebih cepat dari
+    `min_seconds` di kedua sisi dianggap noise (selalu OK): di bawah ~1 ms
+    rasio antar run yang sama bisa 0.6x - 1.7x. `scale` = pengali waktu
+    baseline (rasio kalibrasi mesin sekarang / mesin baseline).
+    """
+    rows = []
+    for key in sorted(results):
+        current = results[key]
+        base = baseline.get(key)
+        if base is None:
+            rows.append({"key": key, "status": "NEW", "ratio": None, **current})
+            continue
+
+        base_seconds = base["seconds"] * scale
+        ratio = current["seconds"] / base_seconds if base_seconds else math.inf
+        status = "OK"
+        if max(current["seconds"], base_seconds) >= min_seconds:
+            if ratio > 1 + threshold:
+                status = "REGRESSION"
+            elif ratio < 1 - threshold:
+                status = "IMPROVED"
+
+        mem_ratio = None
+        if current.get("peak_kb") and base.get("peak_kb"):
+            mem_ratio = current["peak_kb"] / base["peak_kb"]
+            if mem_ratio > 1 + threshold and status == "OK":
+                status = "MEM REGRESSION"
+
+        rows.append({
+            "key": key,
+            "status": status,
+            "ratio": ratio,
+            "mem_ratio": mem_ratio,
+            "base_seconds": base_seconds,
+            **current,
+        })
+    return rows
+
+
+def format_report(rows: list[dict]) -> str:
+    lines = [f"{'case':<42} {'base ms':>10} {'now ms':>10} {'ratio':>7} {'mem':>7}  status"]
+    for row in rows:
+        base = f"{row['base_seconds'] * 1000:.3f}" if row.get("base_seconds") is not None else "-"
+        ratio = f"{row['ratio']:.2f}x" if row.get("ratio") is not None else "-"
+        mem = f"{row['mem_ratio']:.2f}x" if row.get("mem_ratio") is not None else "-"
+        lines.append(
+            f"{row['key']:<42} {base:>10} {row['seconds'] * 1000:>10.3f} {ratio:>7} {mem:>7}  {row['status']}"
+        )
+
+    regressions = sum(1 for row in rows if "REGRESSION" in row["status"])
+    lines.append(f"\n{len(rows)} case, {regressions} regresi")
+    return "\n".join(lines)
+
+
+# ================= MAIN =================
+
+def _list(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fungsi smc_engine di atas candle sintetis")
+    parser.add_argument("--sizes", type=lambda v: [int(x) for x in _list(v)], default=list(DEFAULT_SIZES))
+    parser.add_argument("--generators", type=_list, default=list(GENERATORS))
+    parser.add_argument("--functions", type=_list, default=None, help=f"Default semua: {', '.join(CASES)}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="Lewati pengukuran peak memory")
+    parser.add_argument("--save", help="Simpan hasil sebagai baseline JSON")
+    parser.add_argument("--compare", help="Bandingkan dengan baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Toleransi regresi (0.25 = 25%%)")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Case lebih cepat dari ini dianggap noise")
+    parser.add_argument(
+        "--calibrate", action="store_true", help="Skalakan baseline dengan rasio kalibrasi (baseline mesin lain)"
+    )
+    parser.add_argument(
+        "--retries", type=int, default=2, help="Ukur ulang case yang regresi sebanyak ini sebelum gagal (noise)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    for name in args.functions or []:
+        if name not in CASES:
+            parser.error(f"function tidak dikenal: {name}")
+
+    # kalibrasi sebelum & sesudah, ambil yang tercepat (paling sedikit gangguan)
+    calibration = calibrate()
+    results = run_benchmarks(args.sizes, args.generators, args.functions, args.seed, memory=not args.no_memory)
+    calibration = min(calibration, calibrate())
+    logger.info(f"CALIBRATION: {calibration * 1000:.3f} ms")
+
+    if args.save:
+        save_baseline(results, args.save, calibration)
+        logger.info(f"BASELINE DISIMPAN: {args.save}")
+
+    if args.compare:
+        baseline, meta = load_baseline(args.compare)
+        scale = 1.0
+        if args.calibrate and meta.get("calibration"):
+            scale = calibration / meta["calibration"]
+            logger.info(f"BASELINE SCALE: {scale:.2f}x (kalibrasi sekarang / baseline)")
+        rows = compare(results, baseline, args.threshold, args.min_ms / 1000, scale)
+        for attempt in range(args.retries):
+            regressed = [row["key"] for row in rows if "REGRESSION" in row["status"]]
+            if not regressed:
+                break
+            logger.info(f"RETRY {attempt + 1}/{args.retries}: {len(regressed)} case regresi diukur ulang")
+            remeasure(results, regressed, args.seed, memory=not args.no_memory)
+            rows = compare(results, baseline, args.threshold, args.min_ms / 1000, scale)
+        print(format_report(rows))
+        if any("REGRESSION" in row["status"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,35 @@
 #!/usr/bin/env python3
 
 import os
+import time
 import asyncio
 import logging
-import requests
 
-from datetime import datetime, timedelta
+from datetime import datetime
 
-import pytz
 from dotenv import load_dotenv
 
 from telegram import Update, BotCommand
+from telegram.error import BadRequest, Forbidden
 from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
 
-from smc_engine import Candle, analyze
+from alerts import AlertEngine, build_zones
+from analysis_pool import AnalysisPool, PoolBusy
+from candle_cache import CandleCache
+from candle_history import HistoryFetcher
+from candle_store import CandleStore
+from journal import SignalJournal
+from market_data import CandleProvider, FileProvider, ProviderError, TwelveDataProvider
+from market_session import WIB, SessionCalendar
+from metrics import REGISTRY, loop_time, start_http_server
+from price_stream import PriceStream
+from rate_limit import PRIORITY_ADHOC, PRIORITY_SCHEDULED, BudgetExhausted, CreditScheduler
+from scanner import MarketScanner, due_items, parse_watchlist
+from signal_snapshot import SnapshotStore
+from subscriptions import ANY, SubscriptionStore
+from smc_engine import DEFAULT_CONFIG, IncrementalSMCEngine, build_trade_setup, interval_seconds, set_stage_observer
+from telegram_queue import SendQueue
+from timeframes import MAX_BASE_COUNT, analyze_mtf, base_count
 
 # ================= LOAD ENV =================
 
@@ -32,9 +48,88 @@ THREAD_ID = int(os.getenv("THREAD_ID", "0"))
 SMC_INTERVAL = os.getenv("SMC_INTERVAL", "1h")
 SMC_CANDLE_COUNT = int(os.getenv("SMC_CANDLE_COUNT", "60"))
 
-# ================= TIMEZONE =================
-
-WIB = pytz.timezone("Asia/Jakarta")
+# Jumlah candle maksimal yang disimpan di history lokal per symbol+interval.
+SMC_HISTORY_BARS = int(os.getenv("SMC_HISTORY_BARS", "5000"))
+
+# Direktori penyimpanan candle di disk (kosongkan untuk menonaktifkan).
+CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR", "data/candles")
+
+SYMBOL = "XAU/USD"
+
+# Watchlist symbol x timeframe untuk scheduler, mis.
+# "XAU/USD:15min,1h,4h@123; XAG/USD:1h; EUR/USD:1h" (@123 = topic/thread id).
+# Default: hanya SYMBOL di SMC_INTERVAL, ke THREAD_ID.
+WATCHLIST = parse_watchlist(os.getenv("WATCHLIST", f"{SYMBOL}:{SMC_INTERVAL}"), SMC_INTERVAL)
+
+# Timeframe konfirmasi (dibangun dari candle base, tanpa request API tambahan),
+# mis. "1h,4h" untuk setup 15min. Kosong = tanpa konfirmasi.
+SMC_CONFLUENCE = tuple(tf.strip() for tf in os.getenv("SMC_CONFLUENCE", "").split(",") if tf.strip())
+
+# Candle base per fetch dibatasi outputsize API (5000) dan history lokal,
+# supaya fetch delta tetap jalan (lihat base_count).
+SMC_BASE_LIMIT = min(SMC_HISTORY_BARS, MAX_BASE_COUNT)
+
+# Batas kredit API data (Twelve Data free tier: 8 kredit / menit, 800 / hari).
+# API_SCHEDULED_RESERVE = kredit harian terakhir yang dicadangkan untuk scan
+# terjadwal (fetch ad-hoc /price /signal ditolak kalau tinggal cadangan).
+API_RATE_PER_MINUTE = float(os.getenv("API_RATE_PER_MINUTE", "8"))
+API_CREDITS_PER_DAY = int(os.getenv("API_CREDITS_PER_DAY", "800")) or None
+API_SCHEDULED_RESERVE = int(os.getenv("API_SCHEDULED_RESERVE", "0"))
+
+# Worker pool analisa: job kecil di thread, job >= ANALYSIS_PROCESS_THRESHOLD
+# candle di proses (SCAN_WORKERS proses, 0 = jumlah core). Maksimal
+# ANALYSIS_MAX_PENDING job antri; /signal ditolak saat penuh.
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "0"))
+ANALYSIS_THREADS = int(os.getenv("ANALYSIS_THREADS", "2"))
+ANALYSIS_PROCESS_THRESHOLD = int(os.getenv("ANALYSIS_PROCESS_THRESHOLD", "2000"))
+ANALYSIS_MAX_PENDING = int(os.getenv("ANALYSIS_MAX_PENDING", "32"))
+ANALYSIS_TIMEOUT = float(os.getenv("ANALYSIS_TIMEOUT", "30"))
+
+# Sumber data candle: "twelvedata" (default) atau "file" (CSV lokal di DATA_FILE,
+# untuk test / development tanpa kuota API).
+DATA_PROVIDER = os.getenv("DATA_PROVIDER", "twelvedata")
+DATA_FILE = os.getenv("DATA_FILE")
+# Format response Twelve Data untuk fetch satu symbol: "json" (default) atau
+# "csv" (payload lebih kecil, diparse langsung ke kolom numerik).
+TWELVEDATA_FORMAT = os.getenv("TWELVEDATA_FORMAT", "json").lower()
+
+# Streaming harga lewat WebSocket Twelve Data (butuh package websockets):
+# /price dijawab dari tick terakhir di memori dan liquidity sweep dicek
+# intrabar. STREAM_MAX_AGE = umur tick maksimal (detik) sebelum /price
+# kembali memakai candle API.
+PRICE_STREAM = os.getenv("PRICE_STREAM", "0") == "1"
+STREAM_MAX_AGE = float(os.getenv("STREAM_MAX_AGE", "30"))
+
+# Alert saat harga menyentuh zona OB / FVG aktif atau menyapu swing high/low
+# (dicek di setiap tick kalau PRICE_STREAM aktif, selain itu di setiap scan).
+# ZONE_ALERT_COOLDOWN = detik sebelum zona yang sama boleh alert lagi.
+ZONE_ALERTS = os.getenv("ZONE_ALERTS", "0") == "1"
+ZONE_ALERT_COOLDOWN = float(os.getenv("ZONE_ALERT_COOLDOWN", "900"))
+
+# Antrian pesan Telegram: jarak minimal antar pesan per chat (grup: 20 pesan /
+# menit -> 3 detik) dan jendela penggabungan pesan yang masuk bersamaan.
+TELEGRAM_CHAT_INTERVAL = float(os.getenv("TELEGRAM_CHAT_INTERVAL", "3"))
+TELEGRAM_COALESCE = float(os.getenv("TELEGRAM_COALESCE", "1"))
+# Maksimal request sendMessage yang berjalan bersamaan (fan-out ke banyak chat).
+TELEGRAM_MAX_INFLIGHT = int(os.getenv("TELEGRAM_MAX_INFLIGHT", "16"))
+
+# Database SQLite subscription chat (/subscribe). Kosongkan = hanya di memori.
+SUBSCRIPTIONS_DB = os.getenv("SUBSCRIPTIONS_DB", "data/subscriptions.db")
+
+# Jurnal SQLite semua sinyal & alert zona + outcome TP/SL (/history).
+# Kosongkan = hanya di memori.
+JOURNAL_DB = os.getenv("JOURNAL_DB", "data/journal.db")
+
+# Endpoint metric format Prometheus (GET http://METRICS_HOST:METRICS_PORT/metrics).
+# 0 = nonaktif; ringkasan tetap bisa dilihat lewat command /metrics.
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Kalender sesi market (jam New York, ikut DST). MARKET_HOLIDAYS = tanggal
+# tambahan tanpa sesi (YYYY-MM-DD dipisah koma) selain tahun baru, Good Friday
+# dan Natal. MARKET_DAILY_BREAK=0 -> tanpa jeda harian 17:00 - 18:00 ET.
+MARKET_HOLIDAYS = [d.strip() for d in os.getenv("MARKET_HOLIDAYS", "").split(",") if d.strip()]
+MARKET_DAILY_BREAK = os.getenv("MARKET_DAILY_BREAK", "1") == "1"
 
 # ================= LOGGING =================
 
@@ -45,152 +140,373 @@ logging.basicConfig(
 
 logger = logging.getLogger("XAU-BOT")
 
-# ================= GLOBAL =================
+for _interval in sorted({SMC_INTERVAL, *(item.interval for item in WATCHLIST)}):
+    _needed = base_count(_interval, SMC_CONFLUENCE, SMC_CANDLE_COUNT, limit=float("inf"))
+    if _needed > SMC_BASE_LIMIT:
+        logger.warning(
+            f"CONFLUENCE {','.join(SMC_CONFLUENCE)} DARI {_interval} BUTUH {_needed} CANDLE, "
+            f"DIBATASI {SMC_BASE_LIMIT} (timeframe terbesar dapat lebih sedikit dari {SMC_CANDLE_COUNT} candle)"
+        )
+
+# ================= METRICS =================
 
-cached_candles = None
-cached_candles_time = None
+FETCH_SECONDS = REGISTRY.histogram("candle_fetch_seconds", "Durasi fetch candle (termasuk antri kredit API)", ("interval",))
+ENGINE_STAGE_SECONDS = REGISTRY.histogram(
+    "engine_stage_seconds",
+    "Durasi per tahap analyze()",
+    ("stage",),
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1.0),
+)
+SCAN_SECONDS = REGISTRY.histogram("scan_seconds", "Durasi satu scan watchlist")
+SCHEDULER_DRIFT_SECONDS = REGISTRY.histogram(
+    "scheduler_drift_seconds", "Selisih waktu scheduler bangun terhadap next_run yang dijadwalkan"
+)
+
+set_stage_observer(lambda stage, seconds: ENGINE_STAGE_SECONDS.observe(seconds, stage=stage))
+
+# ================= GLOBAL =================
 
 last_signal_time = None
 tasks_started = False
 
-# ================= MARKET SESSION =================
+# ================= CLOCK =================
 
-def is_trading_time():
+# Sumber waktu (epoch detik) untuk scheduler, cache, budget API, dsb.
+# Mode replay (replay.py) menggantinya dengan jam virtual.
+clock = time.time
 
-    now = datetime.now(WIB)
 
-    day = now.weekday()
-    hour = now.hour
+def now() -> float:
+    return clock()
 
-    # Sabtu sampai jam 03:00 WIB
-    if day == 5:
-        return hour < 3
 
-    # Minggu OFF
-    if day == 6:
-        return False
+def now_wib() -> datetime:
+    return datetime.fromtimestamp(clock(), WIB)
 
-    # Senin mulai jam 07:00 WIB
-    if day == 0:
-        return hour >= 7
 
-    # Selasa - Jumat ON
-    return True
+# ================= MARKET SESSION =================
 
+market_calendar = SessionCalendar(holidays=MARKET_HOLIDAYS, daily_break=MARKET_DAILY_BREAK)
 
 # ================= GET CANDLES =================
 
-def get_candles(interval: str = None, count: int = None):
+def create_provider() -> CandleProvider:
+    """Pilih provider data dari env DATA_PROVIDER ("twelvedata" / "file")."""
+    if DATA_PROVIDER == "file":
+        return FileProvider(default_path=DATA_FILE)
+    return TwelveDataProvider(TWELVE_TOKEN, csv=TWELVEDATA_FORMAT == "csv")
+
+
+provider = create_provider()
+candle_store = CandleStore(CANDLE_STORE_DIR) if CANDLE_STORE_DIR else None
+history_fetcher = HistoryFetcher(provider, max_bars=SMC_HISTORY_BARS, store=candle_store)
+
+
+fetch_scheduler = CreditScheduler(
+    per_minute=API_RATE_PER_MINUTE,
+    per_day=API_CREDITS_PER_DAY,
+    scheduled_reserve=API_SCHEDULED_RESERVE,
+    clock=now,
+)
+
+
+async def fetch_candles(symbol: str, interval: str, count: int):
     """
-    Ambil data candle OHLC dari Twelve Data (endpoint time_series).
-    Dipakai untuk analisa struktur SMC, bukan cuma 1 titik harga.
-    Cache 60 detik supaya hemat kuota API (free tier terbatas).
+    Ambil candle dari provider (tanpa cache). Lewat `history_fetcher`, jadi
+    setelah fetch pertama hanya candle baru (delta) yang di-download.
+    Semua fetch berbagi satu `fetch_scheduler` supaya kuota API tidak jebol;
+    fetch dari sini prioritas ad-hoc (antri di belakang scan terjadwal).
     """
 
-    global cached_candles
-    global cached_candles_time
+    with FETCH_SECONDS.time(clock=loop_time, interval=interval):
 
-    interval = interval or SMC_INTERVAL
-    count = count or SMC_CANDLE_COUNT
+        await fetch_scheduler.acquire(1, PRIORITY_ADHOC)
 
-    now = datetime.now(WIB)
+        candles = await history_fetcher.fetch(symbol, interval, count)
 
-    if (
-        cached_candles is not None
-        and cached_candles_time is not None
-    ):
-        diff = (now - cached_candles_time).total_seconds()
-        if diff < 60:
-            logger.info("USING CACHED CANDLES")
-            return cached_candles
+    logger.info(f"LIVE CANDLES: {symbol} {interval} {len(candles)} bars, last close = {candles[-1].close}")
 
-    if not TWELVE_TOKEN:
-        logger.error("TWELVE_TOKEN belum di-set di environment variable")
-        return cached_candles
+    return candles
 
-    try:
-        url = (
-            "https://api.twelvedata.com/time_series"
-            "?symbol=XAU/USD"
-            f"&interval={interval}"
-            f"&outputsize={count}"
-            f"&apikey={TWELVE_TOKEN}"
-        )
 
-        response = requests.get(url, timeout=15)
+candle_cache = CandleCache(fetch_candles, clock=now)
 
-        logger.info(f"TWELVEDATA STATUS: {response.status_code}")
 
-        data = response.json()
+async def prefetch_candles(symbols: list[str], interval: str, count: int):
+    """
+    Fetch terjadwal untuk banyak symbol di satu interval: request batch
+    (maks kredit per menit per request) dengan prioritas scheduled, lalu
+    hasilnya langsung masuk `candle_cache` sehingga scan tinggal cache hit.
+    """
 
-        if data.get("status") == "error":
-            logger.error(f"TWELVEDATA ERROR: {data.get('message')}")
-            return cached_candles
+    if DATA_PROVIDER != "file" and not TWELVE_TOKEN:
+        return
 
-        values = data.get("values")
+    chunk_size = fetch_scheduler.max_credits
 
-        if not values:
-            logger.error(f"TWELVEDATA: no values in response: {data}")
-            return cached_candles
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
 
-        # Twelve Data mengembalikan data dari yang TERBARU ke TERLAMA -> kita balik
-        values = list(reversed(values))
+        await fetch_scheduler.acquire(len(chunk), PRIORITY_SCHEDULED)
 
-        candles = [
-            Candle(
-                time=v["datetime"],
-                open=float(v["open"]),
-                high=float(v["high"]),
-                low=float(v["low"]),
-                close=float(v["close"]),
-            )
-            for v in values
-        ]
+        results = await history_fetcher.fetch_many(chunk, interval, count)
 
-        cached_candles = candles
-        cached_candles_time = now
+        for symbol, candles in results.items():
+            if isinstance(candles, Exception):
+                logger.error(f"PREFETCH ERROR {symbol} {interval}: {candles}")
+                continue
+            candle_cache.put(symbol, interval, count, candles)
 
-        logger.info(f"LIVE CANDLES: {len(candles)} bars, last close = {candles[-1].close}")
+        logger.info(f"PREFETCH: {len(chunk)} symbol {interval}, budget {fetch_scheduler.metrics()['day_remaining']}")
 
-        return candles
+
+async def get_candles(interval: str = None, count: int = None, symbol: str = None):
+    """
+    Ambil data candle OHLC dari provider data (default Twelve Data, endpoint time_series).
+    Dipakai untuk analisa struktur SMC, bukan cuma 1 titik harga.
+    Lewat `candle_cache`: cache per (symbol, interval, count) sampai close
+    candle berikutnya / maks 60 detik, request bersamaan digabung jadi satu,
+    dan data stale di candle yang sama disajikan sambil di-refresh di
+    background. Setelah candle close selalu menunggu data baru; data lama
+    hanya dipakai kalau provider error / budget habis.
+    """
+
+    interval = interval or SMC_INTERVAL
+    count = count or SMC_CANDLE_COUNT
+    symbol = symbol or SYMBOL
+
+    if DATA_PROVIDER != "file" and not TWELVE_TOKEN:
+        logger.error("TWELVE_TOKEN belum di-set di environment variable")
+        return candle_cache.peek(symbol, interval, count)
+
+    try:
+        return await candle_cache.get(symbol, interval, count)
+
+    except BudgetExhausted as e:
+        logger.error(f"API BUDGET EXHAUSTED: {e}")
+
+    except ProviderError as e:
+        logger.error(f"TWELVEDATA ERROR: {e}")
 
     except Exception as e:
         logger.error(f"CANDLE FETCH ERROR: {e}")
 
-    return cached_candles
+    return candle_cache.peek(symbol, interval, count)
 
 
-def get_price():
-    """Harga terkini = close candle terakhir."""
-    candles = get_candles()
+async def get_price():
+    """Harga terkini = tick terakhir dari stream (kalau aktif), selain itu close candle terakhir."""
+    if price_stream is not None:
+        p = price_stream.price(SYMBOL, max_age=STREAM_MAX_AGE)
+        if p is not None:
+            return p
+
+    candles = await get_candles()
     if not candles:
         return None
     return candles[-1].close
 
 
+# ================= PRICE STREAM =================
+
+price_stream = PriceStream(
+    sorted({item.symbol for item in WATCHLIST} | {SYMBOL}),
+    interval=SMC_INTERVAL,
+    api_key=TWELVE_TOKEN,
+) if PRICE_STREAM else None
+
+intrabar_engines = {}  # symbol -> (engine, price_stream.reconnects saat di-seed)
+intrabar_alerted = set()
+
+
+def intrabar_engine(symbol: str):
+    """
+    Engine incremental per symbol, di-seed dari history candle SMC_INTERVAL.
+    Di-seed ulang setelah stream reconnect (tick selama putus hilang, candle
+    forming bisa salah) dan setelah scheduler fetch candle SMC_INTERVAL baru
+    (lihat `handle_scan`), supaya engine tidak menyimpang dari data provider.
+    """
+    seeded = intrabar_engines.get(symbol)
+    if seeded is not None:
+        engine, reconnects = seeded
+        if reconnects == price_stream.reconnects:
+            return engine
+        logger.info(f"INTRABAR RESEED: {symbol} setelah stream reconnect")
+
+    history = history_fetcher.history(symbol, SMC_INTERVAL)
+    if len(history) < DEFAULT_CONFIG.min_candles:
+        return None
+
+    series = history.window(SMC_CANDLE_COUNT)
+    engine = IncrementalSMCEngine()
+    for i in range(len(series)):
+        engine.push_bar(series.times[i], series.opens[i], series.highs[i], series.lows[i], series.closes[i])
+
+    last = len(series) - 1
+    price_stream.seed(
+        symbol, series.times[last], series.opens[last], series.highs[last], series.lows[last], series.closes[last]
+    )
+
+    intrabar_engines[symbol] = (engine, price_stream.reconnects)
+    return engine
+
+
+def on_stream_tick(app, tick, bar, closed):
+    """Cek alert zona, update candle forming di engine lalu cek liquidity sweep intrabar."""
+    if ZONE_ALERTS:
+        check_zone_alerts(app, tick.symbol, tick.price)
+
+    engine = intrabar_engine(tick.symbol)
+    if engine is None:
+        return
+
+    if bar.start == engine.candles.last_time:
+        engine.update_last_bar(bar.start, bar.open, bar.high, bar.low, bar.close)
+    elif bar.start > engine.candles.last_time:
+        engine.push_bar(bar.start, bar.open, bar.high, bar.low, bar.close)
+    else:
+        return
+
+    if closed is not None:
+        intrabar_alerted.difference_update([key for key in intrabar_alerted if key[1] < bar.start])
+
+    sweep = engine.sweep(window=SMC_CANDLE_COUNT)
+    key = (tick.symbol, bar.start, sweep)
+    if sweep is None or key in intrabar_alerted:
+        return
+
+    intrabar_alerted.add(key)
+    logger.info(f"INTRABAR SWEEP: {tick.symbol} {SMC_INTERVAL} {sweep} @ {tick.price}")
+
+    side = "di bawah swing low (potensi reversal naik)" if sweep == "buy_side" else "di atas swing high (potensi reversal turun)"
+    msg = f"""
+⚡ {tick.symbol.replace("/", "")} INTRABAR SWEEP ({SMC_INTERVAL})
+
+📌 Harga: {tick.price:.2f}
+🧠 Liquidity sweep {side}, candle belum close.
+━━━━━━━━━━━━
+"""
+    publish(app, tick.symbol, SMC_INTERVAL, msg)
+
+
+# ================= ZONE ALERTS =================
+
+alert_engine = AlertEngine(cooldown=ZONE_ALERT_COOLDOWN, clock=now)
+
+
+def update_zones(item, candles):
+    """Bangun ulang zona aktif item watchlist dari candle yang baru di-scan."""
+    window = candles.tail(SMC_CANDLE_COUNT)
+    alert_engine.set_zones(item.symbol, item.interval, build_zones(item.symbol, item.interval, window))
+    return window
+
+
+def thread_for(symbol: str):
+    for item in WATCHLIST:
+        if item.symbol == symbol:
+            return item.thread_id
+    return None
+
+
+def render_alert(alert) -> str:
+    zone = alert.zone
+    name = zone.symbol.replace("/", "")
+
+    if alert.event == "sweep":
+        side = "swing high" if zone.side == "high" else "swing low"
+        return f"""
+🧲 {name} LIQUIDITY SWEEP ({zone.interval})
+
+📌 Harga {alert.price:.2f} menembus {side} {zone.high:.2f}
+━━━━━━━━━━━━
+"""
+
+    return f"""
+🎯 {name} ZONE TOUCHED ({zone.interval})
+
+📌 Harga {alert.price:.2f} masuk {zone.kind} {zone.side} {zone.low:.2f} - {zone.high:.2f}
+━━━━━━━━━━━━
+"""
+
+
+def check_zone_alerts(app, symbol: str, price: float):
+    for alert in alert_engine.on_price(symbol, price):
+        journal.record_alert(alert)
+        publish(app, symbol, alert.zone.interval, render_alert(alert), thread_id=thread_for(symbol))
+
+
+# ================= JOURNAL =================
+
+# dibuka di `open_stores()` (post_init), import bot.py tidak membuat file data/*.db
+journal = None
+
+
 # ================= BUILD SIGNAL =================
 
-async def build_signal():
+signal_snapshots = SnapshotStore(clock=now)
+
+analysis_pool = AnalysisPool(
+    threads=ANALYSIS_THREADS,
+    processes=SCAN_WORKERS or None,
+    process_threshold=ANALYSIS_PROCESS_THRESHOLD,
+    max_pending=ANALYSIS_MAX_PENDING,
+    timeout=ANALYSIS_TIMEOUT,
+)
+
 
-    if not is_trading_time():
+async def build_signal(symbol: str = None, interval: str = None):
+
+    if not market_calendar.is_open(now()):
         return "📴 MARKET CLOSED"
 
-    candles = get_candles()
+    symbol = symbol or SYMBOL
+    interval = interval or SMC_INTERVAL
+
+    candles = await get_candles(
+        interval, base_count(interval, SMC_CONFLUENCE, SMC_CANDLE_COUNT, SMC_BASE_LIMIT), symbol
+    )
 
     if not candles:
         return "⚠️ No realtime price data"
 
-    result = analyze(candles)
+    journal.on_candles(symbol, interval, candles)
 
+    # Analisa ulang hanya kalau data candle berubah sejak snapshot terakhir
+    async def compute():
+        result = await analysis_pool.run(
+            analyze_mtf, candles, interval, SMC_CONFLUENCE, SMC_CANDLE_COUNT,
+            size=len(candles), block=False,
+        )
+        journal.record(symbol, interval, candles, result, source="command")
+        return result
+
+    try:
+        snapshot = await signal_snapshots.get_or_compute(symbol, interval, candles, compute)
+    except PoolBusy:
+        return "⏳ Analisa sedang antri penuh, coba lagi sebentar"
+    except asyncio.TimeoutError:
+        return "⚠️ Analisa timeout, coba lagi sebentar"
+
+    # dirender per request: jam di pesan = jam /signal, bukan jam snapshot dibuat
+    return render_signal(symbol, interval, snapshot.result)
+
+
+def render_signal(symbol: str, interval: str, result):
+    """Format hasil `analyze()` menjadi pesan Telegram."""
+
+    if result.last_close is None:
+        return f"⚠️ {symbol} {interval}: data candle tidak cukup untuk analisa"
+
+    name = symbol.replace("/", "")
     entry = result.last_close
-    now = datetime.now(WIB).strftime("%Y-%m-%d %H:%M:%S")
+    sent_at = now_wib().strftime("%Y-%m-%d %H:%M:%S")
 
     if result.bias is None:
         reason_text = "\n".join([f"- {r}" for r in result.reasons])
         return f"""
-📊 XAUUSD SIGNAL
+📊 {name} SIGNAL ({interval})
 
-🕒 {now} WIB
+🕒 {sent_at} WIB
 
 📈 BIAS: NO TRADE (struktur belum jelas / range)
 
@@ -202,35 +518,23 @@ async def build_signal():
 ━━━━━━━━━━━━
 """
 
-    bias = result.bias
-
-    # SL/TP fixed (pips), sesuai permintaan: TP1 +7, TP2 +15, SL -5
-    if bias == "BUY":
-        setup = "BUY LIMIT"
-        tp1 = entry + 7
-        tp2 = entry + 15
-        sl = entry - 5
-    else:
-        setup = "SELL LIMIT"
-        tp1 = entry - 7
-        tp2 = entry - 15
-        sl = entry + 5
+    trade = build_trade_setup(result)
 
     reason_text = "\n".join([f"- {r}" for r in result.reasons])
 
     return f"""
-📊 XAUUSD SIGNAL
+📊 {name} SIGNAL ({interval})
 
-🕒 {now} WIB
+🕒 {sent_at} WIB
 
-📈 BIAS: {bias}
+📈 BIAS: {trade.bias}
 🔎 STRUKTUR: {result.structure}
 
-📌 ENTRY: {setup} @ {entry:.2f}
+📌 ENTRY: {trade.setup} @ {trade.entry:.2f}
 
-🎯 TP1: {tp1:.2f}
-🎯 TP2: {tp2:.2f}
-⛔ SL : {sl:.2f}
+🎯 TP1: {trade.tp1:.2f}
+🎯 TP2: {trade.tp2:.2f}
+⛔ SL : {trade.sl:.2f}
 
 🧠 REASON:
 {reason_text}
@@ -241,57 +545,210 @@ Selalu cross-check manual sebelum entry.
 """
 
 
+# ================= SUBSCRIPTIONS =================
+
+subscriptions = None
+
+
+def open_stores():
+    """Buka jurnal & subscription store SQLite (sekali, idempotent)."""
+
+    global journal, subscriptions
+
+    if journal is None:
+        journal = SignalJournal(JOURNAL_DB or ":memory:", clock=now)
+
+    if subscriptions is None:
+        subscriptions = SubscriptionStore(SUBSCRIPTIONS_DB or ":memory:")
+
+
+def resolve_subscription(args: list[str]):
+    """
+    Argumen /subscribe -> (symbol, interval) yang ada di WATCHLIST, ANY
+    kalau tidak diisi. Symbol boleh tanpa "/" (XAUUSD). None kalau tidak valid.
+    """
+
+    symbol, interval = ANY, ANY
+
+    if args and args[0].lower() not in ("all", ANY):
+        wanted = args[0].upper().replace("/", "")
+        matches = [item.symbol for item in WATCHLIST if item.symbol.replace("/", "").upper() == wanted]
+        if not matches:
+            return None
+        symbol = matches[0]
+
+    if len(args) > 1:
+        interval = args[1].lower()
+        if not any(item.interval == interval and symbol in (ANY, item.symbol) for item in WATCHLIST):
+            return None
+
+    return symbol, interval
+
+
 # ================= SEND MESSAGE =================
 
-async def send(app, text):
+def create_send_queue(app) -> SendQueue:
+
+    async def send_message(chat_id, thread_id, text):
+        await app.bot.send_message(chat_id=chat_id, message_thread_id=thread_id, text=text)
 
-    await app.bot.send_message(
-        chat_id=CHAT_ID,
-        message_thread_id=THREAD_ID,
-        text=text
+    return SendQueue(
+        send_message,
+        chat_interval=TELEGRAM_CHAT_INTERVAL,
+        coalesce=TELEGRAM_COALESCE,
+        max_inflight=TELEGRAM_MAX_INFLIGHT,
+        on_error=on_send_error,
     )
 
 
+def send_queue(app) -> SendQueue:
+    queue = app.bot_data.get("send_queue")
+    if queue is None:
+        queue = app.bot_data["send_queue"] = create_send_queue(app)
+    return queue
+
+
+def send(app, text, thread_id: int = None):
+    """Masukkan pesan ke antrian kirim (tidak menunggu Telegram)."""
+
+    send_queue(app).enqueue(CHAT_ID, text, thread_id=THREAD_ID if thread_id is None else thread_id)
+
+
+def publish(app, symbol: str, interval: str, text, thread_id: int = None):
+    """
+    Kirim pesan yang sudah di-render (sekali) ke chat utama dan semua
+    subscriber (symbol, interval). Pengiriman paralel per chat diatur
+    `SendQueue` (limit global & `TELEGRAM_MAX_INFLIGHT`).
+    """
+
+    send(app, text, thread_id=thread_id)
+
+    home = (CHAT_ID, THREAD_ID if thread_id is None else thread_id)
+    queue = send_queue(app)
+    targets = subscriptions.subscribers(symbol, interval)
+
+    for chat_id, thread in targets:
+        if (chat_id, thread) != home:
+            queue.enqueue(chat_id, text, thread_id=thread or None)
+
+    if targets:
+        logger.info(f"FAN-OUT: {symbol} {interval} -> {len(targets)} subscriber")
+
+
+def on_send_error(message, error):
+    """Bot dikeluarkan / chat hilang -> hapus semua subscription chat itu."""
+
+    if isinstance(error, Forbidden) or (isinstance(error, BadRequest) and "chat not found" in str(error).lower()):
+        removed = subscriptions.unsubscribe(message.chat_id)
+        if removed:
+            logger.warning(f"SUBSCRIPTIONS REMOVED: chat {message.chat_id} ({removed}): {error}")
+
+
 # ================= SCHEDULER =================
 
-async def scheduler(app):
+scanner = MarketScanner(
+    lambda symbol, interval, count: get_candles(interval, count, symbol),
+    pool=analysis_pool,
+    count=SMC_CANDLE_COUNT,
+    higher=SMC_CONFLUENCE,
+    prefetch=prefetch_candles,
+    max_bars=SMC_BASE_LIMIT,
+)
+
+
+def handle_scan(app, scan):
+    """Kirim / catat hasil scan satu item watchlist."""
+
+    item = scan.item
+
+    if scan.result is None:
+        # error scan hanya ke chat utama, tidak di-fan-out ke subscriber
+        send(app, f"⚠️ {item.symbol} {item.interval}: {scan.error}", thread_id=item.thread_id)
+    else:
+        journal.on_candles(item.symbol, item.interval, scan.candles)
+        journal.record(item.symbol, item.interval, scan.candles, scan.result)
+        msg = render_signal(item.symbol, item.interval, scan.result)
+        signal_snapshots.put(item.symbol, item.interval, scan.candles, scan.result)
+        publish(app, item.symbol, item.interval, msg, thread_id=item.thread_id)
+
+        # candle SMC_INTERVAL baru dari provider -> engine intrabar di-seed ulang di tick berikutnya
+        if item.interval == SMC_INTERVAL:
+            intrabar_engines.pop(item.symbol, None)
+
+    logger.info(f"SIGNAL QUEUED: {item.symbol} {item.interval}")
+
+    if ZONE_ALERTS and scan.result is not None:
+        window = update_zones(item, scan.candles)
+        if price_stream is None:
+            check_zone_alerts(app, item.symbol, window[-1].close)
+
+
+async def scheduler_cycle(app, step: int):
+    """Tunggu close candle berikutnya (lewati jam market tutup), lalu scan item yang due."""
 
     global last_signal_time
 
-    while True:
+    current = now_wib()
 
-        now = datetime.now(WIB)
+    next_ts = (int(current.timestamp()) // step + 1) * step
 
-        # ================= UBAH KE MENIT 00 =================
-        next_run = now.replace(minute=0, second=0, microsecond=0)
+    # market tutup (weekend / libur / jeda harian) -> tidur sampai close
+    # candle pertama setelah market buka lagi, bukan bangun tiap candle
+    if not market_calendar.is_open(next_ts):
+        opened = market_calendar.next_open(next_ts)
+        if opened is not None:
+            next_ts = -(-opened // step) * step
+            logger.info(f"MARKET CLOSED UNTIL {datetime.fromtimestamp(opened, WIB)}")
 
-        if now.minute >= 0:
-            next_run += timedelta(hours=1)
-        # ===================================================
+    next_run = datetime.fromtimestamp(next_ts, WIB)
 
-        wait_time = (next_run - now).total_seconds()
+    wait_time = (next_run - current).total_seconds()
 
-        logger.info(f"NEXT SIGNAL: {next_run}")
-        logger.info(f"WAITING {wait_time:.0f} SECONDS")
+    logger.info(f"NEXT SIGNAL: {next_run}")
+    logger.info(f"WAITING {wait_time:.0f} SECONDS")
 
-        await asyncio.sleep(wait_time)
+    await asyncio.sleep(wait_time)
 
-        if not is_trading_time():
-            logger.info("MARKET CLOSED")
-            continue
+    SCHEDULER_DRIFT_SECONDS.observe(max(now() - next_ts, 0))
 
-        current_time = datetime.now(WIB).replace(second=0, microsecond=0)
+    if not market_calendar.is_open(now()):
+        logger.info("MARKET CLOSED")
+        return
 
-        if last_signal_time == current_time:
-            continue
+    current_time = now_wib().replace(second=0, microsecond=0)
 
-        last_signal_time = current_time
+    if last_signal_time == current_time:
+        return
+
+    last_signal_time = current_time
 
-        msg = await build_signal()
+    items = due_items(WATCHLIST, next_ts)
 
-        await send(app, msg)
+    with SCAN_SECONDS.time(clock=loop_time):
+        scans = await scanner.scan(items)
 
-        logger.info("SIGNAL SENT")
+    for scan in scans:
+        # satu item gagal (mis. error sqlite jurnal) tidak menghentikan item lain
+        try:
+            handle_scan(app, scan)
+        except Exception:
+            logger.exception(f"SCHEDULER ITEM ERROR: {scan.item.symbol} {scan.item.interval}")
+
+
+async def scheduler(app):
+
+    # Scheduler bangun di setiap close candle timeframe terkecil di watchlist
+    # (1h -> tiap menit 00, 15min -> tiap 15 menit).
+    step = min(interval_seconds(item.interval) for item in WATCHLIST)
+
+    while True:
+        # error di satu siklus tidak boleh mematikan task scheduler
+        try:
+            await scheduler_cycle(app, step)
+        except Exception:
+            logger.exception("SCHEDULER ERROR")
+            # jeda supaya error yang terjadi sebelum sleep tidak jadi loop cepat
+            await asyncio.sleep(min(step, 60))
 
 
 # ================= COMMANDS =================
@@ -307,7 +764,7 @@ async def signal(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
-    p = get_price()
+    p = await get_price()
 
     if p is None:
         return await update.message.reply_text("⚠️ No realtime price data")
@@ -315,6 +772,147 @@ async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(f"📈 XAUUSD: {p:.2f}")
 
 
+async def budget(update: Update, context: ContextTypes.DEFAULT_TYPE):
+
+    m = fetch_scheduler.metrics()
+
+    day = "unlimited" if m["day_remaining"] is None else f"{m['day_remaining']} / {API_CREDITS_PER_DAY}"
+
+    msg = f"""
+💳 API BUDGET
+
+Minute : {m['minute_remaining']:.1f} / {m['minute_capacity']:g}
+Today  : {day} (used {m['day_used']})
+Queue  : {m['waiting']['scheduled']} scheduled, {m['waiting']['adhoc']} adhoc
+Granted: {m['granted']['scheduled']} scheduled, {m['granted']['adhoc']} adhoc
+Rejected: {m['rejected']}
+"""
+
+    await update.message.reply_text(msg)
+
+
+async def metrics_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # batas panjang pesan Telegram 4096 karakter
+    await update.message.reply_text(f"📊 METRICS\n\n{REGISTRY.summary()}"[:4000])
+
+
+def message_target(update: Update) -> tuple:
+    message = update.effective_message
+    thread_id = message.message_thread_id if message.is_topic_message else None
+    return update.effective_chat.id, thread_id
+
+
+def offered_text() -> str:
+    return ", ".join(f"{item.symbol} {item.interval}" for item in WATCHLIST)
+
+
+async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+
+    resolved = resolve_subscription(context.args or [])
+
+    if resolved is None:
+        return await update.message.reply_text(f"⚠️ Tidak tersedia. Pilihan: {offered_text()}")
+
+    symbol, interval = resolved
+    chat_id, thread_id = message_target(update)
+
+    added = subscriptions.subscribe(chat_id, symbol, interval, thread_id=thread_id)
+
+    label = "semua symbol" if symbol == ANY else symbol
+    label += "" if interval == ANY else f" {interval}"
+
+    logger.info(f"SUBSCRIBE: chat {chat_id} thread {thread_id} {symbol} {interval}")
+
+    await update.message.reply_text(f"✅ Subscribe {label}" if added else f"ℹ️ Sudah subscribe {label}")
+
+
+async def unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+
+    args = context.args or []
+    chat_id, thread_id = message_target(update)
+
+    if args:
+        resolved = resolve_subscription(args)
+        if resolved is None:
+            return await update.message.reply_text(f"⚠️ Tidak tersedia. Pilihan: {offered_text()}")
+        symbol, interval = resolved
+        if len(args) == 1:
+            # hanya symbol ("all" = semua) -> hapus semua interval symbol itu
+            symbol, interval = (None if symbol == ANY else symbol), None
+        removed = subscriptions.unsubscribe(chat_id, symbol, interval, thread_id=thread_id or 0)
+    else:
+        removed = subscriptions.unsubscribe(chat_id, thread_id=thread_id or 0)
+
+    logger.info(f"UNSUBSCRIBE: chat {chat_id} thread {thread_id} {' '.join(args) or 'all'} ({removed})")
+
+    await update.message.reply_text(f"🗑 {removed} subscription dihapus")
+
+
+async def list_subscriptions(update: Update, context: ContextTypes.DEFAULT_TYPE):
+
+    chat_id, thread_id = message_target(update)
+    subs = subscriptions.for_chat(chat_id, thread_id or 0)
+
+    if not subs:
+        return await update.message.reply_text(f"Belum ada subscription. Pilihan: {offered_text()}")
+
+    lines = [f"- {'ALL' if sub.symbol == ANY else sub.symbol} {'ALL' if sub.interval == ANY else sub.interval}" for sub in subs]
+
+    await update.message.reply_text("🔔 SUBSCRIPTIONS\n\n" + "\n".join(lines))
+
+
+def render_history(symbol: str, interval: str, entries) -> str:
+
+    name = symbol.replace("/", "")
+
+    if not entries:
+        return f"Belum ada sinyal {name} {interval} di jurnal"
+
+    lines = []
+    for entry in entries:
+        at = datetime.fromtimestamp(entry.bar_time, WIB).strftime("%m-%d %H:%M")
+        tag = "" if entry.source == "scheduled" else " (cmd)"
+        if entry.entry is None:
+            lines.append(f"{at}{tag} NO TRADE {entry.structure}")
+            continue
+        status = "⏳ OPEN" if entry.outcome is None else f"{entry.outcome} {entry.pnl:+.2f}"
+        lines.append(
+            f"{at}{tag} {entry.setup} @ {entry.entry:.2f} | TP {entry.tp1:.2f}/{entry.tp2:.2f} | SL {entry.sl:.2f} | {status}"
+        )
+
+    closed = [entry for entry in entries if entry.outcome is not None]
+    wins = sum(1 for entry in closed if entry.outcome != "SL")
+    summary = f"Closed {len(closed)}: {wins} TP / {len(closed) - wins} SL, total {sum(e.pnl for e in closed):+.2f} poin"
+
+    return f"🗂 {name} HISTORY ({interval})\n\n" + "\n".join(lines) + f"\n\n{summary}"
+
+
+async def history(update: Update, context: ContextTypes.DEFAULT_TYPE):
+
+    args = list(context.args or [])
+
+    limit = 10
+    if args and args[-1].isdigit():
+        limit = min(max(int(args.pop()), 1), 30)
+
+    symbol, interval = SYMBOL, SMC_INTERVAL
+
+    if args:
+        wanted = args[0].upper().replace("/", "")
+        matches = [item.symbol for item in WATCHLIST if item.symbol.replace("/", "").upper() == wanted]
+        if not matches:
+            return await update.message.reply_text(f"⚠️ Tidak tersedia. Pilihan: {offered_text()}")
+        symbol = matches[0]
+
+    if len(args) > 1:
+        interval = args[1].lower()
+
+    entries = journal.history(symbol, interval, limit)
+
+    # batas panjang pesan Telegram 4096 karakter
+    await update.message.reply_text(render_history(symbol, interval, entries)[:4000])
+
+
 # ================= POST INIT =================
 
 async def post_init(app):
@@ -326,19 +924,61 @@ async def post_init(app):
 
     tasks_started = True
 
+    open_stores()
+
     await app.bot.set_my_commands([
         BotCommand("start", "Start bot"),
         BotCommand("price", "Check XAUUSD price"),
-        BotCommand("signal", "Generate signal")
+        BotCommand("signal", "Generate signal"),
+        BotCommand("budget", "API credit budget"),
+        BotCommand("metrics", "Latency metrics"),
+        BotCommand("subscribe", "Subscribe sinyal: /subscribe [SYMBOL] [INTERVAL]"),
+        BotCommand("unsubscribe", "Stop sinyal: /unsubscribe [SYMBOL] [INTERVAL]"),
+        BotCommand("subscriptions", "Daftar subscription chat ini"),
+        BotCommand("history", "Riwayat sinyal: /history [SYMBOL] [INTERVAL] [N]"),
     ])
 
-    await send(app, "🤖 BOT ACTIVE")
+    send(app, "🤖 BOT ACTIVE")
 
     asyncio.create_task(scheduler(app))
 
+    if METRICS_PORT:
+        app.bot_data["metrics_server"] = await start_http_server(METRICS_PORT, METRICS_HOST)
+
+    if price_stream is not None:
+        price_stream.add_listener(lambda tick, bar, closed: on_stream_tick(app, tick, bar, closed))
+        app.bot_data["stream_task"] = asyncio.create_task(price_stream.run())
+
     logger.info("BOT RUNNING STABLE")
 
 
+async def post_shutdown(app):
+
+    queue = app.bot_data.get("send_queue")
+    if queue is not None:
+        await queue.close()
+
+    server = app.bot_data.get("metrics_server")
+    if server is not None:
+        server.close()
+
+    if price_stream is not None:
+        price_stream.stop()
+        task = app.bot_data.get("stream_task")
+        if task is not None:
+            task.cancel()
+
+    await provider.close()
+
+    analysis_pool.shutdown()
+
+    if subscriptions is not None:
+        subscriptions.close()
+
+    if journal is not None:
+        journal.close()
+
+
 # ================= MAIN =================
 
 def main():
@@ -346,7 +986,7 @@ def main():
     if not BOT_TOKEN:
         raise RuntimeError("BOT_TOKEN belum di-set di environment variable")
 
-    if not TWELVE_TOKEN:
+    if DATA_PROVIDER != "file" and not TWELVE_TOKEN:
         logger.warning("TWELVE_TOKEN belum di-set! Bot akan jalan tapi tidak bisa ambil data harga.")
 
     logger.info("STARTING BOT...")
@@ -356,8 +996,15 @@ def main():
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("price", price))
     app.add_handler(CommandHandler("signal", signal))
+    app.add_handler(CommandHandler("budget", budget))
+    app.add_handler(CommandHandler("metrics", metrics_command))
+    app.add_handler(CommandHandler("subscribe", subscribe))
+    app.add_handler(CommandHandler("unsubscribe", unsubscribe))
+    app.add_handler(CommandHandler("subscriptions", list_subscriptions))
+    app.add_handler(CommandHandler("history", history))
 
     app.post_init = post_init
+    app.post_shutdown = post_shutdown
 
     app.run_polling(drop_pending_updates=True, close_loop=False)
 
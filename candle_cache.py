@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Candle Cache
+============
+Cache candle async di depan provider data:
+- Key (symbol, interval, outputsize), jadi request dengan interval /
+  jumlah candle berbeda tidak saling tertukar.
+- Single-flight: beberapa miss bersamaan untuk key yang sama hanya
+  memicu SATU request ke provider, sisanya menunggu hasil yang sama.
+- Stale-while-revalidate: entry yang kedaluwarsa karena `max_age` (candle
+  yang sama masih berjalan) tetap langsung dikembalikan sementara refresh
+  berjalan di background. Entry yang kedaluwarsa karena candle sudah close
+  selalu menunggu refresh, supaya analisa tidak memakai bar sebelumnya;
+  data lama hanya dipakai pemanggil saat provider error / budget habis
+  (lewat `peek()`).
+- Task refresh dibagi lewat `asyncio.shield`: pemanggil yang di-cancel
+  (mis. handler timeout) tidak ikut membatalkan fetch milik pemanggil lain.
+- TTL mengikuti batas candle: entry kedaluwarsa di close candle berikutnya
+  atau setelah `max_age` detik, mana yang lebih dulu.
+- Eviction LRU saat jumlah key melebihi `max_entries`.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from metrics import REGISTRY
+from smc_engine import interval_seconds
+
+logger = logging.getLogger("XAU-BOT.cache")
+
+CACHE_REQUESTS = REGISTRY.counter("candle_cache_requests_total", "Request candle cache per hasil", ("result",))
+
+
+@dataclass
+class CacheEntry:
+    value: object
+    fetched_at: float
+    expires_at: float
+    closes_at: float  # close candle yang sedang berjalan saat fetch
+
+
+class CandleCache:
+
+    def __init__(
+        self,
+        fetch,
+        max_age: float = 60,
+        stale_ttl: float = 300,
+        max_entries: int = 64,
+        clock=time.time,
+    ):
+        """
+        `fetch` = coroutine function `(symbol, interval, count) -> CandleSeries`.
+        `stale_ttl` = berapa lama (detik) setelah kedaluwarsa entry masih
+        boleh disajikan sambil di-refresh di background.
+        """
+        self._fetch = fetch
+        self.max_age = max_age
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._inflight: dict = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _next_boundary(interval: str, now: float) -> float:
+        step = interval_seconds(interval)
+        return (now // step + 1) * step
+
+    def peek(self, symbol: str, interval: str, count: int):
+        """Nilai terakhir untuk key ini tanpa peduli umur (fallback saat provider error)."""
+        entry = self._entries.get((symbol, interval, count))
+        return entry.value if entry else None
+
+    async def get(self, symbol: str, interval: str, count: int):
+        key = (symbol, interval, count)
+        now = self._clock()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+
+            if now < entry.expires_at:
+                CACHE_REQUESTS.inc(result="hit")
+                logger.info(f"USING CACHED CANDLES: {symbol} {interval} x{count}")
+                return entry.value
+
+            if now < entry.closes_at and now < entry.expires_at + self.stale_ttl:
+                CACHE_REQUESTS.inc(result="stale")
+                logger.info(f"USING STALE CANDLES (revalidating): {symbol} {interval} x{count}")
+                self._refresh(key, background=True)
+                return entry.value
+
+        CACHE_REQUESTS.inc(result="miss")
+        return await asyncio.shield(self._refresh(key))
+
+    def _refresh(self, key, background: bool = False) -> asyncio.Task:
+        """
+        Satu task refresh per key; pemanggil lain ikut menunggu task yang sama.
+        `background` = dipicu stale hit (tidak ada yang menunggu): error di-log
+        lewat callback yang dipasang sekali saat task dibuat, bukan per hit.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key))
+            task.add_done_callback(lambda done: self._finish(key, done))
+            if background:
+                task.add_done_callback(self._log_background_error)
+            self._inflight[key] = task
+        return task
+
+    def _finish(self, key, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # semua pemanggil bisa sudah di-cancel -> ambil exception supaya
+        # asyncio tidak log "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(self, key):
+        symbol, interval, count = key
+        value = await self._fetch(symbol, interval, count)
+        self._store(key, value)
+        return value
+
+    def put(self, symbol: str, interval: str, count: int, value):
+        """Isi cache dari luar (mis. hasil fetch batch terjadwal)."""
+        self._store((symbol, interval, count), value)
+
+    def _store(self, key, value):
+        now = self._clock()
+        closes_at = self._next_boundary(key[1], now)
+        self._entries[key] = CacheEntry(
+            value=value, fetched_at=now, expires_at=min(now + self.max_age, closes_at), closes_at=closes_at
+        )
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            logger.info(f"CACHE EVICT: {evicted}")
+
+    @staticmethod
+    def _log_background_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"BACKGROUND CANDLE REFRESH FAILED: {task.exception()}")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Candle History
+==============
+History candle append-only per (symbol, interval) di memori. Setelah
+history terisi, setiap refresh hanya meminta candle SEJAK candle terakhir
+yang tersimpan (delta), lalu:
+- candle dengan waktu sama dengan candle terakhir -> ditimpa (candle
+  terakhir biasanya masih forming),
+- candle yang lebih baru -> di-append.
+
+Jadi bandwidth, parse JSON dan kredit API tidak lagi sebanding dengan
+jumlah candle yang dianalisa.
+"""
+
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from typing import Optional
+
+from smc_engine import CandleSeries, interval_seconds
+
+logger = logging.getLogger("XAU-BOT.history")
+
+
+class CandleHistory:
+
+    def __init__(self, symbol: str, interval: str, max_bars: int = 5000):
+        self.symbol = symbol
+        self.interval = interval
+        self.max_bars = max_bars
+        self.series = CandleSeries()
+
+    def __len__(self):
+        return len(self.series)
+
+    @property
+    def last_time(self) -> Optional[int]:
+        return self.series.last_time
+
+    def replace(self, candles: CandleSeries):
+        self.series = candles.tail(self.max_bars).copy()
+
+    def is_gap(self, candles: CandleSeries) -> bool:
+        """Candle pertama `candles` lebih baru dari candle terakhir + 1 interval."""
+        last = self.last_time
+        times = candles.times
+        return last is not None and len(times) > 0 and times[0] > last + interval_seconds(self.interval)
+
+    def merge(self, candles: CandleSeries) -> int:
+        """
+        Gabungkan hasil fetch delta. Return jumlah candle baru yang di-append.
+        Kalau ada celah (candle pertama hasil fetch lebih baru dari candle
+        terakhir + 1 interval), history diganti total supaya tidak bolong.
+        """
+        last = self.last_time
+        if last is None:
+            self.replace(candles)
+            return len(self.series)
+
+        times = candles.times
+        if self.is_gap(candles):
+            logger.warning(f"HISTORY GAP {self.symbol} {self.interval}: reset history")
+            self.replace(candles)
+            return len(self.series)
+
+        opens, highs, lows, closes = candles.opens, candles.highs, candles.lows, candles.closes
+        added = 0
+        for i in range(len(times)):
+            t = times[i]
+            if t < last:
+                continue
+
+            if t == last:
+                self.series.set_last(t, opens[i], highs[i], lows[i], closes[i])
+            else:
+                self.series.append(t, opens[i], highs[i], lows[i], closes[i])
+                last = t
+                added += 1
+
+        # Buang candle lama sesekali (amortized) supaya memori tetap terbatas
+        if len(self.series) > 2 * self.max_bars:
+            self.series = self.series.tail(self.max_bars).copy()
+
+        return added
+
+    def window(self, count: int) -> CandleSeries:
+        """`count` candle terakhir sebagai copy (aman walau history terus di-update)."""
+        return self.series.tail(count).copy()
+
+
+class HistoryFetcher:
+    """
+    Ambil candle lewat provider dengan memakai `CandleHistory`: fetch penuh
+    hanya saat history belum cukup, selebihnya fetch delta sejak candle
+    terakhir yang tersimpan.
+
+    Kalau `store` (`CandleStore`) diisi, history diisi dari disk saat
+    pertama dipakai dan setiap hasil fetch ikut disimpan ke disk (reset
+    karena celah / fetch penuh menulis ulang file), jadi setelah restart bot
+    cukup fetch delta. I/O store jalan di thread (`asyncio.to_thread`)
+    supaya flock / tulis file tidak memblok event loop.
+
+    Fetch untuk (symbol, interval) yang sama diserialkan dengan lock per
+    key: fetch delta kedua baru jalan setelah yang pertama selesai merge &
+    tulis, jadi start delta-nya sudah candle terakhir yang baru dan dua
+    hasil fetch tidak di-merge / ditulis ke store bersamaan.
+    """
+
+    def __init__(self, provider, max_bars: int = 5000, store=None):
+        self.provider = provider
+        self.max_bars = max_bars
+        self.store = store
+        self._histories: dict = {}
+        self._loaded: set = set()
+        self._store_locks: dict = {}
+        self._fetch_locks: dict = {}
+
+    def history(self, symbol: str, interval: str) -> CandleHistory:
+        """History di memori (tanpa baca disk; lihat `load()`)."""
+        key = (symbol, interval)
+        history = self._histories.get(key)
+        if history is None:
+            history = self._histories[key] = CandleHistory(symbol, interval, self.max_bars)
+        return history
+
+    def _store_lock(self, key) -> asyncio.Lock:
+        lock = self._store_locks.get(key)
+        if lock is None:
+            lock = self._store_locks[key] = asyncio.Lock()
+        return lock
+
+    def _fetch_lock(self, key) -> asyncio.Lock:
+        lock = self._fetch_locks.get(key)
+        if lock is None:
+            lock = self._fetch_locks[key] = asyncio.Lock()
+        return lock
+
+    async def load(self, symbol: str, interval: str) -> CandleHistory:
+        """`history()`, diisi dari disk saat pertama dipakai."""
+        key = (symbol, interval)
+        history = self.history(symbol, interval)
+        if self.store is None or key in self._loaded:
+            return history
+
+        async with self._store_lock(key):
+            if key not in self._loaded:
+                try:
+                    stored = await asyncio.to_thread(self.store.read, symbol, interval)
+                except OSError as e:
+                    logger.error(f"CANDLE STORE READ ERROR: {e}")
+                    stored = None
+                if stored is not None and len(stored) and not len(history):
+                    history.replace(stored)
+                    logger.info(f"STORED CANDLES: {symbol} {interval} {len(history)} bars dari disk")
+                self._loaded.add(key)
+        return history
+
+    async def _persist(self, symbol: str, interval: str, candles: CandleSeries, replace: bool = False):
+        if self.store is None:
+            return
+        write = self.store.replace if replace else self.store.append
+        try:
+            async with self._store_lock((symbol, interval)):
+                await asyncio.to_thread(write, symbol, interval, candles)
+        except OSError as e:
+            logger.error(f"CANDLE STORE WRITE ERROR: {e}")
+
+    def _merge(self, history: CandleHistory, candles: CandleSeries) -> tuple:
+        """Merge delta ke history. Return (jumlah baru, True kalau history di-reset)."""
+        reset = history.is_gap(candles)
+        return history.merge(candles), reset
+
+    async def fetch(self, symbol: str, interval: str, count: int) -> CandleSeries:
+        async with self._fetch_lock((symbol, interval)):
+            return await self._fetch(symbol, interval, count)
+
+    async def _fetch(self, symbol: str, interval: str, count: int) -> CandleSeries:
+        history = await self.load(symbol, interval)
+
+        if len(history) < count:
+            candles = await self.provider.fetch_candles(symbol, interval, count)
+            history.replace(candles)
+            reset = True
+            logger.info(f"FULL CANDLES: {symbol} {interval} {len(candles)} bars")
+        else:
+            candles = await self.provider.fetch_candles(symbol, interval, count, start=history.last_time)
+            added, reset = self._merge(history, candles)
+            logger.info(f"DELTA CANDLES: {symbol} {interval} {len(candles)} fetched, {added} new")
+
+        await self._persist(symbol, interval, history.series if reset else candles, replace=reset)
+
+        return history.window(count)
+
+    async def fetch_many(self, symbols: list[str], interval: str, count: int) -> dict:
+        """
+        Versi batch dari `fetch`: symbol yang history-nya belum cukup
+        di-fetch penuh, sisanya fetch delta dalam satu batch (start =
+        candle terakhir paling lama di antara symbol itu). Return dict
+        symbol -> window `count` candle, atau Exception kalau gagal.
+        """
+        async with AsyncExitStack() as stack:
+            # lock diambil berurutan (sorted) supaya dua batch tidak saling tunggu
+            for symbol in sorted(set(symbols)):
+                await stack.enter_async_context(self._fetch_lock((symbol, interval)))
+            return await self._fetch_many(symbols, interval, count)
+
+    async def _fetch_many(self, symbols: list[str], interval: str, count: int) -> dict:
+        full, delta = [], []
+        for symbol in symbols:
+            history = await self.load(symbol, interval)
+            (full if len(history) < count else delta).append(symbol)
+
+        results = {}
+
+        if full:
+            fetched = await self.provider.fetch_many(full, interval, count)
+            for symbol, candles in fetched.items():
+                if isinstance(candles, Exception):
+                    results[symbol] = candles
+                    continue
+                history = self.history(symbol, interval)
+                history.replace(candles)
+                await self._persist(symbol, interval, history.series, replace=True)
+                results[symbol] = self.history(symbol, interval).window(count)
+            logger.info(f"FULL CANDLES (batch): {len(full)} symbol {interval}")
+
+        if delta:
+            start = min(self.history(symbol, interval).last_time for symbol in delta)
+            fetched = await self.provider.fetch_many(delta, interval, count, start=start)
+            for symbol, candles in fetched.items():
+                if isinstance(candles, Exception):
+                    results[symbol] = candles
+                    continue
+                history = self.history(symbol, interval)
+                _, reset = self._merge(history, candles)
+                await self._persist(symbol, interval, history.series if reset else candles, replace=reset)
+                results[symbol] = self.history(symbol, interval).window(count)
+            logger.info(f"DELTA CANDLES (batch): {len(delta)} symbol {interval}")
+
+        return results
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Candle Store
+============
+Penyimpanan candle persisten di disk, satu direktori per symbol+interval:
+
+    <root>/XAU_USD/1h/time.i64    epoch detik (int64)
+    <root>/XAU_USD/1h/open.f64    float64
+    <root>/XAU_USD/1h/high.f64
+    <root>/XAU_USD/1h/low.f64
+    <root>/XAU_USD/1h/close.f64
+
+Setiap kolom adalah file biner append-only, dibaca lewat mmap lalu
+dibungkus `CandleSeries.from_buffers()` tanpa copy. Cold start bot dan
+backtest bisa langsung memakai puluhan ribu candle tanpa network.
+
+Konkurensi: satu writer (dikunci dengan flock) dan banyak reader.
+Writer menulis kolom harga DULU lalu kolom waktu, dan reader menentukan
+jumlah candle dari ukuran file waktu, jadi reader tidak pernah melihat
+candle yang baru setengah tertulis. Pengecualian: candle terakhir yang
+ditimpa (masih forming) bisa terbaca campuran nilai lama/baru.
+
+`replace()` (history di-reset karena celah) menulis file baru lalu
+me-rename ke tempatnya: kolom waktu dikosongkan dulu, kolom harga diganti,
+kolom waktu terakhir. mmap lama tetap menunjuk file lama (tidak ada
+SIGBUS), reader yang membuka di tengah proses paling buruk melihat series
+kosong atau campuran lama/baru sepanjang kolom terpendek.
+
+Semua method di sini blocking (flock + I/O file); dari event loop panggil
+lewat `asyncio.to_thread`.
+"""
+
+import fcntl
+import logging
+import mmap
+import os
+from array import array
+from contextlib import contextmanager
+from typing import Optional
+
+from smc_engine import CandleSeries
+
+logger = logging.getLogger("XAU-BOT.store")
+
+TIME_COLUMN = ("time.i64", "q")
+PRICE_COLUMNS = (("open.f64", "d"), ("high.f64", "d"), ("low.f64", "d"), ("close.f64", "d"))
+
+ITEM_SIZE = 8
+
+
+# ================= READ =================
+
+def read_series(directory: str) -> CandleSeries:
+    """mmap semua kolom di `directory` menjadi CandleSeries read-only (zero-copy)."""
+    time_path = os.path.join(directory, TIME_COLUMN[0])
+    if not os.path.exists(time_path):
+        return CandleSeries()
+
+    # Ukuran file waktu menentukan jumlah candle yang sudah lengkap
+    count = os.path.getsize(time_path) // ITEM_SIZE
+    if count == 0:
+        return CandleSeries()
+
+    views = []
+    for name, _ in (TIME_COLUMN, *PRICE_COLUMNS):
+        with open(os.path.join(directory, name), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return CandleSeries()  # sedang di-replace
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        views.append(memoryview(mm))
+
+    # kolom bisa lebih pendek dari waktu kalau terbaca di tengah replace()
+    count = min(count, *(len(view) // ITEM_SIZE for view in views))
+    columns = [
+        view[:count * ITEM_SIZE].cast(fmt)
+        for view, (_, fmt) in zip(views, (TIME_COLUMN, *PRICE_COLUMNS))
+    ]
+
+    return CandleSeries.from_buffers(*columns)
+
+
+# ================= STORE =================
+
+class CandleStore:
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def directory(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol.replace("/", "_"), interval)
+
+    def read(self, symbol: str, interval: str) -> CandleSeries:
+        return read_series(self.directory(symbol, interval))
+
+    def last_time(self, symbol: str, interval: str) -> Optional[int]:
+        return self.read(symbol, interval).last_time
+
+    @contextmanager
+    def _locked(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def append(self, symbol: str, interval: str, candles: CandleSeries) -> int:
+        """
+        Simpan `candles` dengan aturan merge yang sama seperti history di
+        memori: candle lebih lama dari candle terakhir di-skip, candle
+        dengan waktu sama ditimpa, candle lebih baru di-append.
+        Return jumlah candle baru.
+        """
+        directory = self.directory(symbol, interval)
+
+        with self._locked(directory):
+            files = {}
+            try:
+                for name, _ in (TIME_COLUMN, *PRICE_COLUMNS):
+                    path = os.path.join(directory, name)
+                    files[name] = open(path, "r+b" if os.path.exists(path) else "w+b")
+
+                return self._append_locked(files, candles)
+            finally:
+                for f in files.values():
+                    f.close()
+
+    def replace(self, symbol: str, interval: str, candles: CandleSeries) -> int:
+        """Ganti seluruh isi store dengan `candles` (mirror `CandleHistory.replace`). Return jumlah candle."""
+        directory = self.directory(symbol, interval)
+        columns = (candles.times, candles.opens, candles.highs, candles.lows, candles.closes)
+
+        with self._locked(directory):
+            time_name, time_fmt = TIME_COLUMN
+            self._write_column(directory, time_name, array(time_fmt))
+            for (name, fmt), values in zip(PRICE_COLUMNS, columns[1:]):
+                self._write_column(directory, name, array(fmt, values))
+            self._write_column(directory, time_name, array(time_fmt, columns[0]))
+
+        return len(candles)
+
+    @staticmethod
+    def _write_column(directory: str, name: str, values: array):
+        path = os.path.join(directory, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(values.tobytes())
+        os.replace(tmp, path)
+
+    def _append_locked(self, files: dict, candles: CandleSeries) -> int:
+        time_file = files[TIME_COLUMN[0]]
+        count = os.fstat(time_file.fileno()).st_size // ITEM_SIZE
+
+        # Buang sisa tulisan yang tidak lengkap (mis. proses mati di tengah append)
+        for f in files.values():
+            f.truncate(count * ITEM_SIZE)
+
+        last = None
+        if count:
+            time_file.seek((count - 1) * ITEM_SIZE)
+            last = array("q", time_file.read(ITEM_SIZE))[0]
+
+        times = candles.times
+        prices = (candles.opens, candles.highs, candles.lows, candles.closes)
+
+        new_times = array("q")
+        new_prices = [array("d") for _ in PRICE_COLUMNS]
+        overwrite = None
+
+        for i in range(len(times)):
+            t = times[i]
+            if last is not None and t < last:
+                continue
+            if t == last:
+                if new_times:
+                    # timestamp dobel di input -> versi terakhir yang dipakai
+                    for column, values in zip(new_prices, prices):
+                        column[-1] = values[i]
+                else:
+                    overwrite = i
+                continue
+            new_times.append(t)
+            for column, values in zip(new_prices, prices):
+                column.append(values[i])
+            last = t
+
+        if overwrite is not None:
+            for (name, fmt), values in zip(PRICE_COLUMNS, prices):
+                f = files[name]
+                f.seek((count - 1) * ITEM_SIZE)
+                f.write(array(fmt, [values[overwrite]]).tobytes())
+
+        if new_times:
+            # harga dulu, waktu terakhir -> reader tidak melihat candle setengah jadi
+            for (name, _), column in zip(PRICE_COLUMNS, new_prices):
+                f = files[name]
+                f.seek(count * ITEM_SIZE)
+                f.write(column.tobytes())
+                f.flush()
+            time_file.seek(count * ITEM_SIZE)
+            time_file.write(new_times.tobytes())
+
+        for f in files.values():
+            f.flush()
+
+        return len(new_times)
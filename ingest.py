@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Ingest
+======
+Jalur cepat dari data mentah ke kolom numerik `CandleSeries`:
+- response JSON Twelve Data (`values`, terbaru di atas) dan format CSV
+  endpoint yang sama (`format=CSV`) langsung diparse ke `array` per kolom,
+  urut lama -> baru, timestamp epoch int,
+- file CSV / Parquet history bertahun-tahun dibaca per blok (tanpa
+  `csv.DictReader` / objek per baris), lalu bisa langsung di-import ke
+  `CandleStore`.
+
+Datetime diparse dengan `datetime.fromisoformat` (C) relatif ke epoch
+naive UTC; string dengan zona waktu jatuh ke `parse_time()`.
+
+Contoh:
+    python ingest.py import data/xauusd_1min.csv --symbol XAU/USD --interval 1min
+    python ingest.py bench --rows 5000
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from array import array
+from datetime import datetime, timezone
+
+from candle_store import CandleStore, read_series
+from smc_engine import CandleSeries, format_time, parse_time
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # parquet opsional
+    pq = None
+
+logger = logging.getLogger("XAU-BOT.ingest")
+
+COLUMNS = ("datetime", "open", "high", "low", "close")
+
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = _EPOCH - datetime(1969, 12, 31, 23, 59, 59)
+
+CSV_BLOCK_BYTES = 4 << 20
+
+
+# ================= PARSE =================
+
+def parse_times(values) -> array:
+    """List string datetime (UTC) -> array epoch detik ('q')."""
+    fromiso = datetime.fromisoformat
+    try:
+        return array("q", [(fromiso(v) - _EPOCH) // _SECOND for v in values])
+    except TypeError:
+        # ada datetime dengan zona waktu (aware - naive tidak bisa dikurangi)
+        return array("q", [parse_time(v) for v in values])
+
+
+def parse_values(values: list) -> CandleSeries:
+    """
+    `values` dari response JSON Twelve Data (terbaru di atas) -> CandleSeries
+    urut lama -> baru. Satu pass per kolom langsung ke `array`, tanpa objek
+    Candle / list perantara per baris.
+    """
+    rows = values[::-1]
+    return CandleSeries.from_arrays(
+        parse_times([row["datetime"] for row in rows]),
+        array("d", [float(row["open"]) for row in rows]),
+        array("d", [float(row["high"]) for row in rows]),
+        array("d", [float(row["low"]) for row in rows]),
+        array("d", [float(row["close"]) for row in rows]),
+    )
+
+
+def _columns_from_tokens(tokens: list, indexes: tuple, ncols: int) -> tuple:
+    """Token CSV rata (baris x kolom) -> 5 array kolom (urutan sesuai file)."""
+    if len(tokens) % ncols:
+        raise ValueError("Jumlah kolom CSV tidak konsisten")
+    if '"' in tokens[0]:
+        tokens = [token.strip('"') for token in tokens]
+
+    dt, o, h, l, c = indexes
+    return (
+        parse_times(tokens[dt::ncols]),
+        array("d", map(float, tokens[o::ncols])),
+        array("d", map(float, tokens[h::ncols])),
+        array("d", map(float, tokens[l::ncols])),
+        array("d", map(float, tokens[c::ncols])),
+    )
+
+
+def _header_indexes(header: list) -> tuple:
+    names = [name.strip().strip('"').lower() for name in header]
+    try:
+        return tuple(names.index(column) for column in COLUMNS)
+    except ValueError:
+        raise ValueError(f"Kolom CSV harus memuat {', '.join(COLUMNS)} (dapat: {', '.join(names)})")
+
+
+def _series(columns: tuple) -> CandleSeries:
+    """Kolom hasil parse -> CandleSeries urut lama -> baru."""
+    times = columns[0]
+    if len(times) > 1 and times[0] > times[-1]:
+        for column in columns:
+            column.reverse()
+    return CandleSeries.from_arrays(*columns)
+
+
+def parse_csv_text(text: str, delimiter: str = ";") -> CandleSeries:
+    """Response `format=CSV` Twelve Data (header + baris, terbaru di atas) -> CandleSeries."""
+    header_line, _, body = text.strip().partition("\n")
+    if not body:
+        return CandleSeries()
+
+    header = header_line.strip().split(delimiter)
+    tokens = body.replace("\r", "").replace("\n", delimiter).split(delimiter)
+    return _series(_columns_from_tokens(tokens, _header_indexes(header), len(header)))
+
+
+# ================= FILE =================
+
+def _sniff_delimiter(header: str) -> str:
+    for delimiter in (";", "\t", ","):
+        if delimiter in header:
+            return delimiter
+    raise ValueError(f"Delimiter CSV tidak dikenal: {header!r}")
+
+
+def read_csv(path: str, block_bytes: int = CSV_BLOCK_BYTES) -> CandleSeries:
+    """
+    Baca file CSV candle besar per blok ~`block_bytes`: setiap blok dipecah
+    jadi token rata lalu diambil per kolom dengan slicing, jadi tidak ada
+    dict / objek per baris. Baris kosong di-skip. Urutan file boleh terbalik.
+    """
+    columns = (array("q"), array("d"), array("d"), array("d"), array("d"))
+
+    with open(path, newline="") as f:
+        header_line = f.readline().strip()
+        delimiter = _sniff_delimiter(header_line)
+        header = header_line.split(delimiter)
+        ncols = len(header)
+        indexes = _header_indexes(header)
+
+        while True:
+            lines = f.readlines(block_bytes)
+            if not lines:
+                break
+
+            text = delimiter.join(line.strip() for line in lines if line.strip())
+            if not text:
+                continue
+            for column, values in zip(columns, _columns_from_tokens(text.split(delimiter), indexes, ncols)):
+                column.extend(values)
+
+    return _series(columns)
+
+
+def read_parquet(path: str) -> CandleSeries:
+    if pq is None:
+        raise RuntimeError("Baca Parquet butuh package pyarrow (pip install pyarrow)")
+
+    table = pq.read_table(path, columns=list(COLUMNS))
+    raw_times = table.column("datetime").to_pylist()
+
+    if raw_times and isinstance(raw_times[0], str):
+        times = parse_times(raw_times)
+    else:
+        times = array("q", [
+            int(t.replace(tzinfo=t.tzinfo or timezone.utc).timestamp()) for t in raw_times
+        ])
+
+    return _series((
+        times,
+        array("d", table.column("open").to_pylist()),
+        array("d", table.column("high").to_pylist()),
+        array("d", table.column("low").to_pylist()),
+        array("d", table.column("close").to_pylist()),
+    ))
+
+
+def load_candles(path: str) -> CandleSeries:
+    """
+    Baca file candle (CSV atau Parquet) dengan kolom datetime, open, high,
+    low, close. Delimiter CSV dideteksi otomatis (export Twelve Data
+    memakai ";"). Datetime dianggap UTC. Urutan baris boleh terbalik
+    (terbaru di atas), hasilnya selalu urut lama -> baru.
+
+    `path` juga boleh direktori `CandleStore` (mis. data/candles/XAU_USD/1h),
+    yang dibaca lewat mmap tanpa parsing.
+    """
+    if os.path.isdir(path):
+        return read_series(path)
+
+    if path.endswith(".parquet"):
+        return read_parquet(path)
+    return read_csv(path)
+
+
+def import_file(path: str, store: CandleStore, symbol: str, interval: str) -> int:
+    """Import file history ke `CandleStore`. Return jumlah candle baru."""
+    series = load_candles(path)
+    added = store.append(symbol, interval, series)
+    logger.info(f"IMPORT: {path} -> {symbol} {interval}, {len(series)} bars dibaca, {added} baru")
+    return added
+
+
+# ================= BENCHMARK =================
+
+def _legacy_parse(payload: str) -> CandleSeries:
+    """Jalur lama (sebelum ingest): list reversed + float() per baris per kolom + parse_time."""
+    values = list(reversed(json.loads(payload)["values"]))
+    return CandleSeries(
+        times=[parse_time(v["datetime"]) for v in values],
+        opens=[float(v["open"]) for v in values],
+        highs=[float(v["high"]) for v in values],
+        lows=[float(v["low"]) for v in values],
+        closes=[float(v["close"]) for v in values],
+    )
+
+
+def _synthetic_payloads(rows: int) -> tuple:
+    values = []
+    price = 2000.0
+    for i in range(rows):
+        price += (i * 7919 % 13 - 6) * 0.1
+        values.append({
+            "datetime": format_time(1_704_067_200 + 60 * i),
+            "open": f"{price:.2f}",
+            "high": f"{price + 1.25:.2f}",
+            "low": f"{price - 1.5:.2f}",
+            "close": f"{price + 0.5:.2f}",
+        })
+    values.reverse()  # terbaru di atas, seperti API
+
+    payload = json.dumps({"meta": {}, "values": values, "status": "ok"})
+    text = "datetime;open;high;low;close\n" + "\n".join(
+        ";".join(v[c] for c in COLUMNS) for v in values
+    )
+    return payload, text
+
+
+def bench(rows: int = 5000, repeat: int = 20) -> dict:
+    """Bandingkan jalur parse lama vs jalur ingest (JSON & CSV), return ms per parse."""
+    payload, text = _synthetic_payloads(rows)
+
+    cases = {
+        "legacy_json": lambda: _legacy_parse(payload),
+        "fast_json": lambda: parse_values(json.loads(payload)["values"]),
+        "fast_csv": lambda: parse_csv_text(text),
+    }
+
+    reference = cases["legacy_json"]().to_candles()
+    results = {}
+    for name, func in cases.items():
+        if func().to_candles() != reference:
+            raise AssertionError(f"hasil {name} berbeda dengan jalur lama")
+        best = min(_timed(func) for _ in range(repeat))
+        results[name] = best * 1000
+    return results
+
+
+def _timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+# ================= MAIN =================
+
+def main():
+    parser = argparse.ArgumentParser(description="Import & parse data candle")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="Import file CSV / Parquet ke candle store")
+    imp.add_argument("path")
+    imp.add_argument("--symbol", required=True)
+    imp.add_argument("--interval", required=True)
+    imp.add_argument("--store", default=os.getenv("CANDLE_STORE_DIR", "data/candles"))
+
+    b = sub.add_parser("bench", help="Benchmark parse response lama vs baru")
+    b.add_argument("--rows", type=int, default=5000)
+    b.add_argument("--repeat", type=int, default=20)
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    if args.command == "import":
+        started = time.perf_counter()
+        import_file(args.path, CandleStore(args.store), args.symbol, args.interval)
+        logger.info(f"IMPORT SELESAI dalam {time.perf_counter() - started:.1f}s")
+        return
+
+    results = bench(args.rows, args.repeat)
+    legacy = results["legacy_json"]
+    for name, ms in results.items():
+        print(f"{name:<12} {ms:8.2f} ms  ({legacy / ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Signal Journal
+==============
+Jurnal SQLite untuk setiap hasil analisa yang dipakai bot (sinyal
+terjadwal & /signal) dan setiap alert zona, supaya sinyal lama bisa
+diaudit dan "N sinyal terakhir" cukup satu query ber-index
+(symbol, interval, waktu).
+
+Data sinyal (bias, struktur, OB/FVG aktif, sweep, entry/TP/SL) tidak
+pernah diubah setelah ditulis; yang di-update hanya kolom outcome.
+Outcome dilacak incremental: setup yang masih terbuka disimpan di memori
+beserta waktu candle terakhir yang sudah dicek, dan setiap ada candle baru
+hanya candle yang sudah close setelah waktu itu yang dievaluasi dengan
+aturan fill yang sama seperti backtest (`Trade.update`). Sinyal dari candle
+yang masih forming (scheduler di menit 00, /signal di tengah candle) mulai
+dicek dari candle itu sendiri, supaya high / low yang terjadi setelah
+sinyal di candle yang sama tidak terlewat.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Optional
+
+from backtest import Trade
+from smc_engine import CandleSeries, SMCResult, build_trade_setup, interval_seconds
+
+logger = logging.getLogger("XAU-BOT.journal")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id            INTEGER PRIMARY KEY,
+    symbol        TEXT    NOT NULL,
+    interval      TEXT    NOT NULL,
+    bar_time      INTEGER NOT NULL,
+    source        TEXT    NOT NULL,
+    created_at    REAL    NOT NULL,
+    bias          TEXT,
+    structure     TEXT    NOT NULL,
+    sweep         TEXT,
+    last_close    REAL,
+    ob_kind       TEXT,
+    ob_top        REAL,
+    ob_bottom     REAL,
+    fvg_kind      TEXT,
+    fvg_top       REAL,
+    fvg_bottom    REAL,
+    reasons       TEXT    NOT NULL,
+    timeframes    TEXT    NOT NULL,
+    setup         TEXT,
+    entry         REAL,
+    tp1           REAL,
+    tp2           REAL,
+    sl            REAL,
+    leg1          REAL,
+    leg2          REAL,
+    outcome       TEXT,
+    resolved_time INTEGER,
+    checked_time  INTEGER,
+    UNIQUE (symbol, interval, bar_time, source)
+);
+CREATE INDEX IF NOT EXISTS signals_by_time ON signals (symbol, interval, bar_time);
+CREATE INDEX IF NOT EXISTS signals_open ON signals (symbol, interval) WHERE entry IS NOT NULL AND outcome IS NULL;
+
+CREATE TABLE IF NOT EXISTS zone_events (
+    id        INTEGER PRIMARY KEY,
+    symbol    TEXT    NOT NULL,
+    interval  TEXT    NOT NULL,
+    time      REAL    NOT NULL,
+    event     TEXT    NOT NULL,
+    kind      TEXT    NOT NULL,
+    side      TEXT    NOT NULL,
+    low       REAL    NOT NULL,
+    high      REAL    NOT NULL,
+    zone_time INTEGER NOT NULL,
+    price     REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS zone_events_by_time ON zone_events (symbol, interval, time);
+"""
+
+_COLUMNS = (
+    "id", "symbol", "interval", "bar_time", "source", "bias", "structure", "sweep", "last_close",
+    "setup", "entry", "tp1", "tp2", "sl", "leg1", "leg2", "outcome", "resolved_time",
+)
+
+
+@dataclass
+class JournalEntry:
+    id: int
+    symbol: str
+    interval: str
+    bar_time: int  # epoch candle terakhir yang dianalisa
+    source: str  # "scheduled" / "command"
+    bias: Optional[str]
+    structure: str
+    sweep: Optional[str]
+    last_close: Optional[float]
+    setup: Optional[str]
+    entry: Optional[float]
+    tp1: Optional[float]
+    tp2: Optional[float]
+    sl: Optional[float]
+    leg1: Optional[float]
+    leg2: Optional[float]
+    outcome: Optional[str]  # "TP2" / "TP1" / "SL", None = masih terbuka / tanpa setup
+    resolved_time: Optional[int]  # epoch candle yang menutup setup
+
+    @property
+    def pnl(self) -> Optional[float]:
+        if self.outcome is None:
+            return None
+        return (self.leg1 + self.leg2) / 2
+
+
+@dataclass
+class _OpenSetup:
+    row_id: int
+    checked: int  # epoch candle terakhir yang sudah dicek (bar_time - 1 = candle sinyal belum)
+    trade: Trade = field(repr=False)
+
+
+def _new_trade(bar_time: int, *levels, **legs) -> Trade:
+    """`Trade(bias, entry, tp1, tp2, sl, structure)` untuk jurnal."""
+    # index candle tidak dipakai: posisi candle di series berubah setiap fetch
+    return Trade(0, bar_time, *levels, **legs)
+
+
+class SignalJournal:
+
+    def __init__(self, path: str = ":memory:", clock=time.time):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.path = path
+        self._clock = clock
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            if path != ":memory:":
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+
+        # (symbol, interval) -> list[_OpenSetup] setup yang belum selesai
+        self._open: dict = {}
+        rows = self._db.execute(
+            "SELECT id, symbol, interval, bar_time, bias, entry, tp1, tp2, sl, leg1, leg2, structure, checked_time "
+            "FROM signals WHERE entry IS NOT NULL AND outcome IS NULL"
+        )
+        for row_id, symbol, interval, bar_time, bias, entry, tp1, tp2, sl, leg1, leg2, structure, checked in rows:
+            trade = _new_trade(bar_time, bias, entry, tp1, tp2, sl, structure, leg1=leg1, leg2=leg2)
+            self._open.setdefault((symbol, interval), []).append(_OpenSetup(row_id, checked, trade))
+
+        logger.info(f"JOURNAL LOADED: {path}, {sum(len(v) for v in self._open.values())} setup terbuka")
+
+    # ---------- tulis ----------
+
+    def record(
+        self, symbol: str, interval: str, candles: CandleSeries, result: SMCResult, source: str = "scheduled"
+    ) -> Optional[int]:
+        """
+        Simpan satu hasil analisa. Hasil kedua untuk candle terakhir yang
+        sama (symbol, interval, source) diabaikan. Return id atau None.
+        """
+        bar_time = candles.last_time
+        if bar_time is None:
+            return None
+
+        trade = build_trade_setup(result)
+        ob, fvg = result.active_ob, result.active_fvg
+
+        # candle sinyal masih forming -> candle itu sendiri ikut dicek setelah close
+        closed = bar_time + interval_seconds(interval) <= self._clock()
+        checked = bar_time if closed else bar_time - 1
+
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO signals (symbol, interval, bar_time, source, created_at, bias, structure, "
+                "sweep, last_close, ob_kind, ob_top, ob_bottom, fvg_kind, fvg_top, fvg_bottom, reasons, timeframes, "
+                "setup, entry, tp1, tp2, sl, checked_time) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    symbol, interval, bar_time, source, self._clock(), result.bias, result.structure,
+                    result.liquidity_sweep, result.last_close,
+                    ob.kind if ob else None, ob.top if ob else None, ob.bottom if ob else None,
+                    fvg.kind if fvg else None, fvg.top if fvg else None, fvg.bottom if fvg else None,
+                    "\n".join(result.reasons), json.dumps(result.timeframes),
+                    trade.setup if trade else None, trade.entry if trade else None,
+                    trade.tp1 if trade else None, trade.tp2 if trade else None, trade.sl if trade else None,
+                    checked,
+                ),
+            )
+
+        if not cursor.rowcount:
+            return None
+
+        row_id = cursor.lastrowid
+        if trade is not None:
+            opened = _new_trade(bar_time, trade.bias, trade.entry, trade.tp1, trade.tp2, trade.sl, result.structure)
+            self._open.setdefault((symbol, interval), []).append(_OpenSetup(row_id, checked, opened))
+
+        logger.info(f"JOURNAL: {symbol} {interval} {source} #{row_id} {result.bias or 'NO TRADE'}")
+        return row_id
+
+    def record_alert(self, alert):
+        zone = alert.zone
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO zone_events (symbol, interval, time, event, kind, side, low, high, zone_time, price) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (zone.symbol, zone.interval, alert.time, alert.event, zone.kind, zone.side,
+                 zone.low, zone.high, zone.time, alert.price),
+            )
+
+    def on_candles(self, symbol: str, interval: str, candles: CandleSeries) -> list[int]:
+        """
+        Evaluasi candle yang sudah close dan belum pernah dicek terhadap
+        setup terbuka (symbol, interval). Return id setup yang selesai.
+        """
+        trades = self._open.get((symbol, interval))
+        if not trades or not len(candles):
+            return []
+
+        times, highs, lows = candles.times, candles.highs, candles.lows
+        # candle terakhir bisa masih forming -> hanya candle yang sudah close
+        stop = bisect_right(times, int(self._clock()) - interval_seconds(interval))
+
+        resolved, changed = [], []
+        for setup in trades:
+            trade = setup.trade
+            start = bisect_right(times, setup.checked, 0, stop)
+            if start >= stop:
+                continue
+
+            before = (trade.leg1, trade.leg2)
+            for i in range(start, stop):
+                trade.update(i, highs[i], lows[i], time=times[i])
+                if trade.closed:
+                    break
+
+            setup.checked = trade.close_time if trade.closed else times[stop - 1]
+            changed.append(setup)
+            if trade.closed:
+                resolved.append(setup)
+            elif (trade.leg1, trade.leg2) != before:
+                logger.info(f"JOURNAL LEG: {symbol} {interval} #{setup.row_id} leg1={trade.leg1} leg2={trade.leg2}")
+
+        if not changed:
+            return []
+
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE signals SET leg1 = ?, leg2 = ?, outcome = ?, resolved_time = ?, checked_time = ? WHERE id = ?",
+                [
+                    (s.trade.leg1, s.trade.leg2, s.trade.outcome, s.trade.close_time, s.checked, s.row_id)
+                    for s in changed
+                ],
+            )
+
+        if resolved:
+            self._open[(symbol, interval)] = [setup for setup in trades if not setup.trade.closed]
+            for setup in resolved:
+                trade = setup.trade
+                logger.info(f"JOURNAL OUTCOME: {symbol} {interval} #{setup.row_id} {trade.outcome} {trade.pnl:+.2f}")
+
+        return [setup.row_id for setup in resolved]
+
+    # ---------- baca ----------
+
+    def history(self, symbol: str, interval: str, limit: int = 10, source: Optional[str] = None) -> list[JournalEntry]:
+        """`limit` entry terbaru (symbol, interval), terbaru di atas."""
+        query = f"SELECT {', '.join(_COLUMNS)} FROM signals WHERE symbol = ? AND interval = ?"
+        params = [symbol, interval]
+        if source is not None:
+            query += " AND source = ?"
+            params.append(source)
+        query += " ORDER BY bar_time DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [JournalEntry(*row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
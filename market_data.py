@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Market Data Client
+==================
+Client async untuk data candle, dengan interface provider yang bisa
+diganti-ganti:
+- `TwelveDataProvider` : API Twelve Data (endpoint time_series) lewat
+  `httpx.AsyncClient` dengan connection pool + keep-alive dan retry
+  dengan exponential backoff untuk error jaringan / HTTP 5xx. Response
+  (JSON, atau CSV dengan `csv=True`) diparse langsung ke kolom numerik
+  lewat `ingest`.
+- `FileProvider`       : baca candle dari file CSV lokal (untuk test /
+  development tanpa kuota API).
+- `ReplayProvider`     : candle rekaman yang "diputar ulang" mengikuti jam
+  (virtual), untuk mode replay / simulasi (`replay.py`).
+
+Semua provider mengembalikan `CandleSeries` urut lama -> baru.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import random
+import time
+from typing import Optional
+
+import httpx
+
+from backtest import detect_interval
+from ingest import load_candles, parse_csv_text, parse_values
+from metrics import REGISTRY
+from smc_engine import CandleSeries, format_time, interval_seconds
+from timeframes import resample
+
+logger = logging.getLogger("XAU-BOT.data")
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "provider_request_seconds", "Latency request HTTP ke provider data", ("provider", "status")
+)
+
+
+class ProviderError(Exception):
+    """Error dari provider data (API error, data kosong, dll)."""
+
+
+# ================= BASE PROVIDER =================
+
+class CandleProvider:
+    """
+    Interface provider candle. Subclass wajib implement `fetch_candles`:
+    maksimal `count` candle terakhir, dan kalau `start` (epoch) diisi hanya
+    candle dengan waktu >= `start` (dipakai untuk fetch delta).
+    """
+
+    name = "base"
+
+    async def fetch_candles(
+        self, symbol: str, interval: str, count: int, start: Optional[int] = None
+    ) -> CandleSeries:
+        raise NotImplementedError
+
+    async def fetch_many(
+        self, symbols: list[str], interval: str, count: int, start: Optional[int] = None
+    ) -> dict:
+        """
+        Fetch beberapa symbol sekaligus. Return dict symbol -> CandleSeries,
+        atau Exception untuk symbol yang gagal (symbol lain tetap jalan).
+        Default: satu request per symbol; provider yang punya batch endpoint
+        override method ini.
+        """
+        results = {}
+        for symbol in symbols:
+            try:
+                results[symbol] = await self.fetch_candles(symbol, interval, count, start)
+            except Exception as e:
+                results[symbol] = e
+        return results
+
+    async def close(self):
+        pass
+
+
+# ================= TWELVE DATA =================
+
+class TwelveDataProvider(CandleProvider):
+
+    name = "twelvedata"
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.twelvedata.com",
+        timeout: float = 15,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_connections: int = 10,
+        csv: bool = False,
+    ):
+        """`csv=True` -> fetch satu symbol memakai `format=CSV` (payload lebih kecil & parse lebih cepat)."""
+        self.api_key = api_key
+        self.csv = csv
+        self.retries = retries
+        self.backoff = backoff
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def close(self):
+        await self._client.aclose()
+
+    async def _get(self, path: str, params: dict, text: bool = False):
+        """
+        GET dengan retry (error jaringan & HTTP 5xx). Error API tidak di-retry.
+        Return JSON, atau body mentah kalau `text=True`.
+        """
+        params = {**params, "apikey": self.api_key}
+        attempt = 0
+
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await self._client.get(path, params=params)
+                REQUEST_SECONDS.observe(time.perf_counter() - started, provider=self.name, status=response.status_code)
+                logger.info(f"TWELVEDATA STATUS: {response.status_code}")
+
+                if response.status_code < 500:
+                    return response.text if text else response.json()
+
+                error = ProviderError(f"HTTP {response.status_code}")
+            except httpx.TransportError as e:
+                REQUEST_SECONDS.observe(time.perf_counter() - started, provider=self.name, status="transport_error")
+                error = e
+
+            attempt += 1
+            if attempt > self.retries:
+                raise ProviderError(f"Request {path} gagal setelah {self.retries} retry: {error}")
+
+            delay = self.backoff * (2 ** (attempt - 1)) * (1 + random.random())
+            logger.warning(f"TWELVEDATA RETRY {attempt}/{self.retries} dalam {delay:.1f}s: {error}")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _params(symbols: str, interval: str, count: int, start: Optional[int]) -> dict:
+        params = {
+            "symbol": symbols,
+            "interval": interval,
+            "outputsize": count,
+            "timezone": "UTC",
+        }
+        if start is not None:
+            params["start_date"] = format_time(start)
+        return params
+
+    async def fetch_candles(
+        self, symbol: str, interval: str, count: int, start: Optional[int] = None
+    ) -> CandleSeries:
+        params = self._params(symbol, interval, count, start)
+        if not self.csv:
+            return self._parse_series(await self._get("/time_series", params))
+
+        body = await self._get("/time_series", {**params, "format": "CSV", "delimiter": ";"}, text=True)
+        if body.lstrip().startswith("{"):
+            # error API tetap dikirim sebagai JSON
+            return self._parse_series(json.loads(body))
+
+        series = parse_csv_text(body, ";")
+        if not len(series):
+            raise ProviderError(f"no values in response: {body[:200]}")
+        return series
+
+    async def fetch_many(
+        self, symbols: list[str], interval: str, count: int, start: Optional[int] = None
+    ) -> dict:
+        """
+        Satu request batch untuk semua `symbols` (symbol dipisah koma).
+        Kredit API tetap dihitung per symbol, tapi hanya satu round trip.
+        """
+        if len(symbols) == 1:
+            return await super().fetch_many(symbols, interval, count, start)
+
+        data = await self._get("/time_series", self._params(",".join(symbols), interval, count, start))
+
+        if data.get("status") == "error":
+            raise ProviderError(data.get("message"))
+
+        results = {}
+        for symbol in symbols:
+            payload = data.get(symbol)
+            try:
+                if payload is None:
+                    raise ProviderError(f"symbol {symbol} tidak ada di response batch")
+                results[symbol] = self._parse_series(payload)
+            except ProviderError as e:
+                results[symbol] = e
+        return results
+
+    @staticmethod
+    def _parse_series(data: dict) -> CandleSeries:
+        if data.get("status") == "error":
+            raise ProviderError(data.get("message"))
+
+        values = data.get("values")
+        if not values:
+            raise ProviderError(f"no values in response: {data}")
+
+        # Twelve Data mengembalikan data dari yang TERBARU ke TERLAMA -> dibalik di parse_values
+        return parse_values(values)
+
+
+# ================= FILE PROVIDER =================
+
+class FileProvider(CandleProvider):
+    """
+    Provider dari file CSV lokal. `paths` memetakan (symbol, interval) ke
+    path file; `default_path` dipakai kalau kombinasi tidak ada di map.
+    File dibaca sekali lalu di-cache di memori.
+    """
+
+    name = "file"
+
+    def __init__(self, paths: dict = None, default_path: str = None):
+        self.paths = paths or {}
+        self.default_path = default_path
+        self._loaded: dict[str, CandleSeries] = {}
+
+    async def fetch_candles(
+        self, symbol: str, interval: str, count: int, start: Optional[int] = None
+    ) -> CandleSeries:
+        path = self.paths.get((symbol, interval), self.default_path)
+        if path is None:
+            raise ProviderError(f"Tidak ada file data untuk {symbol} {interval}")
+
+        if path not in self._loaded:
+            self._loaded[path] = await asyncio.to_thread(load_candles, path)
+
+        series = self._loaded[path]
+        if not len(series):
+            raise ProviderError(f"File data kosong: {path}")
+
+        if start is not None:
+            series = series[bisect.bisect_left(series.times, start):]
+
+        return series.tail(count)
+
+
+# ================= REPLAY PROVIDER =================
+
+class ReplayProvider(CandleProvider):
+    """
+    Provider dari candle rekaman (`series` = symbol -> CandleSeries di
+    timeframe base, mis. 1min / 1h) yang hanya mengembalikan candle base
+    yang sudah close menurut `clock()`, jadi tidak ada data "masa depan".
+    Interval yang lebih besar di-resample dari base; candle terakhirnya
+    bisa masih forming, sama seperti API. `latency` = jeda per request
+    (detik, lewat `asyncio.sleep`) untuk meniru round trip ke API.
+    """
+
+    name = "replay"
+
+    def __init__(self, series: dict, clock=time.time, latency: float = 0.0):
+        self.series = series
+        self.latency = latency
+        self._clock = clock
+        self._steps = {symbol: detect_interval(s) for symbol, s in series.items()}
+        self._resampled: dict = {}  # (symbol, interval) -> CandleSeries penuh
+        self.requests = 0
+
+    def _visible(self, symbol: str, interval: str, count: int) -> CandleSeries:
+        base = self.series.get(symbol)
+        if base is None:
+            raise ProviderError(f"Tidak ada data rekaman untuk {symbol}")
+
+        base_step = self._steps[symbol]
+        step = interval_seconds(interval)
+        if step < base_step:
+            raise ProviderError(f"Data rekaman {symbol} lebih kasar dari {interval}")
+
+        # candle base yang sudah close: time + base_step <= sekarang
+        stop = bisect.bisect_right(base.times, int(self._clock()) - base_step)
+        if step == base_step or stop == 0:
+            return base[:stop].tail(count)
+
+        full = self._resampled.get((symbol, interval))
+        if full is None:
+            full = self._resampled[(symbol, interval)] = resample(base, interval)
+
+        last = base.times[stop - 1]
+        bucket = last - last % step
+        complete = full[:bisect.bisect_left(full.times, bucket)].tail(count - 1)
+        forming = resample(base[bisect.bisect_left(base.times, bucket):stop], interval)
+
+        out = complete.copy()
+        out.append(forming.times[-1], forming.opens[-1], forming.highs[-1], forming.lows[-1], forming.closes[-1])
+        return out
+
+    async def fetch_candles(
+        self, symbol: str, interval: str, count: int, start: Optional[int] = None
+    ) -> CandleSeries:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        series = self._visible(symbol, interval, count)
+        if not len(series):
+            raise ProviderError(f"Belum ada candle rekaman {symbol} {interval} sebelum waktu replay")
+
+        if start is not None:
+            series = series[bisect.bisect_left(series.times, start):]
+        return series
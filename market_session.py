@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Market Session
+==============
+Kalender sesi market XAU/USD. Dipisah dari bot.py supaya bisa dipakai juga
+oleh backtest (tanpa dependency Telegram).
+
+Sesi XAU mengikuti jam New York (jadi ikut bergeser saat DST, di WIB buka
+jam 05:00 / 06:00): satu sesi per hari trading D = D-1 18:00 ET sampai
+D 17:00 ET (Senin dimulai Minggu 18:00, Jumat tutup 17:00), dengan jeda
+harian 17:00 - 18:00 ET. Hari libur (tahun baru, Good Friday, Natal +
+tambahan dari config) menghapus sesi hari itu.
+
+`SessionCalendar` menghitung semua sesi di rentang tahun sekali saja ke
+satu array batas (buka, tutup, buka, tutup, ...) yang urut, jadi "buka di
+t?", "buka / tutup berikutnya setelah t" cukup binary search, dan satu
+kolom timestamp bisa di-mask sekaligus tanpa konversi datetime per bar.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+import pytz
+
+# ================= TIMEZONE =================
+
+WIB = pytz.timezone("Asia/Jakarta")
+NEW_YORK = pytz.timezone("America/New_York")
+
+
+# ================= HOLIDAYS =================
+
+def _easter(year: int) -> date:
+    """Tanggal Paskah (kalender Gregorian, algoritma anonim)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: date) -> date:
+    """Libur di akhir pekan digeser: Sabtu -> Jumat, Minggu -> Senin."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def standard_holidays(year: int) -> set:
+    """Hari trading tanpa sesi XAU: tahun baru, Good Friday, Natal."""
+    return {
+        _observed(date(year, 1, 1)),
+        _easter(year) - timedelta(days=2),
+        _observed(date(year, 12, 25)),
+    }
+
+
+# ================= CALENDAR =================
+
+class SessionCalendar:
+
+    def __init__(
+        self,
+        start_year: int = 2000,
+        end_year: int = 2040,
+        holidays=(),
+        daily_break: bool = True,
+        open_time: time = time(18, 0),
+        close_time: time = time(17, 0),
+        tz=NEW_YORK,
+    ):
+        """
+        Sesi dihitung untuk hari trading di `start_year`..`end_year`.
+        `holidays` = tanggal tambahan (date / "YYYY-MM-DD") tanpa sesi.
+        `daily_break=False` -> sesi Senin - Jumat digabung (tanpa jeda harian).
+        """
+        self.start_year = start_year
+        self.end_year = end_year
+        self.daily_break = daily_break
+        self.open_time = open_time
+        self.close_time = close_time
+        self.tz = tz
+        self.holidays = {date.fromisoformat(h) if isinstance(h, str) else h for h in holidays}
+        for year in range(start_year, end_year + 1):
+            self.holidays |= standard_holidays(year)
+
+        self._bounds: Optional[array] = None  # dibangun saat pertama dipakai
+
+    def _offset(self, day: date) -> int:
+        """Offset UTC (detik) zona sesi di siang hari `day`."""
+        return int(self.tz.utcoffset(datetime.combine(day, time(12, 0))).total_seconds())
+
+    def _offsets(self, year: int) -> list:
+        """
+        [(hari pertama, offset), ...] untuk satu tahun. Offset dicek per awal
+        bulan, lalu hari pergantian DST dicari dengan binary search, jadi
+        cukup puluhan konversi timezone per tahun, bukan dua per hari.
+        """
+        changes = [(date(year, 1, 1), self._offset(date(year, 1, 1)))]
+        for month in range(2, 14):
+            first = date(year + month // 13, (month - 1) % 12 + 1, 1)
+            if self._offset(first) == changes[-1][1]:
+                continue
+            lo, hi = first - timedelta(days=31), first  # pergantian di (lo, hi]
+            lo = max(lo, changes[-1][0])
+            while (hi - lo).days > 1:
+                mid = lo + timedelta(days=(hi - lo).days // 2)
+                if self._offset(mid) == changes[-1][1]:
+                    lo = mid
+                else:
+                    hi = mid
+            changes.append((hi, self._offset(hi)))
+        return changes
+
+    def _build(self) -> array:
+        changes = []
+        for year in range(self.start_year - 1, self.end_year + 1):
+            changes.extend(self._offsets(year))
+        starts = [day.toordinal() for day, _ in changes]
+        epoch = date(1970, 1, 1).toordinal()
+        open_seconds = self.open_time.hour * 3600 + self.open_time.minute * 60
+        close_seconds = self.close_time.hour * 3600 + self.close_time.minute * 60
+
+        def local_epoch(ordinal: int, seconds: int) -> int:
+            offset = changes[bisect_right(starts, ordinal) - 1][1]
+            return (ordinal - epoch) * 86400 + seconds - offset
+
+        bounds = array("q")
+        holidays = {day.toordinal() for day in self.holidays}
+        previous = None  # hari trading terakhir yang punya sesi
+
+        for ordinal in range(date(self.start_year, 1, 1).toordinal(), date(self.end_year, 12, 31).toordinal() + 1):
+            # toordinal() 1 = Senin 1 Januari tahun 1 -> (ordinal - 1) % 7 = weekday()
+            if (ordinal - 1) % 7 >= 5 or ordinal in holidays:
+                continue
+            opened = local_epoch(ordinal - 1, open_seconds)
+            closed = local_epoch(ordinal, close_seconds)
+            if not self.daily_break and previous == ordinal - 1:
+                bounds[-1] = closed  # sambung dengan sesi hari sebelumnya (jeda harian ikut buka)
+            else:
+                bounds.append(opened)
+                bounds.append(closed)
+            previous = ordinal
+
+        return bounds
+
+    @property
+    def bounds(self) -> array:
+        """Batas sesi urut: [buka0, tutup0, buka1, tutup1, ...] (epoch detik)."""
+        if self._bounds is None:
+            self._bounds = self._build()
+        return self._bounds
+
+    def _check(self, ts: float):
+        bounds = self.bounds
+        if not bounds[0] - 7 * 86400 <= ts <= bounds[-1] + 7 * 86400:
+            raise ValueError(
+                f"Waktu {ts} di luar rentang kalender sesi {self.start_year}-{self.end_year}"
+            )
+
+    def is_open(self, ts: float) -> bool:
+        """Market buka di epoch `ts` (buka inklusif, tutup eksklusif)."""
+        self._check(ts)
+        return bisect_right(self.bounds, ts) % 2 == 1
+
+    def next_open(self, ts: float) -> Optional[int]:
+        """Waktu buka pertama setelah `ts` (None kalau di luar rentang)."""
+        self._check(ts)
+        bounds = self.bounds
+        i = bisect_right(bounds, ts)
+        i += i % 2  # index genap = buka
+        return bounds[i] if i < len(bounds) else None
+
+    def next_close(self, ts: float) -> Optional[int]:
+        """Waktu tutup pertama setelah `ts` (None kalau di luar rentang)."""
+        self._check(ts)
+        bounds = self.bounds
+        i = bisect_right(bounds, ts)
+        i += 1 - i % 2  # index ganjil = tutup
+        return bounds[i] if i < len(bounds) else None
+
+    def mask(self, times, offset: int = 0) -> bytearray:
+        """
+        Mask buka (1) / tutup (0) untuk kolom timestamp `times` yang urut
+        naik, dievaluasi di `times[i] + offset` (mis. offset = durasi
+        candle -> waktu close). Per sesi cukup dua bisect + satu slice
+        assignment, bukan konversi datetime per bar.
+        """
+        n = len(times)
+        out = bytearray(n)
+        if not n:
+            return out
+
+        self._check(times[0] + offset)
+        self._check(times[n - 1] + offset)
+
+        bounds = self.bounds
+        first = bisect_right(bounds, times[0] + offset)
+        first -= first % 2  # mulai dari sesi yang mungkin memuat times[0]
+
+        for i in range(first, len(bounds), 2):
+            opened, closed = bounds[i] - offset, bounds[i + 1] - offset
+            if opened > times[n - 1]:
+                break
+            lo = bisect_left(times, opened)
+            hi = bisect_left(times, closed)
+            if hi > lo:
+                out[lo:hi] = b"\x01" * (hi - lo)
+
+        return out
+
+
+DEFAULT_CALENDAR = SessionCalendar()
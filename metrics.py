@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Metrics
+=======
+Instrumentasi ringan tanpa dependency: counter, gauge dan histogram
+(bucket tetap) dengan label, di-export dalam format teks Prometheus lewat
+endpoint HTTP lokal (`start_http_server`) dan bisa di-dump ringkas
+(`summary()`) untuk command bot.
+
+Satu `REGISTRY` global per proses, aman dipakai dari thread pool analisa:
+update dan export sama-sama lewat lock per metric (export memakai
+snapshot, jadi tidak bentrok dengan `observe()` dari thread lain).
+Catatan: job yang jalan di process pool mencatat metric di proses worker,
+jadi tidak ikut ter-export.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+logger = logging.getLogger("XAU-BOT.metrics")
+
+# detik: 0.5ms .. 30s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_text(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def snapshot(self) -> list:
+        """[(label values, nilai), ...] urut label, diambil di bawah lock."""
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in self.snapshot():
+            lines.append(f"{self.name}{_label_text(self.labels, key)} {value:g}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [count per bucket..., +Inf], sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, clock=time.perf_counter, **labels):
+        """Catat durasi blok. Kode async yang menunggu I/O pakai `clock=loop_time`."""
+        started = clock()
+        try:
+            yield
+        finally:
+            self.observe(clock() - started, **labels)
+
+    def snapshot(self) -> list:
+        """Seperti `_Metric.snapshot`, state histogram di-copy (list bucket ikut berubah saat observe)."""
+        with self._lock:
+            return [(key, (list(counts), total, count)) for key, (counts, total, count) in sorted(self._values.items())]
+
+    def _state(self, labels: dict):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            return None if state is None else (list(state[0]), state[1], state[2])
+
+    def count(self, **labels) -> int:
+        state = self._state(labels)
+        return state[2] if state is not None else 0
+
+    def quantile(self, q: float, **labels):
+        """Perkiraan quantile dari bucket (batas atas bucket), None kalau kosong."""
+        return self._quantile(self._state(labels), q)
+
+    def _quantile(self, state, q: float):
+        if state is None or not state[2]:
+            return None
+        target = q * state[2]
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), state[0]):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self.snapshot():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total:g}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics: dict = {}
+
+    def _get(self, cls, name: str, help: str, labels: tuple, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help, labels, **kwargs)
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Ringkasan gauge dan histogram (count, rata-rata, p50/p95 perkiraan) untuk dibaca manusia."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            if isinstance(metric, Gauge):
+                for key, value in metric.snapshot():
+                    lines.append(f"{metric.name}{'[' + ','.join(key) + ']' if key else ''}: {value:g}")
+                continue
+            if not isinstance(metric, Histogram):
+                continue
+            for key, state in metric.snapshot():
+                _, total, count = state
+                if not count:
+                    continue
+                p50 = metric._quantile(state, 0.5)
+                p95 = metric._quantile(state, 0.95)
+                name = metric.name + ("[" + ",".join(key) + "]" if key else "")
+                lines.append(
+                    f"{name}: n={count} avg={total / count * 1000:.1f}ms "
+                    f"p50<={p50 * 1000:g}ms p95<={p95 * 1000:g}ms"
+                )
+        return "\n".join(lines) or "belum ada data"
+
+
+REGISTRY = Registry()
+
+
+def loop_time() -> float:
+    """Jam event loop yang sedang jalan (monotonic; di mode replay = jam virtual)."""
+    return asyncio.get_running_loop().time()
+
+
+# ================= HTTP ENDPOINT =================
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, registry: Registry):
+    try:
+        request = await reader.readline()
+        # buang header request
+        while (await reader.readline()).strip():
+            pass
+
+        parts = request.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/metrics", "/"):
+            body = registry.render().encode()
+            status = "200 OK"
+        else:
+            body = b"not found\n"
+            status = "404 Not Found"
+
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_http_server(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY):
+    """Endpoint `GET /metrics` di event loop yang sedang jalan. Return `asyncio.Server`."""
+    server = await asyncio.start_server(lambda r, w: _handle(r, w, registry), host, port)
+    logger.info(f"METRICS ENDPOINT: http://{host}:{port}/metrics")
+    return server
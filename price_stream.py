@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Price Stream
+============
+Feed harga real-time lewat WebSocket Twelve Data (endpoint
+`/v1/quotes/price`):
+- satu koneksi untuk semua symbol, auto reconnect dengan exponential
+  backoff + jitter, heartbeat tiap 10 detik,
+- tick terakhir per symbol disimpan di memori -> `/price` dijawab tanpa
+  request API,
+- candle yang masih forming dibangun dari tick (bucket UTC, sama seperti
+  candle API) dan bisa di-seed dari candle terakhir history supaya
+  open/high/low-nya lengkap,
+- listener dipanggil di setiap tick (mis. untuk cek liquidity sweep
+  intrabar).
+
+Butuh package `websockets` (ada di requirements.txt, tapi baru di-import
+saat streaming dipakai).
+`connect` bisa diganti, mis. untuk test ke fake server lokal.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from smc_engine import Candle, format_time, interval_seconds
+
+logger = logging.getLogger("XAU-BOT.stream")
+
+TWELVEDATA_WS_URL = "wss://ws.twelvedata.com/v1/quotes/price"
+
+
+@dataclass(slots=True)
+class Tick:
+    symbol: str
+    price: float
+    time: int  # epoch detik (UTC)
+    received: float = 0.0  # waktu lokal saat tick diterima
+
+
+@dataclass(slots=True)
+class FormingCandle:
+    start: int  # epoch awal bucket
+    open: float
+    high: float
+    low: float
+    close: float
+    ticks: int = 0
+
+    def add(self, price: float):
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.ticks += 1
+
+    def to_candle(self) -> Candle:
+        return Candle(
+            time=format_time(self.start),
+            open=self.open,
+            high=self.high,
+            low=self.low,
+            close=self.close,
+        )
+
+
+def _default_connect(url: str):
+    try:
+        import websockets
+    except ImportError:
+        raise RuntimeError("Price stream butuh package websockets (pip install websockets)")
+    return websockets.connect(url, ping_interval=None)
+
+
+class PriceStream:
+
+    def __init__(
+        self,
+        symbols: list[str],
+        interval: str = "1h",
+        api_key: Optional[str] = None,
+        url: str = TWELVEDATA_WS_URL,
+        connect=None,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        heartbeat: float = 10.0,
+        clock=time.time,
+    ):
+        """
+        `symbols` = symbol yang di-subscribe, `interval` = ukuran candle forming.
+        `connect` = function `(url) -> async context manager` yang menghasilkan
+        websocket dengan `send(str)` dan async iteration pesan (default: websockets).
+        """
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.step = interval_seconds(interval)
+        self.url = f"{url}?apikey={api_key}" if api_key else url
+        self._connect = connect or _default_connect
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.heartbeat = heartbeat
+        self._clock = clock
+
+        self._ticks: dict = {}
+        self._forming: dict = {}
+        self._listeners = []
+        self._stopped = False
+
+        self.connected = False
+        self.reconnects = 0
+
+    # ---------- state ----------
+
+    def last_tick(self, symbol: str) -> Optional[Tick]:
+        return self._ticks.get(symbol)
+
+    def price(self, symbol: str, max_age: Optional[float] = None) -> Optional[float]:
+        """Harga tick terakhir, None kalau belum ada / lebih tua dari `max_age` detik."""
+        tick = self._ticks.get(symbol)
+        if tick is None:
+            return None
+        if max_age is not None and self._clock() - tick.received > max_age:
+            return None
+        return tick.price
+
+    def forming(self, symbol: str) -> Optional[FormingCandle]:
+        return self._forming.get(symbol)
+
+    def seed(self, symbol: str, time: int, open: float, high: float, low: float, close: float):
+        """
+        Lengkapi candle forming dengan candle history di bucket yang sama
+        (stream baru connect di tengah candle -> open/high/low dari API).
+        """
+        bar = self._forming.get(symbol)
+        if bar is None:
+            self._forming[symbol] = FormingCandle(time, open, high, low, close)
+            return
+        if bar.start != time:
+            return
+        bar.open = open
+        bar.high = max(bar.high, high)
+        bar.low = min(bar.low, low)
+
+    def add_listener(self, callback):
+        """`callback(tick, bar, closed)`; `closed` = candle sebelumnya kalau tick ini membuka candle baru."""
+        self._listeners.append(callback)
+
+    # ---------- tick ----------
+
+    def on_tick(self, tick: Tick):
+        start = tick.time - tick.time % self.step
+        bar = self._forming.get(tick.symbol)
+        closed = None
+
+        if bar is None or start > bar.start:
+            closed = bar
+            bar = FormingCandle(start, tick.price, tick.price, tick.price, tick.price, ticks=1)
+            self._forming[tick.symbol] = bar
+        elif start == bar.start:
+            bar.add(tick.price)
+        # tick telat dari bucket sebelumnya -> hanya update harga terakhir
+
+        self._ticks[tick.symbol] = tick
+
+        for callback in self._listeners:
+            try:
+                callback(tick, bar, closed)
+            except Exception as e:
+                logger.error(f"STREAM LISTENER ERROR: {e}")
+
+    def handle_message(self, raw):
+        """Parse satu pesan Twelve Data (event price / subscribe-status / heartbeat)."""
+        data = json.loads(raw)
+        event = data.get("event")
+
+        if event == "price":
+            self.on_tick(Tick(
+                symbol=data["symbol"],
+                price=float(data["price"]),
+                time=int(data["timestamp"]),
+                received=self._clock(),
+            ))
+        elif event == "subscribe-status":
+            if data.get("fails"):
+                logger.error(f"STREAM SUBSCRIBE FAILED: {data['fails']}")
+            logger.info(f"STREAM SUBSCRIBED: {data.get('success')}")
+        elif event == "error" or data.get("status") == "error":
+            logger.error(f"STREAM ERROR: {data.get('message')}")
+
+    # ---------- koneksi ----------
+
+    async def _heartbeat(self, ws):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            await ws.send(json.dumps({"action": "heartbeat"}))
+
+    async def _session(self) -> bool:
+        """Satu koneksi sampai putus. Return True kalau sempat menerima data."""
+        received = False
+
+        async with self._connect(self.url) as ws:
+            await ws.send(json.dumps({
+                "action": "subscribe",
+                "params": {"symbols": ",".join(self.symbols)},
+            }))
+            self.connected = True
+            logger.info(f"STREAM CONNECTED: {', '.join(self.symbols)}")
+
+            heartbeat = asyncio.create_task(self._heartbeat(ws))
+            try:
+                async for raw in ws:
+                    received = True
+                    try:
+                        self.handle_message(raw)
+                    except (ValueError, KeyError) as e:
+                        logger.warning(f"STREAM BAD MESSAGE: {e}")
+            finally:
+                heartbeat.cancel()
+                self.connected = False
+
+        return received
+
+    async def run(self):
+        """Loop koneksi selamanya (sampai `stop()`), reconnect dengan backoff."""
+        attempt = 0
+
+        while not self._stopped:
+            try:
+                if await self._session():
+                    attempt = 0
+                logger.warning("STREAM CLOSED")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"STREAM CONNECTION ERROR: {e}")
+
+            if self._stopped:
+                break
+
+            delay = min(self.max_backoff, self.backoff * (2 ** attempt)) * (0.5 + random.random() / 2)
+            attempt += 1
+            self.reconnects += 1
+            logger.info(f"STREAM RECONNECT dalam {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def stop(self):
+        self._stopped = True
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Rate Limit / Credit Budget
+==========================
+Penjadwal fetch yang sadar kuota API Twelve Data (free tier: 8 kredit /
+menit, 800 kredit / hari, reset harian 00:00 UTC):
+- token bucket per menit + budget harian,
+- antrian berprioritas: fetch terjadwal (close candle) selalu dilayani
+  sebelum fetch ad-hoc (/price, /signal),
+- sebagian budget harian bisa dicadangkan khusus untuk fetch terjadwal,
+- `metrics()` untuk melihat sisa budget.
+
+Satu instance dipakai bersama oleh semua fetch.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger("XAU-BOT.ratelimit")
+
+PRIORITY_SCHEDULED = 0
+PRIORITY_ADHOC = 1
+
+_PRIORITY_NAMES = {PRIORITY_SCHEDULED: "scheduled", PRIORITY_ADHOC: "adhoc"}
+
+
+class BudgetExhausted(Exception):
+    """Budget kredit harian habis (atau tinggal cadangan untuk fetch terjadwal)."""
+
+
+class CreditScheduler:
+
+    def __init__(
+        self,
+        per_minute: float,
+        per_day: int = None,
+        scheduled_reserve: int = 0,
+        clock=time.time,
+    ):
+        """
+        `per_minute` = kredit per menit (juga kapasitas bucket).
+        `per_day` = budget harian (None = tanpa batas harian).
+        `scheduled_reserve` = kredit harian terakhir yang hanya boleh dipakai fetch terjadwal.
+        """
+        if per_minute < 1:
+            raise ValueError(f"per_minute minimal 1 kredit (dapat {per_minute})")
+
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.scheduled_reserve = scheduled_reserve
+        self._clock = clock
+
+        self._tokens = float(per_minute)
+        self._updated = clock()
+        self._day = int(self._updated // 86400)
+        self._used_today = 0
+
+        self._waiters = []
+        self._seq = itertools.count()
+        self._timer = None
+
+        self.granted = {PRIORITY_SCHEDULED: 0, PRIORITY_ADHOC: 0}
+        self.rejected = 0
+
+    @property
+    def max_credits(self) -> int:
+        """Kredit terbesar yang bisa diminta dalam satu `acquire()` (ukuran batch)."""
+        return int(self.per_minute)
+
+    # ---------- budget ----------
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.per_minute, self._tokens + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+        day = int(now // 86400)
+        if day != self._day:
+            self._day = day
+            self._used_today = 0
+
+    def _check_daily(self, credits: int, priority: int):
+        if self.per_day is None:
+            return
+        limit = self.per_day
+        if priority != PRIORITY_SCHEDULED:
+            limit -= self.scheduled_reserve
+        if self._used_today + credits > limit:
+            self.rejected += 1
+            raise BudgetExhausted(
+                f"Budget kredit harian habis ({self._used_today}/{self.per_day}, "
+                f"prioritas {_PRIORITY_NAMES.get(priority, priority)})"
+            )
+
+    def _grant(self, credits: int, priority: int):
+        self._tokens -= credits
+        self._used_today += credits
+        self.granted[priority] = self.granted.get(priority, 0) + credits
+
+    # ---------- antrian ----------
+
+    async def acquire(self, credits: int = 1, priority: int = PRIORITY_ADHOC):
+        """
+        Tunggu sampai `credits` tersedia. BudgetExhausted kalau budget harian
+        habis, atau kalau `credits` melebihi kapasitas per menit (tidak akan
+        pernah terpenuhi; pecah request jadi batch `max_credits`).
+        """
+        if credits > self.per_minute:
+            self.rejected += 1
+            raise BudgetExhausted(f"{credits} kredit melebihi kapasitas per menit ({self.per_minute})")
+
+        self._refill()
+        self._check_daily(credits, priority)
+
+        if not self._waiters and self._tokens >= credits:
+            self._grant(credits, priority)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), credits, future))
+        self._dispatch()
+        await future
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self):
+        self._refill()
+
+        while self._waiters:
+            priority, _, credits, future = self._waiters[0]
+
+            if future.done():  # pemanggil sudah cancel
+                heapq.heappop(self._waiters)
+                continue
+
+            try:
+                self._check_daily(credits, priority)
+            except BudgetExhausted as e:
+                heapq.heappop(self._waiters)
+                future.set_exception(e)
+                continue
+
+            if self._tokens < credits:
+                delay = (credits - self._tokens) * 60 / self.per_minute
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                return
+
+            heapq.heappop(self._waiters)
+            self._grant(credits, priority)
+            future.set_result(None)
+
+    # ---------- metrics ----------
+
+    def metrics(self) -> dict:
+        self._refill()
+        waiting = {name: 0 for name in _PRIORITY_NAMES.values()}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                waiting[_PRIORITY_NAMES.get(priority, str(priority))] += 1
+
+        return {
+            "minute_remaining": round(max(self._tokens, 0), 2),
+            "minute_capacity": self.per_minute,
+            "day_used": self._used_today,
+            "day_remaining": None if self.per_day is None else self.per_day - self._used_today,
+            "waiting": waiting,
+            "granted": {_PRIORITY_NAMES.get(p, str(p)): n for p, n in self.granted.items()},
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Replay
+======
+Jalankan bot utuh (`scheduler()`, `build_signal()`, command handler) secara
+offline di atas candle rekaman, dengan:
+- jam virtual: event loop yang melompati waktu tunggu (`asyncio.sleep`,
+  timer) saat tidak ada I/O / job executor yang jalan, jadi sebulan siklus
+  scheduler selesai dalam hitungan detik. Waktu CPU asli tetap ikut
+  dihitung, jadi latency yang dilaporkan = latency simulasi + waktu proses,
+- `ReplayProvider`: candle rekaman yang hanya terlihat setelah close
+  menurut jam virtual (tidak ada lookahead), dengan latency API tiruan,
+- Telegram tiruan di memori (`FakeBot`): pesan & reply disimpan, dengan
+  latency request tiruan.
+
+Metric fetch / scan / kirim Telegram diukur dengan jam loop, jadi di
+laporan berisi latency simulasi (virtual). `engine_stage_seconds` diukur
+di worker dengan `perf_counter` = waktu CPU asli analisa.
+
+Command user (`/signal`, `/price`, ...) disebar acak (seed tetap) di
+sepanjang periode replay, lalu dilaporkan latency end-to-end
+(p50/p95/p99/max) dan throughput-nya.
+
+Contoh:
+    python replay.py data/xauusd_1h.csv --days 30 --commands 5000
+    python replay.py data/xau_1min.csv --data XAG/USD=data/xag_1min.csv --mix signal=3,price=1
+
+Konfigurasi bot (WATCHLIST, SMC_*, API_RATE_PER_MINUTE, TELEGRAM_*, ...)
+dibaca dari environment seperti biasa; provider, candle store, price
+stream dan endpoint metrics selalu dimatikan di mode ini.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import selectors
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from ingest import load_candles
+from metrics import REGISTRY
+
+logger = logging.getLogger("XAU-BOT.replay")
+
+DEFAULT_MIX = {"signal": 3, "price": 1}
+COMMAND_CHATS = range(1000, 1050)  # chat user yang mengirim command tiruan
+
+
+# ================= VIRTUAL CLOCK =================
+
+class _VirtualSelector:
+    """
+    Pembungkus selector: kalau tidak ada I/O siap dan tidak ada job
+    executor yang jalan, waktu tunggu sampai timer berikutnya dilompati
+    (ditambahkan ke jam loop) alih-alih benar-benar ditunggu.
+    """
+
+    def __init__(self, selector: selectors.BaseSelector, loop: "VirtualClockLoop"):
+        self._selector = selector
+        self._loop = loop
+
+    def select(self, timeout: Optional[float] = None):
+        if self._loop.executor_jobs or timeout is None or timeout <= 0:
+            return self._selector.select(timeout)
+
+        events = self._selector.select(0)
+        if not events:
+            self._loop.skipped += timeout
+        return events
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop dengan jam virtual: `time()` = jam asli + waktu tunggu yang dilompati."""
+
+    def __init__(self):
+        super().__init__(selectors.DefaultSelector())
+        self._selector = _VirtualSelector(self._selector, self)
+        self.skipped = 0.0
+        self.executor_jobs = 0
+
+    def time(self) -> float:
+        return time.monotonic() + self.skipped
+
+    def run_in_executor(self, executor, func, *args):
+        # selama ada job di thread / process pool, waktu berjalan normal
+        future = super().run_in_executor(executor, func, *args)
+        self.executor_jobs += 1
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _job_done(self, _):
+        self.executor_jobs -= 1
+
+
+class VirtualClock:
+    """Jam dinding (epoch detik) yang mulai di `start` dan berjalan mengikuti jam loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, start: float):
+        self._loop = loop
+        self._origin = loop.time()
+        self.start = start
+
+    def time(self) -> float:
+        return self.start + self._loop.time() - self._origin
+
+
+# ================= FAKE TELEGRAM =================
+
+@dataclass
+class SentMessage:
+    chat_id: int
+    thread_id: Optional[int]
+    text: str
+    at: float  # epoch virtual
+
+
+class FakeBot:
+    """Pengganti `telegram.Bot` secukupnya: request dicatat di memori dengan latency tiruan."""
+
+    def __init__(self, clock, latency: float = 0.05):
+        self._clock = clock
+        self.latency = latency
+        self.sent: list[SentMessage] = []
+        self.commands = []
+
+    async def send_message(self, chat_id, text, message_thread_id=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent.append(SentMessage(chat_id, message_thread_id, text, self._clock()))
+
+    async def set_my_commands(self, commands, **kwargs):
+        self.commands = list(commands)
+
+
+class FakeApp:
+
+    def __init__(self, bot: FakeBot):
+        self.bot = bot
+        self.bot_data = {}
+
+
+class FakeMessage:
+
+    def __init__(self, bot: FakeBot, chat_id: int):
+        self._bot = bot
+        self.chat_id = chat_id
+        self.replies: list[str] = []
+
+    async def reply_text(self, text, **kwargs):
+        await self._bot.send_message(self.chat_id, text)
+        self.replies.append(text)
+
+
+class FakeUpdate:
+
+    def __init__(self, message: FakeMessage):
+        self.message = message
+        self.effective_message = message
+
+
+# ================= REPORT =================
+
+@dataclass
+class ReplayReport:
+    start: float
+    end: float
+    real_seconds: float
+    scheduler_cycles: int
+    messages: int
+    api_requests: int
+    latencies: dict = field(default_factory=dict)  # command -> [detik]
+    errors: int = 0
+
+    @property
+    def commands(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+    def format(self) -> str:
+        virtual = self.end - self.start
+        lines = [
+            f"REPLAY {_fmt(self.start)} -> {_fmt(self.end)} UTC "
+            f"({virtual / 3600:.0f} jam virtual) dalam {self.real_seconds:.1f}s "
+            f"(x{virtual / max(self.real_seconds, 1e-9):,.0f})",
+            f"scheduler : {self.scheduler_cycles} siklus, {self.messages} pesan Telegram, "
+            f"{self.api_requests} request data",
+            f"commands  : {self.commands} ({self.errors} error), "
+            f"{self.commands / max(self.real_seconds, 1e-9):,.1f} command/s real",
+            "",
+            f"{'command':<10} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}",
+        ]
+        for name, values in sorted(self.latencies.items()):
+            if not values:
+                continue
+            values = sorted(values)
+            lines.append(
+                f"{name:<10} {len(values):>6} {_pct(values, 0.5):>9.1f} {_pct(values, 0.95):>9.1f} "
+                f"{_pct(values, 0.99):>9.1f} {values[-1] * 1000:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+def _pct(values: list, q: float) -> float:
+    if len(values) == 1:
+        return values[0] * 1000
+    return statistics.quantiles(values, n=100, method="inclusive")[round(q * 100) - 1] * 1000
+
+
+def _fmt(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.gmtime(ts))
+
+
+# ================= DRIVER =================
+
+def install(bot, provider, clock: VirtualClock):
+    """Arahkan modul `bot` ke jam virtual dan provider rekaman (state global dibuat ulang)."""
+    from candle_history import HistoryFetcher
+    from rate_limit import CreditScheduler
+
+    bot.clock = clock.time
+    bot.provider = provider
+    bot.candle_store = None
+    bot.history_fetcher = HistoryFetcher(provider, max_bars=bot.SMC_HISTORY_BARS)
+    # budget API dihitung dari jam virtual sejak awal replay
+    bot.fetch_scheduler = CreditScheduler(
+        per_minute=bot.API_RATE_PER_MINUTE,
+        per_day=bot.API_CREDITS_PER_DAY,
+        scheduled_reserve=bot.API_SCHEDULED_RESERVE,
+        clock=bot.now,
+    )
+    bot.last_signal_time = None
+    bot.tasks_started = False
+
+
+def command_times(start: float, end: float, count: int, mix: dict, seed: int = 1, burst: int = 1) -> list[tuple]:
+    """
+    `count` command (waktu, nama) tersebar acak di [start, end), urut waktu.
+    `burst` > 1 -> command datang berkelompok `burst` sekaligus di waktu yang sama.
+    """
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    times = [rng.uniform(start, end) for _ in range(-(-count // burst))]
+    return sorted(
+        (times[i // burst], rng.choices(names, weights)[0]) for i in range(count)
+    )
+
+
+async def _run_command(bot, handler, fake: FakeBot, chat_id: int, latencies: list, clock: VirtualClock) -> bool:
+    started = clock.time()
+    message = FakeMessage(fake, chat_id)
+    try:
+        await handler(FakeUpdate(message), None)
+    except Exception as e:
+        logger.error(f"REPLAY COMMAND ERROR: {e}")
+        return False
+    latencies.append(clock.time() - started)
+    return True
+
+
+async def replay(
+    series: dict,
+    start: Optional[float],
+    end: Optional[float],
+    commands: int = 1000,
+    mix: dict = DEFAULT_MIX,
+    seed: int = 1,
+    burst: int = 1,
+    subscribers: int = 0,
+    api_latency: float = 0.3,
+    telegram_latency: float = 0.05,
+) -> ReplayReport:
+    """
+    Replay bot di atas `series` (symbol -> CandleSeries rekaman) dari
+    `start` sampai `end` (epoch UTC). Harus jalan di `VirtualClockLoop`.
+    """
+    import bot
+    from market_data import ReplayProvider
+    from telegram_queue import SendQueue
+
+    loop = asyncio.get_running_loop()
+    if not isinstance(loop, VirtualClockLoop):
+        raise RuntimeError("replay() harus dijalankan di VirtualClockLoop")
+
+    clock = VirtualClock(loop, start)
+    provider = ReplayProvider(series, clock=clock.time, latency=api_latency)
+    install(bot, provider, clock)
+
+    bot.open_stores()
+
+    # subscriber sintetis: chat ke-i berlangganan satu item watchlist (bergiliran)
+    for i in range(subscribers):
+        item = bot.WATCHLIST[i % len(bot.WATCHLIST)]
+        bot.subscriptions.subscribe(-10_000 - i, item.symbol, item.interval)
+
+    fake = FakeBot(clock.time, latency=telegram_latency)
+    app = FakeApp(fake)
+    app.bot_data["send_queue"] = SendQueue(
+        lambda chat_id, thread_id, text: fake.send_message(chat_id, text, message_thread_id=thread_id),
+        chat_interval=bot.TELEGRAM_CHAT_INTERVAL,
+        coalesce=bot.TELEGRAM_COALESCE,
+        max_inflight=bot.TELEGRAM_MAX_INFLIGHT,
+        clock=loop.time,
+    )
+
+    handlers = {
+        "start": bot.start,
+        "signal": bot.signal,
+        "price": bot.price,
+        "budget": bot.budget,
+        "metrics": bot.metrics_command,
+    }
+    unknown = set(mix) - set(handlers)
+    if unknown:
+        raise ValueError(f"command tidak dikenal: {', '.join(sorted(unknown))}")
+
+    scans_before = bot.SCAN_SECONDS.count()
+    started_real = time.perf_counter()
+
+    await bot.post_init(app)
+
+    latencies = {name: [] for name in mix}
+    tasks = []
+    for at, name in command_times(start, end, commands, mix, seed, burst):
+        delay = at - clock.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        chat_id = COMMAND_CHATS[len(tasks) % len(COMMAND_CHATS)]
+        tasks.append(asyncio.create_task(
+            _run_command(bot, handlers[name], fake, chat_id, latencies[name], clock)
+        ))
+
+    delay = end - clock.time()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+    results = await asyncio.gather(*tasks)
+    await bot.post_shutdown(app)
+    real_seconds = time.perf_counter() - started_real
+
+    # scheduler & worker lain yang masih menunggu jadwal berikutnya
+    pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    return ReplayReport(
+        start=start,
+        end=end,
+        real_seconds=real_seconds,
+        scheduler_cycles=bot.SCAN_SECONDS.count() - scans_before,
+        messages=sum(1 for message in fake.sent if message.chat_id not in COMMAND_CHATS),
+        api_requests=provider.requests,
+        latencies=latencies,
+        errors=results.count(False),
+    )
+
+
+# ================= MAIN =================
+
+def _mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name:
+            mix[name.lstrip("/")] = float(weight or 1)
+    return mix
+
+
+def _parse_date(value: str) -> float:
+    from smc_engine import parse_time
+    return float(parse_time(value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay bot offline dengan jam virtual & data rekaman")
+    parser.add_argument("path", help="File candle / direktori CandleStore untuk symbol utama (SYMBOL)")
+    parser.add_argument("--data", action="append", default=[], help="SYMBOL=path untuk symbol watchlist lain")
+    parser.add_argument("--start", type=_parse_date, help="Awal replay (UTC), default = --days sebelum akhir data")
+    parser.add_argument("--end", type=_parse_date, help="Akhir replay (UTC), default = akhir data")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--commands", type=int, default=1000, help="Jumlah command user yang disimulasikan")
+    parser.add_argument("--mix", type=_mix, default=DEFAULT_MIX, help="Bobot command, mis. signal=3,price=1")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--burst", type=int, default=1, help="Jumlah command yang datang bersamaan")
+    parser.add_argument("--subscribers", type=int, default=0, help="Jumlah chat subscriber sintetis untuk fan-out")
+    parser.add_argument("--api-latency", type=float, default=0.3, help="Latency tiruan per request data (detik)")
+    parser.add_argument("--telegram-latency", type=float, default=0.05, help="Latency tiruan per request Telegram (detik)")
+    parser.add_argument("--verbose", action="store_true", help="Tampilkan log bot")
+    args = parser.parse_args()
+
+    # bot membaca env saat di-import: matikan semua yang butuh network / disk
+    os.environ["DATA_PROVIDER"] = "file"
+    os.environ["CANDLE_STORE_DIR"] = ""
+    os.environ["PRICE_STREAM"] = "0"
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["SUBSCRIPTIONS_DB"] = ""
+    os.environ["JOURNAL_DB"] = ""
+
+    import bot
+
+    logging.getLogger("XAU-BOT").setLevel(logging.INFO if args.verbose else logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    series = {bot.SYMBOL: load_candles(args.path)}
+    for spec in args.data:
+        symbol, _, path = spec.partition("=")
+        series[symbol.strip()] = load_candles(path.strip())
+
+    missing = {item.symbol for item in bot.WATCHLIST} - set(series)
+    if missing:
+        parser.error(f"tidak ada data rekaman untuk symbol watchlist: {', '.join(sorted(missing))}")
+
+    base = series[bot.SYMBOL]
+    end = args.end or base.last_time + (base.times[-1] - base.times[-2])
+    start = args.start or end - args.days * 86400
+
+    loop = VirtualClockLoop()
+    asyncio.set_event_loop(loop)
+    try:
+        report = loop.run_until_complete(replay(
+            series, start, end,
+            commands=args.commands,
+            mix=args.mix,
+            seed=args.seed,
+            burst=args.burst,
+            subscribers=args.subscribers,
+            api_latency=args.api_latency,
+            telegram_latency=args.telegram_latency,
+        ))
+    finally:
+        loop.close()
+
+    print(report.format())
+    print()
+    print(REGISTRY.summary())
+
+
+if __name__ == "__main__":
+    main()
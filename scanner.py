@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Market Scanner
+==============
+Scan watchlist banyak symbol x banyak timeframe sekaligus:
+- opsional `prefetch` batch per interval dulu (satu request untuk banyak
+  symbol, prioritas scheduled di `CreditScheduler`), lalu ambil candle
+  semua item secara concurrent (rate limit diatur oleh fungsi fetch yang
+  di-inject),
+- `analyze()` setiap item dijalankan di `AnalysisPool` (thread / process
+  sesuai ukuran job) supaya event loop bot tetap responsif,
+- opsional konfirmasi timeframe besar (`higher`) lewat `analyze_mtf()`,
+  dari candle base yang sama (tanpa fetch tambahan).
+
+Format watchlist (env WATCHLIST):
+    "XAU/USD:15min,1h,4h@123; XAG/USD:1h; EUR/USD:1h,4h"
+`@123` opsional = message_thread_id (topic) tujuan sinyal symbol itu.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from smc_engine import CandleSeries, SMCResult, interval_seconds
+from timeframes import MAX_BASE_COUNT, analyze_mtf, base_count
+
+logger = logging.getLogger("XAU-BOT.scanner")
+
+
+# ================= WATCHLIST =================
+
+@dataclass(frozen=True)
+class WatchItem:
+    symbol: str
+    interval: str
+    thread_id: Optional[int] = None
+
+
+def parse_watchlist(value: str, default_interval: str = "1h") -> list[WatchItem]:
+    items = []
+
+    for entry in value.split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+
+        thread_id = None
+        if "@" in entry:
+            entry, thread = entry.rsplit("@", 1)
+            thread_id = int(thread)
+
+        symbol, _, intervals = entry.partition(":")
+        for interval in (intervals or default_interval).split(","):
+            interval = interval.strip()
+            interval_seconds(interval)  # validasi format interval
+            items.append(WatchItem(symbol=symbol.strip(), interval=interval, thread_id=thread_id))
+
+    return items
+
+
+def due_items(items: list[WatchItem], timestamp: int) -> list[WatchItem]:
+    """Item yang candle-nya close tepat di `timestamp` (epoch, kelipatan interval)."""
+    return [item for item in items if timestamp % interval_seconds(item.interval) == 0]
+
+
+# ================= SCANNER =================
+
+@dataclass
+class ScanResult:
+    item: WatchItem
+    result: Optional[SMCResult] = None
+    candles: Optional[CandleSeries] = None  # candle yang dianalisa (base interval)
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+class MarketScanner:
+
+    def __init__(
+        self,
+        get_candles,
+        pool=None,
+        count: int = 60,
+        higher: tuple = (),
+        max_concurrency: int = 8,
+        prefetch=None,
+        max_bars: int = MAX_BASE_COUNT,
+    ):
+        """
+        `get_candles` = coroutine function `(symbol, interval, count) -> CandleSeries | None`.
+        `pool` = `AnalysisPool` untuk `analyze()` (None = default executor loop).
+        `higher` = timeframe konfirmasi, mis. ("1h", "4h").
+        `prefetch` = coroutine function opsional `(symbols, interval, count)`
+        yang dipanggil sekali per interval sebelum item di-scan.
+        `max_bars` = batas jumlah candle base per fetch (lihat `base_count`).
+        """
+        self._get_candles = get_candles
+        self.pool = pool
+        self.count = count
+        self.higher = tuple(higher)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._prefetch = prefetch
+        self.max_bars = max_bars
+
+    async def _prefetch_items(self, items: list[WatchItem]):
+        by_interval: dict = {}
+        for item in items:
+            symbols = by_interval.setdefault(item.interval, [])
+            if item.symbol not in symbols:
+                symbols.append(item.symbol)
+
+        for interval, symbols in by_interval.items():
+            try:
+                count = base_count(interval, self.higher, self.count, self.max_bars)
+                await self._prefetch(symbols, interval, count)
+            except Exception as e:
+                logger.error(f"PREFETCH ERROR {interval}: {e}")
+
+    async def _scan_item(self, item: WatchItem) -> ScanResult:
+        started = time.perf_counter()
+
+        try:
+            async with self._semaphore:
+                candles = await self._get_candles(
+                    item.symbol, item.interval, base_count(item.interval, self.higher, self.count, self.max_bars)
+                )
+
+            if not candles:
+                return ScanResult(item=item, error="No realtime price data")
+
+            args = (candles, item.interval, self.higher, self.count)
+            if self.pool is not None:
+                result = await self.pool.run(analyze_mtf, *args, size=len(candles))
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(None, analyze_mtf, *args)
+            return ScanResult(item=item, result=result, candles=candles, seconds=time.perf_counter() - started)
+
+        except asyncio.TimeoutError:
+            logger.error(f"SCAN TIMEOUT {item.symbol} {item.interval}")
+            return ScanResult(item=item, error="Analisa timeout", seconds=time.perf_counter() - started)
+
+        except Exception as e:
+            logger.error(f"SCAN ERROR {item.symbol} {item.interval}: {e}")
+            return ScanResult(item=item, error=str(e), seconds=time.perf_counter() - started)
+
+    async def scan(self, items: list[WatchItem]) -> list[ScanResult]:
+        """Scan semua item secara concurrent, hasil urut sesuai `items`."""
+        started = time.perf_counter()
+        if self._prefetch is not None:
+            await self._prefetch_items(items)
+        results = await asyncio.gather(*(self._scan_item(item) for item in items))
+        logger.info(f"SCAN DONE: {len(items)} item dalam {time.perf_counter() - started:.2f}s")
+        return list(results)
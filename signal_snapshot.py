@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Signal Snapshot
+===============
+Hasil analisa disimpan per (symbol, interval, waktu candle terakhir).
+`/signal` cukup membaca snapshot (O(1)) dan analisa hanya diulang kalau
+data candle berubah: candle baru, atau candle terakhir (forming)
+ter-update. Pesan di-render per request dari `result` (murah), jadi jam
+di pesan selalu jam saat dikirim, bukan saat snapshot dibuat.
+
+Setiap snapshot baru untuk (symbol, interval) yang sama menaikkan
+`version`, jadi mudah dilacak di log berapa kali sinyal dihitung ulang.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from smc_engine import CandleSeries, SMCResult
+
+logger = logging.getLogger("XAU-BOT.snapshot")
+
+
+def data_key(candles: CandleSeries) -> tuple:
+    """Sidik data candle: batas awal/akhir series + nilai OHLC candle terakhir."""
+    last = len(candles) - 1
+    return (
+        len(candles),
+        candles.times[0],
+        candles.times[last],
+        candles.opens[last],
+        candles.highs[last],
+        candles.lows[last],
+        candles.closes[last],
+    )
+
+
+@dataclass
+class SignalSnapshot:
+    symbol: str
+    interval: str
+    bar_time: int  # epoch candle terakhir
+    version: int
+    data: tuple  # `data_key()` candle yang dianalisa
+    result: SMCResult
+    created_at: float
+
+
+class SnapshotStore:
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._latest: dict = {}  # (symbol, interval) -> SignalSnapshot
+        self._inflight: dict = {}  # (symbol, interval, data) -> Task
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol: str, interval: str, candles: CandleSeries) -> Optional[SignalSnapshot]:
+        """Snapshot terakhir kalau dibuat dari data candle yang sama persis."""
+        snapshot = self._latest.get((symbol, interval))
+        if snapshot is not None and snapshot.data == data_key(candles):
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        return None
+
+    async def get_or_compute(self, symbol: str, interval: str, candles: CandleSeries, compute) -> SignalSnapshot:
+        """
+        Snapshot untuk `candles`; kalau belum ada, `compute()` (coroutine
+        function -> SMCResult) dijalankan SEKALI walaupun banyak
+        request datang bersamaan.
+        """
+        snapshot = self.get(symbol, interval, candles)
+        if snapshot is not None:
+            return snapshot
+
+        key = (symbol, interval, data_key(candles))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, candles, compute))
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, key, candles, compute) -> SignalSnapshot:
+        symbol, interval, _ = key
+        try:
+            result = await compute()
+        finally:
+            self._inflight.pop(key, None)
+        return self.put(symbol, interval, candles, result)
+
+    def put(self, symbol: str, interval: str, candles: CandleSeries, result: SMCResult) -> SignalSnapshot:
+        previous = self._latest.get((symbol, interval))
+        data = data_key(candles)
+
+        # data lebih lama dari snapshot yang ada (mis. hasil scan yang telat) tidak menimpa
+        if previous is not None and previous.bar_time > data[2]:
+            return previous
+
+        snapshot = SignalSnapshot(
+            symbol=symbol,
+            interval=interval,
+            bar_time=data[2],
+            version=previous.version + 1 if previous else 1,
+            data=data,
+            result=result,
+            created_at=self._clock(),
+        )
+        self._latest[(symbol, interval)] = snapshot
+        logger.info(f"SIGNAL SNAPSHOT: {symbol} {interval} v{snapshot.version} bar {snapshot.bar_time}")
+        return snapshot
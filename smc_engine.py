@@ -16,7 +16,11 @@ sebelum dipakai dengan uang sungguhan.
 """
 
 import logging
+from array import array
+from collections import deque
 from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from time import perf_counter
 from typing import Optional
 
 logger = logging.getLogger("XAU-BOT.smc")
@@ -24,7 +28,7 @@ logger = logging.getLogger("XAU-BOT.smc")
 
 # ================= DATA STRUCTURES =================
 
-@dataclass
+@dataclass(slots=True)
 class Candle:
     time: str
     open: float
@@ -41,6 +45,258 @@ class Candle:
         return self.close < self.open
 
 
+def parse_time(value: str) -> int:
+    """String datetime Twelve Data ("YYYY-MM-DD[ HH:MM:SS]", UTC) -> epoch detik."""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def format_time(ts: int) -> str:
+    """Epoch detik -> string datetime UTC dengan format yang sama seperti Twelve Data."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+_INTERVAL_UNITS = {"min": 60, "h": 3600, "day": 86400, "week": 7 * 86400}
+
+
+def interval_seconds(interval: str) -> int:
+    """Interval Twelve Data ("1min", "15min", "1h", "4h", "1day", "1week") -> detik."""
+    for unit, seconds in _INTERVAL_UNITS.items():
+        if interval.endswith(unit) and interval[:-len(unit)].isdigit():
+            return int(interval[:-len(unit)]) * seconds
+    raise ValueError(f"Interval tidak dikenal: {interval}")
+
+
+class CandleSeries:
+    """
+    Penyimpanan candle kolumnar: open/high/low/close disimpan sebagai array
+    float kontigu (`array("d")`) dan waktu sebagai epoch int64 (`array("q")`).
+    Jauh lebih hemat memori dibanding list of `Candle` (~40 byte per bar).
+
+    - `series[i]` mengembalikan `Candle` (dibuat on-the-fly) supaya kode
+      lama yang memakai `.high` / `.close` tetap jalan.
+    - `series[a:b]` / `window()` / `tail()` mengembalikan view tanpa copy
+      yang berbagi kolom dengan series asal.
+    - `highs`, `lows`, dst. mengembalikan `memoryview` kolom (zero-copy).
+      Jangan simpan memoryview ini lama-lama: selama masih hidup, series
+      asal tidak bisa di-`append()` (BufferError dari modul array).
+    """
+
+    __slots__ = ("_time", "_open", "_high", "_low", "_close", "_start", "_stop")
+
+    def __init__(self, times=(), opens=(), highs=(), lows=(), closes=()):
+        self._time = array("q", times)
+        self._open = array("d", opens)
+        self._high = array("d", highs)
+        self._low = array("d", lows)
+        self._close = array("d", closes)
+        self._start = 0
+        self._stop = None  # None = ikut panjang kolom (series root, bisa di-append)
+
+        if not (len(self._time) == len(self._open) == len(self._high) == len(self._low) == len(self._close)):
+            raise ValueError("Panjang kolom CandleSeries tidak sama")
+
+    @classmethod
+    def from_buffers(cls, times, opens, highs, lows, closes) -> "CandleSeries":
+        """
+        Bungkus buffer yang sudah ada (mis. memoryview dari mmap / shared
+        memory) tanpa copy. Series hasilnya read-only.
+        """
+        series = object.__new__(cls)
+        series._time = times
+        series._open = opens
+        series._high = highs
+        series._low = lows
+        series._close = closes
+        series._start = 0
+        series._stop = len(times)
+        return series
+
+    @classmethod
+    def from_arrays(cls, times: array, opens: array, highs: array, lows: array, closes: array) -> "CandleSeries":
+        """
+        Ambil alih `array` kolom hasil parse tanpa copy. Berbeda dengan
+        `from_buffers()`, hasilnya series root biasa (bisa di-append), jadi
+        array tidak boleh dipakai lagi oleh pemanggil.
+        """
+        series = cls.from_buffers(times, opens, highs, lows, closes)
+        series._stop = None
+        if not (len(times) == len(opens) == len(highs) == len(lows) == len(closes)):
+            raise ValueError("Panjang kolom CandleSeries tidak sama")
+        return series
+
+    @classmethod
+    def from_candles(cls, candles) -> "CandleSeries":
+        series = cls()
+        for c in candles:
+            series.append_candle(c)
+        return series
+
+    def _view(self, start: int, stop: int) -> "CandleSeries":
+        view = object.__new__(CandleSeries)
+        view._time = self._time
+        view._open = self._open
+        view._high = self._high
+        view._low = self._low
+        view._close = self._close
+        view._start = start
+        view._stop = stop
+        return view
+
+    def _bounds(self) -> tuple[int, int]:
+        stop = len(self._time) if self._stop is None else self._stop
+        return self._start, stop
+
+    # ---------- sequence protocol ----------
+
+    def __len__(self):
+        start, stop = self._bounds()
+        return stop - start
+
+    def __getitem__(self, key):
+        start, stop = self._bounds()
+
+        if isinstance(key, slice):
+            a, b, step = key.indices(stop - start)
+            if step != 1:
+                raise ValueError("CandleSeries hanya mendukung slice kontigu (step 1)")
+            b = max(a, b)
+            return self._view(start + a, start + b)
+
+        n = stop - start
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError("CandleSeries index out of range")
+
+        i = start + key
+        return Candle(
+            time=format_time(self._time[i]),
+            open=self._open[i],
+            high=self._high[i],
+            low=self._low[i],
+            close=self._close[i],
+        )
+
+    def __iter__(self):
+        start, stop = self._bounds()
+        for i in range(start, stop):
+            yield Candle(
+                time=format_time(self._time[i]),
+                open=self._open[i],
+                high=self._high[i],
+                low=self._low[i],
+                close=self._close[i],
+            )
+
+    def __repr__(self):
+        return f"CandleSeries(len={len(self)})"
+
+    def __reduce__(self):
+        # pickle hanya rentang view ini (juga untuk series berbasis mmap)
+        c = self.copy()
+        return CandleSeries, (c._time, c._open, c._high, c._low, c._close)
+
+    def window(self, start: int, stop: int) -> "CandleSeries":
+        return self[start:stop]
+
+    def tail(self, count: int) -> "CandleSeries":
+        return self[max(len(self) - count, 0):]
+
+    def to_candles(self) -> list[Candle]:
+        return list(self)
+
+    def copy(self) -> "CandleSeries":
+        """Copy independen (series root baru) dari rentang series ini."""
+        start, stop = self._bounds()
+        return CandleSeries(
+            self._time[start:stop],
+            self._open[start:stop],
+            self._high[start:stop],
+            self._low[start:stop],
+            self._close[start:stop],
+        )
+
+    @property
+    def last_time(self) -> Optional[int]:
+        """Epoch candle terakhir (None kalau kosong)."""
+        start, stop = self._bounds()
+        return self._time[stop - 1] if stop > start else None
+
+    # ---------- kolom ----------
+
+    def _column(self, col) -> memoryview:
+        start, stop = self._bounds()
+        return memoryview(col)[start:stop]
+
+    @property
+    def times(self) -> memoryview:
+        return self._column(self._time)
+
+    @property
+    def opens(self) -> memoryview:
+        return self._column(self._open)
+
+    @property
+    def highs(self) -> memoryview:
+        return self._column(self._high)
+
+    @property
+    def lows(self) -> memoryview:
+        return self._column(self._low)
+
+    @property
+    def closes(self) -> memoryview:
+        return self._column(self._close)
+
+    @property
+    def nbytes(self) -> int:
+        """Ukuran data kolom (byte) untuk rentang series ini."""
+        return len(self) * (self._time.itemsize + 4 * self._open.itemsize)
+
+    # ---------- mutasi (hanya series root) ----------
+
+    def _check_root(self):
+        if self._start != 0 or self._stop is not None:
+            raise TypeError("View CandleSeries bersifat read-only")
+
+    def append(self, time: int, open: float, high: float, low: float, close: float):
+        self._check_root()
+        self._time.append(time)
+        self._open.append(open)
+        self._high.append(high)
+        self._low.append(low)
+        self._close.append(close)
+
+    def append_candle(self, candle: Candle):
+        self.append(parse_time(candle.time), candle.open, candle.high, candle.low, candle.close)
+
+    def set_last(self, time: int, open: float, high: float, low: float, close: float):
+        """Timpa candle terakhir (candle yang masih forming)."""
+        self._check_root()
+        if not self._time:
+            raise IndexError("CandleSeries kosong")
+        self._time[-1] = time
+        self._open[-1] = open
+        self._high[-1] = high
+        self._low[-1] = low
+        self._close[-1] = close
+
+
+def _columns(candles) -> tuple:
+    """(opens, highs, lows, closes) untuk list of Candle maupun CandleSeries."""
+    if isinstance(candles, CandleSeries):
+        return candles.opens, candles.highs, candles.lows, candles.closes
+    return (
+        [c.open for c in candles],
+        [c.high for c in candles],
+        [c.low for c in candles],
+        [c.close for c in candles],
+    )
+
+
 @dataclass
 class SwingPoint:
     index: int
@@ -55,6 +311,7 @@ class OrderBlock:
     top: float
     bottom: float
     mitigated: bool = False
+    mitigated_index: Optional[int] = None  # candle pertama yang memitigasi OB
 
 
 @dataclass
@@ -64,6 +321,60 @@ class FVG:
     top: float
     bottom: float
     filled: bool = False
+    filled_index: Optional[int] = None  # candle pertama yang mengisi FVG
+
+
+@dataclass
+class ZoneScan:
+    """Seluruh OB & FVG dalam satu series (hasil `scan_zones`)."""
+    order_blocks: list = field(default_factory=list)
+    fvgs: list = field(default_factory=list)
+
+    @property
+    def active_order_blocks(self) -> list:
+        return [ob for ob in self.order_blocks if not ob.mitigated]
+
+    @property
+    def active_fvgs(self) -> list:
+        return [fvg for fvg in self.fvgs if not fvg.filled]
+
+    def active_at(self, index: int) -> tuple[list, list]:
+        """
+        (OB, FVG) yang sudah terbentuk dan belum dimitigasi/terisi pada
+        candle `index`. Zona di index i baru terkonfirmasi di candle i+1.
+        """
+        obs = [
+            ob for ob in self.order_blocks
+            if ob.index < index and (ob.mitigated_index is None or ob.mitigated_index > index)
+        ]
+        fvgs = [
+            fvg for fvg in self.fvgs
+            if fvg.index < index and (fvg.filled_index is None or fvg.filled_index > index)
+        ]
+        return obs, fvgs
+
+
+@dataclass(frozen=True)
+class SMCConfig:
+    """Parameter engine yang sebelumnya hard-coded di masing-masing fungsi."""
+    swing_left: int = 2       # jumlah candle kiri untuk konfirmasi swing
+    swing_right: int = 2      # jumlah candle kanan untuk konfirmasi swing
+    fvg_lookback: int = 15    # jumlah candle terakhir yang dicek untuk FVG
+    ob_window: int = 20       # jumlah candle terakhir yang dicek untuk OB
+    min_candles: int = 10     # minimal candle sebelum analisa dijalankan
+
+
+DEFAULT_CONFIG = SMCConfig()
+
+
+@dataclass
+class TradeSetup:
+    bias: str        # "BUY" / "SELL"
+    setup: str       # "BUY LIMIT" / "SELL LIMIT"
+    entry: float
+    tp1: float
+    tp2: float
+    sl: float
 
 
 @dataclass
@@ -75,6 +386,7 @@ class SMCResult:
     active_fvg: Optional[FVG] = None
     liquidity_sweep: Optional[str] = None  # "buy_side" / "sell_side" / None
     last_close: Optional[float] = None
+    timeframes: dict = field(default_factory=dict)  # interval -> bias (analisa multi timeframe)
 
 
 # ================= SWING DETECTION =================
@@ -84,24 +396,65 @@ def find_swings(candles: list[Candle], left: int = 2, right: int = 2) -> list[Sw
     Deteksi swing high/low sederhana: titik dianggap swing high jika
     high-nya lebih tinggi dari `left` candle sebelum dan `right` candle
     sesudahnya (begitu juga sebaliknya untuk swing low).
+
+    Harus lebih tinggi secara strict: kalau ada high yang sama persis di
+    dalam window, candle itu bukan swing. Max/min window kiri & kanan
+    dihitung dengan sliding window (monotonic deque) -> O(n) total,
+    tidak tergantung besar `left` / `right`.
     """
     swings = []
-    n = len(candles)
+    _, highs, lows, _ = _columns(candles)
+    n = len(highs)
+
+    if n - right <= left:
+        return swings
+
+    left_max = _sliding_extreme(highs, left, is_max=True)
+    right_max = _sliding_extreme(highs, right, is_max=True)
+    left_min = _sliding_extreme(lows, left, is_max=False)
+    right_min = _sliding_extreme(lows, right, is_max=False)
 
     for i in range(left, n - right):
-        window_high = [candles[j].high for j in range(i - left, i + right + 1)]
-        window_low = [candles[j].low for j in range(i - left, i + right + 1)]
+        high = highs[i]
+        low = lows[i]
 
-        if candles[i].high == max(window_high) and window_high.count(candles[i].high) == 1:
-            swings.append(SwingPoint(index=i, price=candles[i].high, kind="high"))
+        # window kosong (left/right = 0) -> tidak ada batasan dari sisi itu
+        if (not left or high > left_max[i - left]) and (not right or high > right_max[i + 1]):
+            swings.append(SwingPoint(index=i, price=high, kind="high"))
 
-        if candles[i].low == min(window_low) and window_low.count(candles[i].low) == 1:
-            swings.append(SwingPoint(index=i, price=candles[i].low, kind="low"))
+        if (not left or low < left_min[i - left]) and (not right or low < right_min[i + 1]):
+            swings.append(SwingPoint(index=i, price=low, kind="low"))
 
-    swings.sort(key=lambda s: s.index)
     return swings
 
 
+def _sliding_extreme(values, width: int, is_max: bool) -> list:
+    """
+    out[k] = max(values[k:k + width]) (atau min) untuk k = 0 .. n - width.
+    Monotonic deque: tiap index masuk & keluar deque paling banyak sekali.
+    """
+    out = []
+    if width <= 0:
+        return out
+
+    window = deque()
+    for i, value in enumerate(values):
+        if is_max:
+            while window and values[window[-1]] <= value:
+                window.pop()
+        else:
+            while window and values[window[-1]] >= value:
+                window.pop()
+        window.append(i)
+
+        if window[0] <= i - width:
+            window.popleft()
+        if i >= width - 1:
+            out.append(values[window[0]])
+
+    return out
+
+
 # ================= STRUCTURE (BOS / CHoCH) =================
 
 def detect_structure(candles: list[Candle], swings: list[SwingPoint]) -> tuple[str, list[str]]:
@@ -112,20 +465,28 @@ def detect_structure(candles: list[Candle], swings: list[SwingPoint]) -> tuple[s
     - CHOCH_UP : trend turun lalu tiba-tiba break swing high terakhir (reversal naik)
     - CHOCH_DOWN: trend naik lalu tiba-tiba break swing low terakhir (reversal turun)
     """
-    reasons = []
-
     highs = [s for s in swings if s.kind == "high"]
     lows = [s for s in swings if s.kind == "low"]
 
     if len(highs) < 2 or len(lows) < 2:
         return "UNDEFINED", ["Data swing belum cukup untuk menentukan struktur"]
 
-    last_close = candles[-1].close
+    return _classify_structure(candles[-1].close, highs[-2], highs[-1], lows[-2], lows[-1])
 
-    last_high = highs[-1]
-    prev_high = highs[-2]
-    last_low = lows[-1]
-    prev_low = lows[-2]
+
+def _classify_structure(
+    last_close: float,
+    prev_high: SwingPoint,
+    last_high: SwingPoint,
+    prev_low: SwingPoint,
+    last_low: SwingPoint,
+) -> tuple[str, list[str]]:
+    """
+    Inti keputusan BOS/CHoCH dari 2 swing high & 2 swing low terakhir.
+    Dipisah dari `detect_structure` supaya bisa dipakai ulang oleh
+    `IncrementalSMCEngine` tanpa memfilter ulang seluruh list swing.
+    """
+    reasons = []
 
     higher_high = last_high.price > prev_high.price
     higher_low = last_low.price > prev_low.price
@@ -176,7 +537,7 @@ def detect_structure(candles: list[Candle], swings: list[SwingPoint]) -> tuple[s
 
 # ================= ORDER BLOCK =================
 
-def find_order_blocks(candles: list[Candle], structure: str) -> Optional[OrderBlock]:
+def find_order_blocks(candles: list[Candle], structure: str, window: int = 20) -> Optional[OrderBlock]:
     """
     Order block sederhana: candle terakhir berlawanan arah (down candle untuk
     bullish OB, up candle untuk bearish OB) sebelum pergerakan impulsif yang
@@ -185,26 +546,28 @@ def find_order_blocks(candles: list[Candle], structure: str) -> Optional[OrderBl
     """
     if structure in ("BOS_UP", "CHOCH_UP"):
         # cari candle bearish terakhir sebelum leg naik
-        for i in range(len(candles) - 2, max(len(candles) - 20, 0), -1):
+        for i in range(len(candles) - 2, max(len(candles) - window, 0), -1):
             c = candles[i]
             if c.bearish:
                 ob = OrderBlock(index=i, kind="bullish", top=c.high, bottom=c.low)
                 # cek mitigasi: apakah candle setelahnya sudah menutup di bawah bottom OB
-                for later in candles[i + 1:]:
+                for j, later in enumerate(candles[i + 1:], start=i + 1):
                     if later.close < ob.bottom:
                         ob.mitigated = True
+                        ob.mitigated_index = j
                         break
                 return ob
 
     if structure in ("BOS_DOWN", "CHOCH_DOWN"):
         # cari candle bullish terakhir sebelum leg turun
-        for i in range(len(candles) - 2, max(len(candles) - 20, 0), -1):
+        for i in range(len(candles) - 2, max(len(candles) - window, 0), -1):
             c = candles[i]
             if c.bullish:
                 ob = OrderBlock(index=i, kind="bearish", top=c.high, bottom=c.low)
-                for later in candles[i + 1:]:
+                for j, later in enumerate(candles[i + 1:], start=i + 1):
                     if later.close > ob.top:
                         ob.mitigated = True
+                        ob.mitigated_index = j
                         break
                 return ob
 
@@ -244,6 +607,138 @@ def find_fair_value_gaps(candles: list[Candle], lookback: int = 15) -> Optional[
     return last_fvg
 
 
+# ================= ZONE SCAN (BATCH) =================
+
+def scan_zones(candles) -> ZoneScan:
+    """
+    Scan SELURUH series (bukan cuma 15-20 candle terakhir) untuk semua OB
+    dan FVG, lengkap dengan index candle yang memitigasi / mengisinya.
+    Dipakai untuk overlay chart & backtest.
+
+    Aturan zona sama dengan `find_order_blocks` / `find_fair_value_gaps`:
+    - Bullish OB : candle bearish terakhir sebelum candle non-bearish,
+                   termitigasi saat ada close < bottom.
+    - Bearish OB : candle bullish terakhir sebelum candle non-bullish,
+                   termitigasi saat ada close > top.
+    - FVG        : gap 3-candle, terisi saat low <= bottom (bullish)
+                   atau high >= top (bearish), mulai candle i+2.
+
+    Pencarian "candle pertama setelah i yang menembus level X" memakai
+    segment tree min/max, jadi total O(n log n), bukan O(n^2) rescan.
+    """
+    opens, highs, lows, closes = _columns(candles)
+    n = len(closes)
+    scan = ZoneScan()
+
+    if n < 2:
+        return scan
+
+    low_index = _BreachIndex(lows)
+    high_index = _BreachIndex(highs, negate=True)
+    close_min_index = _BreachIndex(closes)
+    close_max_index = _BreachIndex(closes, negate=True)
+
+    for i in range(n - 1):
+        bearish = closes[i] < opens[i]
+        bullish = closes[i] > opens[i]
+        next_bearish = closes[i + 1] < opens[i + 1]
+        next_bullish = closes[i + 1] > opens[i + 1]
+
+        if bearish and not next_bearish:
+            ob = OrderBlock(index=i, kind="bullish", top=highs[i], bottom=lows[i])
+            ob.mitigated_index = close_min_index.first_below(i + 1, ob.bottom, strict=True)
+            ob.mitigated = ob.mitigated_index is not None
+            scan.order_blocks.append(ob)
+
+        if bullish and not next_bullish:
+            ob = OrderBlock(index=i, kind="bearish", top=highs[i], bottom=lows[i])
+            ob.mitigated_index = close_max_index.first_above(i + 1, ob.top, strict=True)
+            ob.mitigated = ob.mitigated_index is not None
+            scan.order_blocks.append(ob)
+
+    for i in range(1, n - 1):
+        c0_high, c0_low = highs[i - 1], lows[i - 1]
+        c2_high, c2_low = highs[i + 1], lows[i + 1]
+
+        if c2_low > c0_high:
+            fvg = FVG(index=i, kind="bullish", top=c2_low, bottom=c0_high)
+            fvg.filled_index = low_index.first_below(i + 2, fvg.bottom)
+            fvg.filled = fvg.filled_index is not None
+            scan.fvgs.append(fvg)
+
+        if c2_high < c0_low:
+            fvg = FVG(index=i, kind="bearish", top=c0_low, bottom=c2_high)
+            fvg.filled_index = high_index.first_above(i + 2, fvg.top)
+            fvg.filled = fvg.filled_index is not None
+            scan.fvgs.append(fvg)
+
+    return scan
+
+
+class _BreachIndex:
+    """
+    Segment tree min (array-backed) untuk query "index pertama >= start
+    yang nilainya <= X". Dengan `negate=True` nilai disimpan negatif
+    sehingga query yang sama menjawab "index pertama yang nilainya >= X".
+    """
+
+    def __init__(self, values, negate: bool = False):
+        n = len(values)
+        size = 1
+        while size < n:
+            size <<= 1
+
+        tree = array("d", [float("inf")]) * (2 * size)
+        if negate:
+            tree[size:size + n] = array("d", (-v for v in values))
+        else:
+            tree[size:size + n] = array("d", values)
+        for i in range(size - 1, 0, -1):
+            left, right = tree[2 * i], tree[2 * i + 1]
+            tree[i] = left if left < right else right
+
+        self._n = n
+        self._size = size
+        self._tree = tree
+        self._negate = negate
+
+    def first_below(self, start: int, x: float, strict: bool = False) -> Optional[int]:
+        """Index pertama >= start dengan nilai < x (strict) atau <= x."""
+        if self._negate:
+            raise TypeError("Index ini dibuat dengan negate=True, pakai first_above()")
+        return self._first(start, x, strict)
+
+    def first_above(self, start: int, x: float, strict: bool = False) -> Optional[int]:
+        """Index pertama >= start dengan nilai > x (strict) atau >= x."""
+        if not self._negate:
+            raise TypeError("Index ini dibuat tanpa negate, pakai first_below()")
+        return self._first(start, -x, strict)
+
+    def _first(self, start: int, x: float, strict: bool) -> Optional[int]:
+        if start >= self._n:
+            return None
+
+        tree = self._tree
+        size = self._size
+
+        # naik: cari node paling kiri (>= start) yang subtree-nya memuat nilai <= x
+        i = start + size
+        while not (tree[i] < x if strict else tree[i] <= x):
+            while i & 1:
+                i >>= 1
+            if i == 0:
+                return None
+            i += 1
+
+        # turun: ambil anak kiri kalau memenuhi, kalau tidak anak kanan
+        while i < size:
+            i <<= 1
+            if not (tree[i] < x if strict else tree[i] <= x):
+                i += 1
+
+        return i - size
+
+
 # ================= LIQUIDITY SWEEP =================
 
 def detect_liquidity_sweep(candles: list[Candle], swings: list[SwingPoint]) -> Optional[str]:
@@ -255,58 +750,123 @@ def detect_liquidity_sweep(candles: list[Candle], swings: list[SwingPoint]) -> O
     if not swings or len(candles) < 3:
         return None
 
-    last = candles[-1]
-    recent_highs = [s for s in swings if s.kind == "high" and s.index < len(candles) - 1]
-    recent_lows = [s for s in swings if s.kind == "low" and s.index < len(candles) - 1]
-
-    if recent_highs:
-        ref_high = recent_highs[-1].price
-        if last.high > ref_high and last.close < ref_high:
+    last_index = len(candles) - 1
+    recent_highs = [s for s in swings if s.kind == "high" and s.index < last_index]
+    recent_lows = [s for s in swings if s.kind == "low" and s.index < last_index]
+
+    return _classify_sweep(
+        candles[-1],
+        recent_highs[-1] if recent_highs else None,
+        recent_lows[-1] if recent_lows else None,
+    )
+
+
+def _classify_sweep(
+    last: Candle,
+    ref_high: Optional[SwingPoint],
+    ref_low: Optional[SwingPoint],
+) -> Optional[str]:
+    """Cek sweep candle terakhir terhadap swing high/low referensi terakhir."""
+    if ref_high is not None:
+        if last.high > ref_high.price and last.close < ref_high.price:
             return "sell_side"  # sweep liquidity di atas, lalu reject turun
 
-    if recent_lows:
-        ref_low = recent_lows[-1].price
-        if last.low < ref_low and last.close > ref_low:
+    if ref_low is not None:
+        if last.low < ref_low.price and last.close > ref_low.price:
             return "buy_side"  # sweep liquidity di bawah, lalu reject naik
 
     return None
 
 
+# ================= INSTRUMENTATION =================
+
+# Observer durasi per tahap `analyze()`: `observer(stage, seconds)`.
+# None (default) = tanpa timing sama sekali, jadi backtest tidak kena overhead.
+_stage_observer = None
+
+
+def set_stage_observer(observer):
+    global _stage_observer
+    _stage_observer = observer
+
+
+def _lap(observer, stage: str, started: float) -> float:
+    now = perf_counter()
+    observer(stage, now - started)
+    return now
+
+
 # ================= MAIN ENTRY POINT =================
 
-def analyze(candles: list[Candle]) -> SMCResult:
+def analyze(candles: list[Candle], config: SMCConfig = DEFAULT_CONFIG) -> SMCResult:
     """
     Jalankan seluruh pipeline SMC dan hasilkan kesimpulan bias + alasan.
     `candles` harus urut dari paling lama -> paling baru.
     """
     result = SMCResult()
 
-    if len(candles) < 10:
-        result.reasons.append("Data candle tidak cukup (minimal 10 candle)")
+    if len(candles) < config.min_candles:
+        result.reasons.append(f"Data candle tidak cukup (minimal {config.min_candles} candle)")
         return result
 
     result.last_close = candles[-1].close
 
-    swings = find_swings(candles)
+    observer = _stage_observer
+    if observer is not None:
+        started = perf_counter()
+
+    swings = find_swings(candles, config.swing_left, config.swing_right)
+    if observer is not None:
+        started = _lap(observer, "swings", started)
+
     structure, structure_reasons = detect_structure(candles, swings)
+    if observer is not None:
+        started = _lap(observer, "structure", started)
+
+    sweep = detect_liquidity_sweep(candles, swings)
+    if observer is not None:
+        _lap(observer, "sweep", started)
+
+    return _finalize_result(result, candles, structure, structure_reasons, sweep, config)
+
+
+def _finalize_result(
+    result: SMCResult,
+    candles: list[Candle],
+    structure: str,
+    structure_reasons: list[str],
+    sweep: Optional[str],
+    config: SMCConfig,
+) -> SMCResult:
+    """
+    Tahap akhir pipeline (sweep, OB, FVG, bias). OB & FVG hanya melihat
+    ~20 candle terakhir, jadi tahap ini murah walau history panjang.
+    """
     result.structure = structure
     result.reasons.extend(structure_reasons)
 
-    sweep = detect_liquidity_sweep(candles, swings)
     result.liquidity_sweep = sweep
     if sweep == "buy_side":
         result.reasons.append("Liquidity sweep terdeteksi di bawah swing low (potensi reversal naik)")
     elif sweep == "sell_side":
         result.reasons.append("Liquidity sweep terdeteksi di atas swing high (potensi reversal turun)")
 
-    ob = find_order_blocks(candles, structure)
+    observer = _stage_observer
+    if observer is not None:
+        started = perf_counter()
+
+    ob = find_order_blocks(candles, structure, config.ob_window)
+    if observer is not None:
+        started = _lap(observer, "order_block", started)
     if ob and not ob.mitigated:
         result.active_ob = ob
         result.reasons.append(
             f"Order block {ob.kind} aktif di area {ob.bottom:.2f} - {ob.top:.2f}"
         )
 
-    fvg = find_fair_value_gaps(candles)
+    fvg = find_fair_value_gaps(candles, config.fvg_lookback)
+    if observer is not None:
+        _lap(observer, "fvg", started)
     if fvg:
         result.active_fvg = fvg
         result.reasons.append(
@@ -327,3 +887,215 @@ def analyze(candles: list[Candle]) -> SMCResult:
         result.reasons.append("Tidak ada bias jelas -> sinyal ditahan (no trade)")
 
     return result
+
+
+# ================= TRADE SETUP =================
+
+# SL/TP fixed (pips), sesuai permintaan: TP1 +7, TP2 +15, SL -5
+TP1_POINTS = 7
+TP2_POINTS = 15
+SL_POINTS = 5
+
+
+def build_trade_setup(result: SMCResult) -> Optional[TradeSetup]:
+    """
+    Level entry/TP/SL dari hasil `analyze()`. Dipakai bot (pesan sinyal)
+    dan backtest supaya aturannya selalu sama. None kalau tidak ada bias.
+    """
+    if result.bias is None or result.last_close is None:
+        return None
+
+    entry = result.last_close
+
+    if result.bias == "BUY":
+        return TradeSetup(
+            bias="BUY",
+            setup="BUY LIMIT",
+            entry=entry,
+            tp1=entry + TP1_POINTS,
+            tp2=entry + TP2_POINTS,
+            sl=entry - SL_POINTS,
+        )
+
+    return TradeSetup(
+        bias="SELL",
+        setup="SELL LIMIT",
+        entry=entry,
+        tp1=entry - TP1_POINTS,
+        tp2=entry - TP2_POINTS,
+        sl=entry + SL_POINTS,
+    )
+
+
+# ================= INCREMENTAL ENGINE =================
+
+class IncrementalSMCEngine:
+    """
+    Versi stateful dari `analyze()` untuk data streaming.
+
+    Setiap `push(candle)` hanya mengonfirmasi (paling banyak) satu swing
+    baru, yaitu candle di posisi `right` bar sebelum candle terbaru, jadi
+    biayanya O(left + right) per bar, bukan O(n) seperti `find_swings()`.
+    `update_last(candle)` dipakai untuk candle terakhir yang masih berjalan
+    (belum close): swing yang bergantung pada candle itu dihitung ulang.
+
+    `result()` menghasilkan `SMCResult` yang sama persis dengan
+    `analyze(candles)` untuk history yang sama, dan `result(window=N)`
+    sama dengan `analyze(candles[-N:])` (seperti bot yang hanya mengambil
+    N candle terakhir dari API).
+    """
+
+    def __init__(self, config: SMCConfig = DEFAULT_CONFIG):
+        self.config = config
+        self.left = config.swing_left
+        self.right = config.swing_right
+        self._candles = CandleSeries()
+        self._highs: list[SwingPoint] = []
+        self._lows: list[SwingPoint] = []
+
+    def __len__(self):
+        return len(self._candles)
+
+    @property
+    def candles(self) -> CandleSeries:
+        return self._candles
+
+    @property
+    def swings(self) -> list[SwingPoint]:
+        """Semua swing terkonfirmasi, urut index (format sama dengan `find_swings`)."""
+        swings = self._highs + self._lows
+        swings.sort(key=lambda s: (s.index, s.kind != "high"))
+        return swings
+
+    def push(self, candle: Candle):
+        """Tambahkan candle baru yang sudah close."""
+        self.push_bar(parse_time(candle.time), candle.open, candle.high, candle.low, candle.close)
+
+    def push_bar(self, time: int, open: float, high: float, low: float, close: float):
+        """Sama dengan `push()` tapi langsung dari nilai kolom (tanpa objek Candle)."""
+        self._candles.append(time, open, high, low, close)
+        self._confirm(len(self._candles) - 1 - self.right)
+
+    def extend(self, candles):
+        for candle in candles:
+            self.push(candle)
+
+    def update_last(self, candle: Candle):
+        """Ganti candle terakhir (candle yang masih forming) dengan versi terbarunya."""
+        self.update_last_bar(parse_time(candle.time), candle.open, candle.high, candle.low, candle.close)
+
+    def update_last_bar(self, time: int, open: float, high: float, low: float, close: float):
+        if not self._candles:
+            self.push_bar(time, open, high, low, close)
+            return
+
+        self._candles.set_last(time, open, high, low, close)
+
+        # Satu-satunya swing terkonfirmasi yang window-nya memuat candle
+        # terakhir adalah swing di index n-1-right.
+        index = len(self._candles) - 1 - self.right
+        while self._highs and self._highs[-1].index >= index:
+            self._highs.pop()
+        while self._lows and self._lows[-1].index >= index:
+            self._lows.pop()
+        self._confirm(index)
+
+    def _confirm(self, i: int):
+        if i < self.left or i < 0:
+            return
+
+        highs = self._candles._high
+        lows = self._candles._low
+        high = highs[i]
+        low = lows[i]
+        is_high = True
+        is_low = True
+        for j in range(i - self.left, i + self.right + 1):
+            if j == i:
+                continue
+            if highs[j] >= high:
+                is_high = False
+            if lows[j] <= low:
+                is_low = False
+            if not is_high and not is_low:
+                return
+
+        if is_high:
+            self._highs.append(SwingPoint(index=i, price=high, kind="high"))
+        if is_low:
+            self._lows.append(SwingPoint(index=i, price=low, kind="low"))
+
+    def result(self, window: Optional[int] = None) -> SMCResult:
+        """
+        Hitung `SMCResult` untuk history saat ini. Dengan `window`, hanya
+        `window` candle terakhir yang dianggap ada (index OB/FVG relatif
+        terhadap window, sama seperti `analyze(candles[-window:])`).
+        """
+        n = len(self._candles)
+        start = 0 if window is None else max(n - window, 0)
+        candles = self._candles[start:] if start else self._candles
+        result = SMCResult()
+
+        if len(candles) < self.config.min_candles:
+            result.reasons.append(f"Data candle tidak cukup (minimal {self.config.min_candles} candle)")
+            return result
+
+        result.last_close = self._candles._close[-1]
+
+        # Swing di dalam window = swing full-history yang seluruh window
+        # left/right-nya masih di dalam window (index >= start + left).
+        min_index = start + self.left
+        last_high = _last_before(self._highs, n, min_index)
+        last_low = _last_before(self._lows, n, min_index)
+        prev_high = last_high and _last_before(self._highs, last_high.index, min_index)
+        prev_low = last_low and _last_before(self._lows, last_low.index, min_index)
+
+        if prev_high is None or prev_low is None:
+            structure = "UNDEFINED"
+            structure_reasons = ["Data swing belum cukup untuk menentukan struktur"]
+        else:
+            structure, structure_reasons = _classify_structure(
+                result.last_close, prev_high, last_high, prev_low, last_low
+            )
+
+        sweep = None
+        if last_high is not None or last_low is not None:
+            sweep = _classify_sweep(
+                candles[-1],
+                _last_before(self._highs, n - 1, min_index),
+                _last_before(self._lows, n - 1, min_index),
+            )
+
+        return _finalize_result(result, candles, structure, structure_reasons, sweep, self.config)
+
+    def sweep(self, window: Optional[int] = None) -> Optional[str]:
+        """
+        Hanya liquidity sweep candle terakhir (sama dengan `result(window).sweep`)
+        tanpa menghitung zona. Murah untuk dicek di setiap tick saat candle
+        terakhir masih forming.
+        """
+        n = len(self._candles)
+        start = 0 if window is None else max(n - window, 0)
+        if n - start < self.config.min_candles:
+            return None
+
+        min_index = start + self.left
+        return _classify_sweep(
+            self._candles[-1],
+            _last_before(self._highs, n - 1, min_index),
+            _last_before(self._lows, n - 1, min_index),
+        )
+
+
+def _last_before(swings: list[SwingPoint], index: int, min_index: int = 0) -> Optional[SwingPoint]:
+    """
+    Swing terakhir dengan min_index <= index swing < `index` (scan dari
+    belakang, biasanya cuma 1-2 langkah).
+    """
+    for s in reversed(swings):
+        if s.index < min_index:
+            return None
+        if s.index < index:
+            return s
+    return None
+
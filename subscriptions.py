@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Subscriptions
+=============
+Registry chat (+ thread forum) yang berlangganan sinyal per symbol /
+interval, disimpan di SQLite lokal supaya tahan restart.
+
+Semua subscription juga di-index di memori per (symbol, interval), jadi
+saat candle close cukup satu lookup dict untuk tahu chat mana yang perlu
+dikirimi, tanpa query / scan semua subscriber. `ANY` ("*") di symbol atau
+interval = semua.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger("XAU-BOT.subscriptions")
+
+ANY = "*"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    chat_id    INTEGER NOT NULL,
+    thread_id  INTEGER NOT NULL DEFAULT 0,
+    symbol     TEXT    NOT NULL,
+    interval   TEXT    NOT NULL,
+    created_at REAL    NOT NULL,
+    PRIMARY KEY (chat_id, thread_id, symbol, interval)
+)
+"""
+
+
+@dataclass(frozen=True)
+class Subscription:
+    chat_id: int
+    thread_id: int  # 0 = tanpa thread
+    symbol: str
+    interval: str
+
+    @property
+    def target(self) -> tuple:
+        return self.chat_id, self.thread_id
+
+
+class SubscriptionStore:
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            if path != ":memory:":
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(_SCHEMA)
+
+        self._index: dict = {}  # (symbol, interval) -> set[(chat_id, thread_id)]
+        for row in self._db.execute("SELECT chat_id, thread_id, symbol, interval FROM subscriptions"):
+            self._add(Subscription(*row))
+
+        logger.info(f"SUBSCRIPTIONS LOADED: {len(self)} dari {path}")
+
+    def __len__(self):
+        return sum(len(targets) for targets in self._index.values())
+
+    def _add(self, sub: Subscription):
+        self._index.setdefault((sub.symbol, sub.interval), set()).add(sub.target)
+
+    def _discard(self, sub: Subscription):
+        targets = self._index.get((sub.symbol, sub.interval))
+        if targets is not None:
+            targets.discard(sub.target)
+            if not targets:
+                del self._index[(sub.symbol, sub.interval)]
+
+    def subscribe(self, chat_id: int, symbol: str = ANY, interval: str = ANY, thread_id: Optional[int] = None) -> bool:
+        """Tambah subscription. Return False kalau sudah ada."""
+        sub = Subscription(chat_id, thread_id or 0, symbol, interval)
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO subscriptions VALUES (?, ?, ?, ?, ?)",
+                (sub.chat_id, sub.thread_id, sub.symbol, sub.interval, time.time()),
+            )
+        if not cursor.rowcount:
+            return False
+        self._add(sub)
+        return True
+
+    def unsubscribe(
+        self, chat_id: int, symbol: Optional[str] = None, interval: Optional[str] = None, thread_id: Optional[int] = None
+    ) -> int:
+        """
+        Hapus subscription chat (+ thread). `symbol` / `interval` None = semua.
+        `thread_id` None = semua thread di chat itu. Return jumlah yang dihapus.
+        """
+        subs = [
+            sub for sub in self.for_chat(chat_id, thread_id)
+            if (symbol is None or sub.symbol == symbol) and (interval is None or sub.interval == interval)
+        ]
+        if not subs:
+            return 0
+
+        with self._lock, self._db:
+            self._db.executemany(
+                "DELETE FROM subscriptions WHERE chat_id = ? AND thread_id = ? AND symbol = ? AND interval = ?",
+                [(sub.chat_id, sub.thread_id, sub.symbol, sub.interval) for sub in subs],
+            )
+        for sub in subs:
+            self._discard(sub)
+        return len(subs)
+
+    def for_chat(self, chat_id: int, thread_id: Optional[int] = None) -> list[Subscription]:
+        """Subscription milik satu chat (dan thread, kalau diisi), urut symbol / interval."""
+        subs = [
+            Subscription(chat, thread, symbol, interval)
+            for (symbol, interval), targets in self._index.items()
+            for chat, thread in targets
+            if chat == chat_id and (thread_id is None or thread == (thread_id or 0))
+        ]
+        return sorted(subs, key=lambda sub: (sub.thread_id, sub.symbol, sub.interval))
+
+    def subscribers(self, symbol: str, interval: str) -> set:
+        """Semua (chat_id, thread_id) yang perlu menerima sinyal `symbol` `interval`."""
+        index = self._index
+        targets = set()
+        for key in ((symbol, interval), (symbol, ANY), (ANY, interval), (ANY, ANY)):
+            found = index.get(key)
+            if found:
+                targets |= found
+        return targets
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Parameter Sweep
+===============
+Jalankan backtest untuk banyak kombinasi `SMCConfig` sekaligus di atas
+`ProcessPoolExecutor`. History candle ditulis SEKALI ke file sementara
+lalu di-mmap read-only oleh setiap worker (tidak di-pickle per job),
+jadi memori tidak bertambah per worker dan skalanya hampir linear
+terhadap jumlah core.
+
+Contoh:
+    python sweep.py data/xauusd_1h.csv --swing-left 1,2,3 --swing-right 1,2,3 \\
+        --ob-window 10,20,30 --out sweep_results.csv
+"""
+
+import argparse
+import csv
+import itertools
+import logging
+import mmap
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, fields
+
+from backtest import run_backtest, detect_interval
+from ingest import load_candles
+from smc_engine import CandleSeries, SMCConfig, interval_seconds
+
+logger = logging.getLogger("XAU-BOT.sweep")
+
+# State per worker (diisi oleh initializer)
+_worker_series = None
+_worker_mmap = None
+_worker_options = None
+
+
+# ================= SHARED CANDLE FILE =================
+
+def write_shared_candles(series: CandleSeries, path: str):
+    """Tulis kolom series ke file biner: times (int64) lalu open/high/low/close (float64)."""
+    with open(path, "wb") as f:
+        for col in (series.times, series.opens, series.highs, series.lows, series.closes):
+            f.write(col.tobytes())
+
+
+def attach_shared_candles(path: str, count: int):
+    """mmap file dari `write_shared_candles` dan bungkus jadi CandleSeries tanpa copy."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    buf = memoryview(mm)
+    step = count * 8
+    columns = [buf[k * step:(k + 1) * step] for k in range(5)]
+    series = CandleSeries.from_buffers(
+        columns[0].cast("q"),
+        columns[1].cast("d"),
+        columns[2].cast("d"),
+        columns[3].cast("d"),
+        columns[4].cast("d"),
+    )
+    return series, mm
+
+
+# ================= WORKER =================
+
+def _init_worker(path: str, count: int, options: dict):
+    global _worker_series, _worker_mmap, _worker_options
+    _worker_series, _worker_mmap = attach_shared_candles(path, count)
+    _worker_options = options
+
+
+def _run_config(params: dict) -> dict:
+    config = SMCConfig(**params)
+    started = time.perf_counter()
+    report = run_backtest(
+        _worker_series,
+        window=_worker_options["window"],
+        interval=_worker_options["interval"],
+        config=config,
+        cadence=_worker_options["cadence"],
+    )
+    return {
+        **params,
+        "trades": len(report.trades),
+        "win_rate": round(report.win_rate, 4),
+        "expectancy": round(report.expectancy, 4),
+        "total_pnl": round(report.total_pnl, 2),
+        "max_drawdown": round(report.max_drawdown, 2),
+        "trades_per_hour": round(report.trades_per_hour, 4),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+# ================= SWEEP =================
+
+def build_grid(**values) -> list[dict]:
+    """
+    Kombinasi semua nilai parameter. Key = nama field `SMCConfig`,
+    value = list nilai; field yang tidak disebut memakai default.
+    """
+    names = [f.name for f in fields(SMCConfig)]
+    unknown = set(values) - set(names)
+    if unknown:
+        raise ValueError(f"Parameter tidak dikenal: {', '.join(sorted(unknown))}")
+
+    defaults = asdict(SMCConfig())
+    axes = [values.get(name) or [defaults[name]] for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*axes)]
+
+
+def run_sweep(
+    series: CandleSeries,
+    grid: list[dict],
+    window: int = 60,
+    interval: int = None,
+    workers: int = None,
+    cadence: int = None,
+) -> list[dict]:
+    """Jalankan `run_backtest` untuk setiap kombinasi di `grid`, paralel per proses."""
+    if interval is None:
+        interval = detect_interval(series)
+
+    options = {"window": window, "interval": interval, "cadence": cadence}
+    fd, path = tempfile.mkstemp(prefix="smc_sweep_", suffix=".bin")
+    os.close(fd)
+
+    try:
+        write_shared_candles(series, path)
+
+        rows = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(path, len(series), options),
+        ) as pool:
+            futures = [pool.submit(_run_config, params) for params in grid]
+            for done, future in enumerate(as_completed(futures), start=1):
+                row = future.result()
+                rows.append(row)
+                logger.info(f"SWEEP {done}/{len(grid)}: {row}")
+
+        rows.sort(key=lambda r: r["expectancy"], reverse=True)
+        return rows
+    finally:
+        os.unlink(path)
+
+
+def write_results(rows: list[dict], path: str):
+    if not rows:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# ================= CLI =================
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep SMCConfig di atas backtest")
+    parser.add_argument("path", help="File candle CSV / Parquet")
+    parser.add_argument("--swing-left", type=_int_list)
+    parser.add_argument("--swing-right", type=_int_list)
+    parser.add_argument("--fvg-lookback", type=_int_list)
+    parser.add_argument("--ob-window", type=_int_list)
+    parser.add_argument("--min-candles", type=_int_list)
+    parser.add_argument("--window", type=int, default=int(os.getenv("SMC_CANDLE_COUNT", "60")))
+    parser.add_argument("--interval", default=None, help="Interval candle, mis. 15min / 1h (default: auto)")
+    parser.add_argument("--cadence", default=None, help="Jarak evaluasi sinyal, mis. 1h (default: setiap close candle)")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses (default: jumlah core)")
+    parser.add_argument("--out", default="sweep_results.csv")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    series = load_candles(args.path)
+    grid = build_grid(
+        swing_left=args.swing_left,
+        swing_right=args.swing_right,
+        fvg_lookback=args.fvg_lookback,
+        ob_window=args.ob_window,
+        min_candles=args.min_candles,
+    )
+
+    logger.info(f"SWEEP: {len(grid)} kombinasi x {len(series)} bars")
+    rows = run_sweep(
+        series,
+        grid,
+        window=args.window or None,
+        interval=interval_seconds(args.interval) if args.interval else None,
+        workers=args.workers,
+        cadence=interval_seconds(args.cadence) if args.cadence else None,
+    )
+    write_results(rows, args.out)
+
+    logger.info(f"SWEEP SELESAI: hasil ditulis ke {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Telegram Send Queue
+===================
+Antrian pesan keluar supaya scheduler / alert tidak pernah menunggu
+(atau mati karena) Telegram:
+- `enqueue()` langsung return, pengiriman dikerjakan worker per chat,
+- limit Telegram dihormati: jarak minimal antar pesan per chat dan
+  limit global (default 30 pesan / detik untuk semua chat),
+- RetryAfter (flood wait) -> tunggu sesuai permintaan Telegram lalu
+  retry; error jaringan -> retry dengan exponential backoff,
+- pesan ke chat + thread yang sama yang masuk dalam `coalesce` detik
+  digabung jadi satu pesan (maks 4096 karakter),
+- jumlah request yang sedang berjalan dibatasi `max_inflight`, jadi
+  fan-out ke ribuan chat tetap terkendali.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Optional
+
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
+
+from metrics import REGISTRY
+
+logger = logging.getLogger("XAU-BOT.telegram")
+
+SEND_SECONDS = REGISTRY.histogram("telegram_send_seconds", "Latency satu request sendMessage", ("status",))
+QUEUE_DELAY_SECONDS = REGISTRY.histogram(
+    "telegram_queue_delay_seconds", "Waktu pesan dari masuk antrian sampai terkirim"
+)
+
+QUEUE_DEPTH = REGISTRY.gauge("telegram_queue_depth", "Jumlah pesan yang menunggu di antrian kirim")
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+@dataclass
+class OutboundMessage:
+    chat_id: int
+    thread_id: Optional[int]
+    text: str
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class SendQueue:
+
+    def __init__(
+        self,
+        send_message,
+        chat_interval: float = 1.0,
+        global_rate: float = 30.0,
+        coalesce: float = 1.0,
+        retries: int = 5,
+        backoff: float = 1.0,
+        max_inflight: int = 16,
+        on_error=None,
+        clock=time.monotonic,
+    ):
+        """
+        `send_message` = coroutine function `(chat_id, thread_id, text)`.
+        `chat_interval` = jarak minimal antar pesan ke chat yang sama (detik).
+        `global_rate` = maksimal pesan per detik untuk semua chat.
+        `max_inflight` = maksimal request sendMessage yang berjalan bersamaan.
+        `on_error(message, exc)` dipanggil untuk pesan yang gagal permanen
+        (mis. bot dikeluarkan dari chat).
+        `clock` harus sejalan dengan `asyncio.sleep()` (jam event loop).
+        """
+        self._send_message = send_message
+        self._clock = clock
+        self.chat_interval = chat_interval
+        self.global_interval = 1 / global_rate
+        self.coalesce = coalesce
+        self.retries = retries
+        self.backoff = backoff
+        self._on_error = on_error
+        self._inflight = asyncio.Semaphore(max_inflight)
+
+        self._queues: dict = {}  # chat_id -> deque[OutboundMessage]
+        self._workers: dict = {}  # chat_id -> Task
+        self._chat_next: dict = {}  # chat_id -> waktu kirim berikutnya (clock)
+        self._global_next = 0.0
+
+        self.sent = 0
+        self.merged = 0
+        self.failed = 0
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def enqueue(self, chat_id: int, text: str, thread_id: Optional[int] = None):
+        """Masukkan pesan ke antrian (tidak menunggu pengiriman)."""
+        self._queues.setdefault(chat_id, deque()).append(OutboundMessage(chat_id, thread_id, text, self._clock()))
+        QUEUE_DEPTH.set(len(self))
+
+        worker = self._workers.get(chat_id)
+        if worker is None or worker.done():
+            self._workers[chat_id] = asyncio.get_running_loop().create_task(self._worker(chat_id))
+
+    async def close(self, timeout: float = 10.0):
+        """Tunggu antrian kosong (maks `timeout` detik), lalu hentikan worker."""
+        workers = [w for w in self._workers.values() if not w.done()]
+        if workers:
+            _, pending = await asyncio.wait(workers, timeout=timeout)
+            for worker in pending:
+                worker.cancel()
+            if pending:
+                logger.warning(f"SEND QUEUE CLOSED: {len(self)} pesan tidak terkirim")
+
+    # ---------- worker ----------
+
+    async def _worker(self, chat_id: int):
+        queue = self._queues[chat_id]
+
+        while queue:
+            # beri waktu pesan lain di detik yang sama untuk ikut digabung
+            wait = queue[0].queued_at + self.coalesce - self._clock()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            message = self._take_batch(queue)
+            QUEUE_DEPTH.set(len(self))
+
+            await self._pace(chat_id)
+
+            try:
+                await self._deliver(message)
+                self.sent += 1
+                QUEUE_DELAY_SECONDS.observe(self._clock() - message.queued_at)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"TELEGRAM SEND FAILED chat={chat_id} thread={message.thread_id}: {e}")
+                if self._on_error is not None:
+                    self._on_error(message, e)
+
+    def _take_batch(self, queue: deque) -> OutboundMessage:
+        """Ambil pesan pertama + pesan berikutnya ke thread yang sama selama masih muat."""
+        first = queue.popleft()
+        texts = [first.text]
+        length = len(first.text)
+
+        rest = deque()
+        while queue:
+            message = queue.popleft()
+            if (
+                message.thread_id == first.thread_id
+                and message.queued_at - first.queued_at <= self.coalesce
+                and length + 1 + len(message.text) <= MAX_MESSAGE_LENGTH
+            ):
+                texts.append(message.text)
+                length += 1 + len(message.text)
+                self.merged += 1
+            else:
+                rest.append(message)
+        queue.extend(rest)
+
+        if len(texts) == 1:
+            return first
+        return OutboundMessage(first.chat_id, first.thread_id, "\n".join(texts), first.queued_at)
+
+    async def _pace(self, chat_id: int):
+        wait = self._chat_next.get(chat_id, 0.0) - self._clock()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        # slot global baru dipesan setelah jeda per chat selesai, supaya
+        # chat yang sedang menunggu tidak menahan chat lain
+        now = self._clock()
+        at = max(now, self._global_next)
+        self._global_next = at + self.global_interval
+        self._chat_next[chat_id] = at + self.chat_interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+    async def _deliver(self, message: OutboundMessage):
+        """
+        Kirim dengan retry. Slot `max_inflight` hanya dipegang selama satu
+        request; jeda flood wait / backoff dijalani di luar slot, jadi chat
+        yang sedang menunggu tidak menahan pengiriman ke chat lain.
+        """
+        attempt = 0
+        # jam loop, bukan perf_counter: di mode replay latency Telegram tiruan ikut terukur
+        loop = asyncio.get_running_loop()
+
+        while True:
+            started = loop.time()
+            try:
+                async with self._inflight:
+                    await self._send_message(message.chat_id, message.thread_id, message.text)
+                SEND_SECONDS.observe(loop.time() - started, status="ok")
+                return
+
+            except RetryAfter as e:
+                SEND_SECONDS.observe(loop.time() - started, status="flood_wait")
+                retry_after = e.retry_after
+                delay = retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+                logger.warning(f"TELEGRAM FLOOD WAIT {delay:.0f}s chat={message.chat_id}")
+                # flood wait berlaku untuk chat ini -> worker lain tetap jalan
+                self._chat_next[message.chat_id] = self._clock() + delay
+                delay = None
+
+            except BadRequest:
+                SEND_SECONDS.observe(loop.time() - started, status="bad_request")
+                raise  # turunan NetworkError, tapi retry tidak akan membantu
+
+            except NetworkError as e:
+                SEND_SECONDS.observe(loop.time() - started, status="network_error")
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"TELEGRAM NETWORK ERROR ({e}), retry dalam {delay:.1f}s")
+
+            except TelegramError:
+                SEND_SECONDS.observe(loop.time() - started, status="error")
+                raise  # Forbidden dll: retry tidak akan membantu
+
+            attempt += 1
+            if attempt > self.retries:
+                raise RuntimeError(f"gagal setelah {self.retries} retry")
+
+            if delay is None:
+                await self._pace(message.chat_id)  # tunggu flood wait chat ini + slot global
+            else:
+                await asyncio.sleep(delay)
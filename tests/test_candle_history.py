@@ -0,0 +1,76 @@
+import asyncio
+
+from candle_history import HistoryFetcher
+from smc_engine import CandleSeries
+
+STEP = 3600
+
+
+def bars(start, end):
+    times = list(range(start, end, STEP))
+    return CandleSeries(times, [1.0] * len(times), [2.0] * len(times), [0.5] * len(times), [1.5] * len(times))
+
+
+class SlowProvider:
+    """Provider palsu: setiap fetch butuh waktu, candle baru muncul setiap fetch."""
+
+    def __init__(self):
+        self.end = 10 * STEP
+        self.active = 0
+        self.max_active = 0
+        self.starts = []
+
+    async def _fetch(self, start):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.starts.append(start)
+        try:
+            await asyncio.sleep(0.01)
+            self.end += STEP
+            return bars(start if start is not None else 0, self.end)
+        finally:
+            self.active -= 1
+
+    async def fetch_candles(self, symbol, interval, count, start=None):
+        return await self._fetch(start)
+
+    async def fetch_many(self, symbols, interval, count, start=None):
+        return {symbol: await self._fetch(start) for symbol in symbols}
+
+
+class RecordingStore:
+    def __init__(self):
+        self.writes = []
+
+    def read(self, symbol, interval):
+        return CandleSeries()
+
+    def append(self, symbol, interval, candles):
+        self.writes.append(("append", candles.times[0], candles.last_time))
+
+    def replace(self, symbol, interval, candles):
+        self.writes.append(("replace", candles.times[0], candles.last_time))
+
+
+def test_concurrent_delta_fetches_are_serialized():
+    provider = SlowProvider()
+    store = RecordingStore()
+    fetcher = HistoryFetcher(provider, store=store)
+
+    async def main():
+        await fetcher.fetch("XAU/USD", "1h", 5)
+        return await asyncio.gather(
+            fetcher.fetch("XAU/USD", "1h", 5),
+            fetcher.fetch("XAU/USD", "1h", 5),
+            fetcher.fetch_many(["XAU/USD"], "1h", 5),
+        )
+
+    first, second, batch = asyncio.run(main())
+
+    assert provider.max_active == 1
+    # setiap delta mulai dari candle terakhir hasil fetch sebelumnya
+    assert provider.starts == [None, 10 * STEP, 11 * STEP, 12 * STEP]
+    assert [w[0] for w in store.writes] == ["replace", "append", "append", "append"]
+    assert first.last_time < second.last_time < batch["XAU/USD"].last_time
+    history = fetcher.history("XAU/USD", "1h")
+    assert list(history.series.times) == list(range(0, 14 * STEP, STEP))
@@ -0,0 +1,109 @@
+import pytest
+
+from journal import SignalJournal
+from smc_engine import CandleSeries, SMCResult
+
+SYMBOL, INTERVAL, STEP = "XAU/USD", "1h", 3600
+T0 = 1_704_067_200  # entry 2000 -> TP1 2007, TP2 2015, SL 1995 (BUY)
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def series(*bars):
+    """bars = (high, low) per candle, mulai T0, open / close 2000."""
+    times = [T0 + i * STEP for i in range(len(bars))]
+    return CandleSeries(times, [2000.0] * len(bars), [b[0] for b in bars], [b[1] for b in bars], [2000.0] * len(bars))
+
+
+def buy_signal():
+    return SMCResult(bias="BUY", structure="BOS_UP", last_close=2000.0)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def journal(clock):
+    journal = SignalJournal(clock=clock)
+    yield journal
+    journal.close()
+
+
+def test_outcome_resolved_incrementally(journal, clock):
+    clock.now = T0 + STEP
+    row_id = journal.record(SYMBOL, INTERVAL, series((2001, 1999)), buy_signal())
+    assert journal.record(SYMBOL, INTERVAL, series((2001, 1999)), buy_signal()) is None  # duplikat
+
+    clock.now = T0 + 2 * STEP
+    assert journal.on_candles(SYMBOL, INTERVAL, series((2001, 1999), (2008, 1999))) == []
+    entry = journal.history(SYMBOL, INTERVAL)[0]
+    assert (entry.leg1, entry.leg2, entry.outcome) == (7, None, None)
+
+    # candle ke-3 masih forming -> belum dievaluasi walau sudah menyentuh TP2
+    candles = series((2001, 1999), (2008, 1999), (2016, 1999))
+    assert journal.on_candles(SYMBOL, INTERVAL, candles) == []
+
+    clock.now = T0 + 3 * STEP
+    assert journal.on_candles(SYMBOL, INTERVAL, candles) == [row_id]
+    entry = journal.history(SYMBOL, INTERVAL)[0]
+    assert (entry.outcome, entry.resolved_time, entry.pnl) == ("TP2", T0 + 2 * STEP, 11)
+
+    assert journal.on_candles(SYMBOL, INTERVAL, candles) == []
+
+
+def test_sl_wins_when_touched_in_same_candle(journal, clock):
+    clock.now = T0 + STEP
+    journal.record(SYMBOL, INTERVAL, series((2001, 1999)), buy_signal())
+
+    clock.now = T0 + 2 * STEP
+    journal.on_candles(SYMBOL, INTERVAL, series((2001, 1999), (2016, 1994)))
+    entry = journal.history(SYMBOL, INTERVAL)[0]
+    assert (entry.outcome, entry.pnl) == ("SL", -5)
+
+
+def test_forming_signal_bar_is_checked_after_close(journal, clock):
+    # sinyal di tengah candle T0 (mis. /signal jam xx:30)
+    clock.now = T0 + STEP / 2
+    row_id = journal.record(SYMBOL, INTERVAL, series((2001, 1999)), buy_signal())
+    assert journal.on_candles(SYMBOL, INTERVAL, series((2001, 1999))) == []
+
+    # sisa candle T0 setelah sinyal menyentuh TP2
+    clock.now = T0 + STEP
+    assert journal.on_candles(SYMBOL, INTERVAL, series((2016, 1999))) == [row_id]
+    entry = journal.history(SYMBOL, INTERVAL)[0]
+    assert (entry.outcome, entry.resolved_time) == ("TP2", T0)
+
+
+def test_signal_without_setup_is_not_tracked(journal, clock):
+    clock.now = T0 + STEP
+    journal.record(SYMBOL, INTERVAL, series((2001, 1999)), SMCResult(structure="RANGE", last_close=2000.0))
+
+    clock.now = T0 + 3 * STEP
+    assert journal.on_candles(SYMBOL, INTERVAL, series((2001, 1999), (2016, 1990))) == []
+    entry = journal.history(SYMBOL, INTERVAL)[0]
+    assert (entry.setup, entry.outcome) == (None, None)
+
+
+def test_open_setup_survives_restart(tmp_path, clock):
+    path = str(tmp_path / "journal.db")
+    journal = SignalJournal(path, clock=clock)
+    clock.now = T0 + STEP
+    row_id = journal.record(SYMBOL, INTERVAL, series((2001, 1999)), buy_signal())
+    clock.now = T0 + 2 * STEP
+    journal.on_candles(SYMBOL, INTERVAL, series((2001, 1999), (2008, 1999)))
+    journal.close()
+
+    journal = SignalJournal(path, clock=clock)
+    clock.now = T0 + 3 * STEP
+    assert journal.on_candles(SYMBOL, INTERVAL, series((2001, 1999), (2008, 1999), (2001, 1994))) == [row_id]
+    entry = journal.history(SYMBOL, INTERVAL)[0]
+    assert (entry.outcome, entry.leg1, entry.leg2, entry.resolved_time) == ("TP1", 7, -5, T0 + 2 * STEP)
+    journal.close()
@@ -0,0 +1,104 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytz
+
+from market_session import NEW_YORK, SessionCalendar, standard_holidays
+
+UTC = pytz.utc
+
+
+def utc(*args) -> int:
+    return int(datetime(*args, tzinfo=UTC).timestamp())
+
+
+def reference_is_open(calendar: SessionCalendar, ts: int) -> bool:
+    """Definisi sesi langsung per timestamp: hari trading D = D-1 18:00 ET .. D 17:00 ET."""
+    local = datetime.fromtimestamp(ts, UTC).astimezone(NEW_YORK)
+    trading_day = (local + timedelta(hours=6)).date()
+    if trading_day.weekday() >= 5 or trading_day in calendar.holidays:
+        return False
+    if not calendar.daily_break:
+        # jeda 17:00 - 18:00 ikut buka kalau hari trading berikutnya juga ada sesi
+        if local.hour == 17:
+            following = trading_day + timedelta(days=1)
+            return following.weekday() < 5 and following not in calendar.holidays
+        return True
+    return not 17 <= local.hour < 18
+
+
+@pytest.fixture(scope="module")
+def calendar():
+    return SessionCalendar(start_year=2020, end_year=2026, holidays=["2024-07-04"])
+
+
+def test_matches_reference_every_30_minutes(calendar):
+    start, end = utc(2021, 1, 1), utc(2025, 12, 31)
+    for ts in range(start, end, 1800):
+        assert calendar.is_open(ts) == reference_is_open(calendar, ts), datetime.fromtimestamp(ts, UTC)
+
+
+def test_mask_matches_is_open(calendar):
+    times = list(range(utc(2024, 3, 1), utc(2024, 4, 15), 900))
+    mask = calendar.mask(times, offset=3600)
+    assert [bool(m) for m in mask] == [calendar.is_open(t + 3600) for t in times]
+
+
+@pytest.mark.parametrize(
+    "ts, expected",
+    [
+        # minggu sebelum DST (EST, UTC-5): buka Minggu 23:00 UTC, jeda 22:00 - 23:00 UTC
+        (utc(2024, 3, 3, 22, 30), False),
+        (utc(2024, 3, 3, 23, 0), True),
+        (utc(2024, 3, 5, 21, 30), True),
+        (utc(2024, 3, 5, 22, 30), False),
+        # DST mulai 10 Maret (EDT, UTC-4): buka Minggu 22:00 UTC, jeda 21:00 - 22:00 UTC
+        (utc(2024, 3, 10, 22, 0), True),
+        (utc(2024, 3, 12, 21, 30), False),
+        (utc(2024, 3, 12, 22, 30), True),
+        # DST selesai 3 November: kembali ke 23:00 UTC
+        (utc(2024, 11, 3, 22, 30), False),
+        (utc(2024, 11, 3, 23, 0), True),
+        # Jumat tutup 17:00 ET
+        (utc(2024, 3, 15, 20, 59), True),
+        (utc(2024, 3, 15, 21, 0), False),
+    ],
+)
+def test_dst_boundaries(calendar, ts, expected):
+    assert calendar.is_open(ts) is expected
+
+
+def test_holidays(calendar):
+    # Good Friday 2024 = 29 Maret: sesi Kamis 18:00 ET - Jumat 17:00 ET hilang
+    assert date(2024, 3, 29) in standard_holidays(2024)
+    assert calendar.is_open(utc(2024, 3, 28, 12))
+    assert not calendar.is_open(utc(2024, 3, 29, 12))
+    assert calendar.next_open(utc(2024, 3, 28, 22)) == utc(2024, 3, 31, 22)
+
+    # Natal 2022 jatuh hari Minggu -> libur Senin 26 Desember
+    assert not calendar.is_open(utc(2022, 12, 26, 12))
+    assert calendar.is_open(utc(2022, 12, 27, 12))
+
+    # libur tambahan dari config
+    assert not calendar.is_open(utc(2024, 7, 4, 12))
+    assert SessionCalendar(start_year=2020, end_year=2026).is_open(utc(2024, 7, 4, 12))
+
+
+def test_next_open_and_close_over_weekend(calendar):
+    friday = utc(2024, 6, 14, 20)
+    assert calendar.next_close(friday) == utc(2024, 6, 14, 21)
+    assert calendar.next_open(friday) == utc(2024, 6, 16, 22)
+
+
+def test_without_daily_break():
+    calendar = SessionCalendar(start_year=2023, end_year=2025, daily_break=False)
+    assert calendar.is_open(utc(2024, 3, 12, 21, 30))
+    assert not calendar.is_open(utc(2024, 3, 15, 21, 30))
+    assert not calendar.is_open(utc(2024, 3, 16, 12))
+    for ts in range(utc(2024, 1, 1), utc(2024, 12, 31), 1800):
+        assert calendar.is_open(ts) == reference_is_open(calendar, ts), datetime.fromtimestamp(ts, UTC)
+
+
+def test_out_of_range_raises(calendar):
+    with pytest.raises(ValueError):
+        calendar.is_open(utc(2030, 1, 1))
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from rate_limit import PRIORITY_ADHOC, PRIORITY_SCHEDULED, BudgetExhausted, CreditScheduler
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_per_minute_below_one_credit_is_rejected():
+    with pytest.raises(ValueError):
+        CreditScheduler(per_minute=0.5)
+
+
+def test_oversize_request_raises_budget_exhausted():
+    scheduler = CreditScheduler(per_minute=8.5, clock=FakeClock())
+    assert scheduler.max_credits == 8
+
+    async def main():
+        with pytest.raises(BudgetExhausted):
+            await scheduler.acquire(9, PRIORITY_SCHEDULED)
+        await scheduler.acquire(scheduler.max_credits, PRIORITY_SCHEDULED)
+
+    asyncio.run(main())
+    assert scheduler.rejected == 1
+    assert scheduler.granted[PRIORITY_SCHEDULED] == 8
+
+
+def test_daily_reserve_only_for_scheduled():
+    scheduler = CreditScheduler(per_minute=8, per_day=10, scheduled_reserve=4, clock=FakeClock())
+
+    async def main():
+        await scheduler.acquire(6, PRIORITY_ADHOC)
+        with pytest.raises(BudgetExhausted):
+            await scheduler.acquire(1, PRIORITY_ADHOC)
+        await scheduler.acquire(2, PRIORITY_SCHEDULED)
+
+    asyncio.run(main())
+    assert scheduler.metrics()["day_remaining"] == 2
@@ -0,0 +1,96 @@
+import pytest
+
+from benchmark import GENERATORS, generate
+from smc_engine import (
+    FVG,
+    IncrementalSMCEngine,
+    OrderBlock,
+    SMCConfig,
+    analyze,
+    scan_zones,
+)
+
+
+def push_all(engine, series, stop=None):
+    times, opens, highs, lows, closes = series.times, series.opens, series.highs, series.lows, series.closes
+    for i in range(stop if stop is not None else len(series)):
+        engine.push_bar(times[i], opens[i], highs[i], lows[i], closes[i])
+
+
+@pytest.mark.parametrize("kind", GENERATORS)
+@pytest.mark.parametrize("config", [SMCConfig(), SMCConfig(swing_left=3, swing_right=1)])
+def test_incremental_matches_analyze(kind, config):
+    series = generate(kind, 400, seed=7)
+    engine = IncrementalSMCEngine(config)
+    times, opens, highs, lows, closes = series.times, series.opens, series.highs, series.lows, series.closes
+
+    for i in range(len(series)):
+        engine.push_bar(times[i], opens[i], highs[i], lows[i], closes[i])
+        if i % 7 and i != len(series) - 1:
+            continue
+        history = series[:i + 1]
+        assert engine.result() == analyze(history, config), i
+        assert engine.result(window=60) == analyze(history.tail(60), config), i
+
+
+@pytest.mark.parametrize("kind", GENERATORS)
+def test_incremental_forming_bar_matches_analyze(kind):
+    series = generate(kind, 300, seed=3)
+    engine = IncrementalSMCEngine()
+    push_all(engine, series, stop=len(series) - 1)
+
+    # candle terakhir masih forming: dibuka, lalu high / low / close berubah per tick
+    last = len(series) - 1
+    t, o = series.times[last], series.opens[last]
+    engine.push_bar(t, o, o, o, o)
+    high = low = o
+    for close in (o + 1.5, o - 3.0, o + 6.0, series.closes[last]):
+        high, low = max(high, close), min(low, close)
+        engine.update_last_bar(t, o, high, low, close)
+
+        expected = series.copy()
+        expected.set_last(t, o, high, low, close)
+        assert engine.result(window=60) == analyze(expected.tail(60))
+        assert engine.sweep(window=60) == analyze(expected.tail(60)).liquidity_sweep
+
+
+def brute_force_zones(series):
+    """Aturan zona `scan_zones` dengan rescan O(n^2) sebagai referensi."""
+    opens, highs, lows, closes = series.opens, series.highs, series.lows, series.closes
+    n = len(series)
+    obs, fvgs = [], []
+
+    for i in range(n - 1):
+        bearish, bullish = closes[i] < opens[i], closes[i] > opens[i]
+        next_bearish, next_bullish = closes[i + 1] < opens[i + 1], closes[i + 1] > opens[i + 1]
+        if bearish and not next_bearish:
+            hit = next((j for j in range(i + 1, n) if closes[j] < lows[i]), None)
+            obs.append(OrderBlock(index=i, kind="bullish", top=highs[i], bottom=lows[i],
+                                  mitigated=hit is not None, mitigated_index=hit))
+        if bullish and not next_bullish:
+            hit = next((j for j in range(i + 1, n) if closes[j] > highs[i]), None)
+            obs.append(OrderBlock(index=i, kind="bearish", top=highs[i], bottom=lows[i],
+                                  mitigated=hit is not None, mitigated_index=hit))
+
+    for i in range(1, n - 1):
+        if lows[i + 1] > highs[i - 1]:
+            hit = next((j for j in range(i + 2, n) if lows[j] <= highs[i - 1]), None)
+            fvgs.append(FVG(index=i, kind="bullish", top=lows[i + 1], bottom=highs[i - 1],
+                            filled=hit is not None, filled_index=hit))
+        if highs[i + 1] < lows[i - 1]:
+            hit = next((j for j in range(i + 2, n) if highs[j] >= lows[i - 1]), None)
+            fvgs.append(FVG(index=i, kind="bearish", top=lows[i - 1], bottom=highs[i + 1],
+                            filled=hit is not None, filled_index=hit))
+
+    return obs, fvgs
+
+
+@pytest.mark.parametrize("kind", GENERATORS)
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 500])
+def test_scan_zones_matches_brute_force(kind, n):
+    series = generate(kind, n, seed=11)
+    scan = scan_zones(series)
+    obs, fvgs = brute_force_zones(series)
+
+    assert scan.order_blocks == obs
+    assert scan.fvgs == fvgs
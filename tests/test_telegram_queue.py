@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from telegram.error import NetworkError, RetryAfter
+
+from replay import VirtualClockLoop
+from telegram_queue import SendQueue
+
+
+def run_virtual(coro_factory):
+    """Jalankan coroutine di loop jam virtual (sleep panjang dilompati)."""
+    loop = VirtualClockLoop()
+    try:
+        return loop.run_until_complete(coro_factory(loop))
+    finally:
+        loop.close()
+
+
+def test_flood_wait_does_not_block_other_chats():
+    delivered = {}
+
+    async def scenario(loop):
+        flooded = {"left": 1}
+
+        async def send_message(chat_id, thread_id, text):
+            if chat_id == 1 and flooded["left"]:
+                flooded["left"] -= 1
+                raise RetryAfter(30)
+            delivered[chat_id] = loop.time() - started
+
+        queue = SendQueue(
+            send_message, chat_interval=3, global_rate=1000, coalesce=0, max_inflight=1, clock=loop.time
+        )
+        started = loop.time()
+        queue.enqueue(1, "flood")
+        await asyncio.sleep(0)
+        for chat_id in range(2, 12):
+            queue.enqueue(chat_id, "signal")
+        await queue.close(timeout=120)
+
+    run_virtual(scenario)
+
+    # chat lain terkirim dalam interval pacing walau chat 1 kena flood wait 30 detik
+    assert set(delivered) == set(range(1, 12))
+    assert max(delivered[chat_id] for chat_id in range(2, 12)) < 3
+    assert delivered[1] >= 30
+
+
+def test_network_error_is_retried_then_delivered():
+    calls = []
+
+    async def scenario(loop):
+        async def send_message(chat_id, thread_id, text):
+            calls.append(text)
+            if len(calls) < 3:
+                raise NetworkError("timeout")
+
+        queue = SendQueue(send_message, coalesce=0, backoff=1, clock=loop.time)
+        queue.enqueue(7, "hello")
+        await queue.close(timeout=60)
+        return queue
+
+    queue = run_virtual(scenario)
+    assert calls == ["hello"] * 3
+    assert (queue.sent, queue.failed) == (1, 0)
+
+
+def test_permanent_error_calls_on_error():
+    failed = []
+
+    async def scenario(loop):
+        async def send_message(chat_id, thread_id, text):
+            raise NetworkError("down")
+
+        queue = SendQueue(
+            send_message, coalesce=0, retries=2, backoff=0.1, clock=loop.time,
+            on_error=lambda message, exc: failed.append((message.chat_id, str(exc))),
+        )
+        queue.enqueue(5, "x")
+        await queue.close(timeout=60)
+
+    run_virtual(scenario)
+    assert failed == [(5, "gagal setelah 2 retry")]
+
+
+def test_messages_to_same_thread_are_coalesced():
+    sent = []
+
+    async def scenario(loop):
+        async def send_message(chat_id, thread_id, text):
+            sent.append((chat_id, thread_id, text))
+
+        queue = SendQueue(send_message, coalesce=1, clock=loop.time)
+        queue.enqueue(1, "a", thread_id=9)
+        queue.enqueue(1, "b", thread_id=9)
+        queue.enqueue(1, "c", thread_id=8)
+        await queue.close(timeout=60)
+        return queue
+
+    queue = run_virtual(scenario)
+    assert sent == [(1, 9, "a\nb"), (1, 8, "c")]
+    assert queue.merged == 1
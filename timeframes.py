@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Multi Timeframe
+===============
+Bangun candle timeframe lebih besar (1h / 4h / 1day) dari SATU stream
+candle base interval, lalu gabungkan bias SMC semua timeframe.
+
+Dengan begini konfirmasi 4h untuk setup 15min tidak butuh request API
+tambahan per interval, dan setiap timeframe bisa memakai history base
+yang panjang.
+
+Bucket dihitung dari epoch UTC (sama dengan candle Twelve Data saat
+`timezone=UTC`). Jam market tutup (weekend, jeda harian) tidak punya
+candle base, jadi bucket kosong otomatis dilewati, dan bucket di awal /
+akhir sesi dibentuk dari candle yang ada saja.
+
+Catatan: bucket 4h / 1day mulai di kelipatan epoch UTC, jadi candle 1day
+hasil resample = hari 00:00 - 24:00 UTC (sama dengan candle 1day Twelve
+Data `timezone=UTC`), BUKAN hari trading 18:00 - 17:00 New York seperti
+di `market_session`. Satu candle harian di sini memuat akhir sesi kemarin
+dan awal sesi hari ini.
+"""
+
+from typing import Optional
+
+from smc_engine import DEFAULT_CONFIG, CandleSeries, SMCConfig, SMCResult, analyze, interval_seconds
+
+
+# Batas `outputsize` Twelve Data per request time_series.
+MAX_BASE_COUNT = 5000
+
+
+# ================= RESAMPLE =================
+
+def resample(series: CandleSeries, interval: str) -> CandleSeries:
+    """
+    Agregasi `series` ke `interval` yang lebih besar. Candle terakhir bisa
+    masih forming (belum semua candle base-nya ada), sama seperti candle
+    terakhir dari API.
+    """
+    step = interval_seconds(interval)
+    times, opens, highs, lows, closes = series.times, series.opens, series.highs, series.lows, series.closes
+
+    out = CandleSeries()
+    bucket = None
+    o = h = l = c = 0.0
+
+    for i in range(len(times)):
+        start = times[i] - times[i] % step
+
+        if start != bucket:
+            if bucket is not None:
+                out.append(bucket, o, h, l, c)
+            bucket = start
+            o, h, l, c = opens[i], highs[i], lows[i], closes[i]
+            continue
+
+        if highs[i] > h:
+            h = highs[i]
+        if lows[i] < l:
+            l = lows[i]
+        c = closes[i]
+
+    if bucket is not None:
+        out.append(bucket, o, h, l, c)
+
+    return out
+
+
+# ================= CONFLUENCE =================
+
+def analyze_mtf(
+    candles: CandleSeries,
+    interval: str,
+    higher: tuple = (),
+    count: Optional[int] = None,
+    config: SMCConfig = DEFAULT_CONFIG,
+) -> SMCResult:
+    """
+    Analisa `count` candle terakhir di base `interval`, lalu konfirmasi ke
+    setiap timeframe di `higher` (hasil resample `candles`, juga `count`
+    candle terakhir). Bias base dibatalkan kalau ada timeframe besar yang
+    biasnya berlawanan; timeframe besar yang masih RANGE hanya dicatat.
+    """
+    base = candles.tail(count) if count else candles
+    result = analyze(base, config)
+    result.timeframes[interval] = result.bias
+
+    base_step = interval_seconds(interval)
+
+    for tf in higher:
+        if interval_seconds(tf) <= base_step:
+            continue
+
+        htf = resample(candles, tf)
+        htf_result = analyze(htf.tail(count) if count else htf, config)
+        result.timeframes[tf] = htf_result.bias
+
+        if htf_result.bias is None:
+            result.reasons.append(f"Timeframe {tf}: belum ada bias jelas ({htf_result.structure})")
+            continue
+
+        result.reasons.append(f"Timeframe {tf}: bias {htf_result.bias} ({htf_result.structure})")
+
+        if result.bias is not None and htf_result.bias != result.bias:
+            result.reasons.append(
+                f"Bias {interval} ({result.bias}) bertentangan dengan {tf} ({htf_result.bias}) -> sinyal ditahan (no trade)"
+            )
+            result.bias = None
+
+    return result
+
+
+def base_count(interval: str, higher: tuple, count: int, limit: int = MAX_BASE_COUNT) -> int:
+    """
+    Jumlah candle base yang dibutuhkan supaya timeframe terbesar dapat
+    `count` candle, dibatasi `limit` (outputsize API / panjang history).
+    Kalau kena batas, timeframe terbesar dapat candle lebih sedikit.
+    """
+    base_step = interval_seconds(interval)
+    ratio = max([interval_seconds(tf) // base_step for tf in higher] + [1])
+    return min(count * ratio, limit)